@@ -15,16 +15,46 @@ Usage:
         stream_mode="messages"
     ):
         # Process streaming events
+
+Exports are resolved lazily (PEP 562) so importing a light submodule such as
+agent.tokens does not pull in LangGraph, the Mistral client or the RAG stack.
 """
-from agent.state import AgentState
-from agent.tools import search_knowledge_base
-from agent.prompts import get_agent_prompt
-from agent.graph import create_agent_graph, get_recursion_limit
+import importlib
+
+_EXPORTS = {
+    "AgentState": "agent.state",
+    "search_knowledge_base": "agent.tools",
+    "get_agent_prompt": "agent.prompts",
+    "get_rendered_prompt": "agent.prompts",
+    "RenderedPrompt": "agent.prompts",
+    "create_agent_graph": "agent.graph",
+    "get_recursion_limit": "agent.graph",
+    "compact_history": "agent.history",
+    "CompactionResult": "agent.history",
+    "pack_context": "agent.context",
+    "PackedContext": "agent.context",
+    "ReplayChatModel": "agent.replay",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'agent' has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
+
 
 __all__ = [
     "AgentState",
     "search_knowledge_base",
     "get_agent_prompt",
+    "get_rendered_prompt",
+    "RenderedPrompt",
     "create_agent_graph",
     "get_recursion_limit",
+    "compact_history",
+    "CompactionResult",
+    "pack_context",
+    "PackedContext",
+    "ReplayChatModel",
 ]
@@ -0,0 +1,173 @@
+"""Token-budgeted packing of retrieved chunks into a tool observation.
+
+Every tool observation is sent back to Mistral on each following LLM call of
+the run, so its size adds directly to prompt processing time. Instead of
+joining the top chunks verbatim, the retrieved (row, score) results are
+packed into settings.tool_context_max_tokens:
+
+1. The top MAX_CHUNKS chunks are grouped by knowledge entry (source file +
+   Section + Entry header metadata from rag/chunking.py); entries are
+   ordered by their best fused score.
+2. Within an entry, chunks are put back in document order (chunk_index) and
+   adjacent pieces are merged, dropping the text splitter's overlap between
+   them. Non-adjacent pieces are joined with an ellipsis.
+3. Repeated markdown header lines and separator-only chunks are dropped; each
+   entry gets one compact heading ("### Section > Entry") instead.
+4. Entries are added until the budget is reached; the entry that crosses it
+   is cut at a line boundary.
+
+Metrics:
+    agent.observation_tokens_before   tokens of the unpacked top-5 observation
+    agent.observation_tokens_after    tokens of the packed observation
+"""
+
+import logging
+from dataclasses import dataclass
+
+from config import get_settings
+from agent.tokens import CHARS_PER_TOKEN, estimate_tokens
+from rag.chunk_store import ChunkStore
+from rag.chunking import CHUNK_OVERLAP
+from runtime import get_metrics
+
+logger = logging.getLogger(__name__)
+
+SEPARATOR = "\n\n---\n\n"
+ELLIPSIS = "\n…\n"
+
+# Chunks considered per observation (as many as the unpacked observation joined)
+MAX_CHUNKS = 5
+
+# Don't start an entry that would be cut below this many tokens
+MIN_ENTRY_TOKENS = 24
+
+
+@dataclass
+class PackedContext:
+    """A packed tool observation and its size before and after packing."""
+
+    text: str
+    tokens_before: int
+    tokens_after: int
+    chunks: int
+    entries: int
+
+
+def _strip_headers(text: str) -> str:
+    """Drop the leading markdown header lines (kept in chunks by the header
+    splitter) and trailing "---" entry separators."""
+    lines = [line.rstrip() for line in text.strip().splitlines()]
+    while lines and lines[0].lstrip().startswith("#"):
+        lines.pop(0)
+    while lines and lines[-1].strip("- ") == "":
+        lines.pop()
+    return "\n".join(lines).strip()
+
+
+def _merge(previous: str, following: str) -> str:
+    """Join consecutive pieces of one entry, dropping the splitter overlap."""
+    longest = min(len(previous), len(following), 2 * CHUNK_OVERLAP)
+    for size in range(longest, 0, -1):
+        if previous.endswith(following[:size]):
+            return previous + following[size:]
+    return f"{previous}\n{following}"
+
+
+def _heading(chunks: ChunkStore, row: int) -> str:
+    parts = [chunks.value(row, key) for key in ("Section", "Entry")]
+    parts = [part for part in parts if part] or [chunks.value(row, "title", "")]
+    return f"### {' > '.join(parts)}" if any(parts) else ""
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text to max_tokens, at the last line (or word) boundary that fits."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind("\n", 0, limit)
+    if cut < limit // 2:
+        cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > 0 else limit].rstrip() + " …"
+
+
+def pack_context(
+    chunks: ChunkStore,
+    results: list[tuple[int, float]],
+    max_tokens: int | None = None,
+) -> PackedContext:
+    """Pack ranked (row, score) results into one observation within a token budget.
+
+    Args:
+        chunks: Chunk store the rows belong to
+        results: Deduplicated (row, fused score) pairs
+        max_tokens: Token budget (default: settings.tool_context_max_tokens)
+
+    Returns:
+        The packed observation with before/after token estimates
+    """
+    max_tokens = max_tokens or get_settings().tool_context_max_tokens
+    ranked = sorted(results, key=lambda item: item[1], reverse=True)[:MAX_CHUNKS]
+    tokens_before = estimate_tokens(SEPARATOR.join(chunks.text(row) for row, _ in ranked))
+
+    # Entries in order of their best score, with their rows in document order
+    entries: dict[tuple, list[int]] = {}
+    for row, _ in ranked:
+        key = tuple(chunks.value(row, field) for field in ("source", "Section", "Entry"))
+        entries.setdefault(key, []).append(row)
+
+    blocks: list[str] = []
+    used_tokens = 0
+    packed_chunks = 0
+    for rows in entries.values():
+        rows.sort(key=lambda row: (chunks.value(row, "chunk_index", 0), row))
+        body, last_index, pieces = "", None, 0
+        for row in rows:
+            piece = _strip_headers(chunks.text(row))
+            if not piece or piece in body:
+                continue
+            index = chunks.value(row, "chunk_index", 0)
+            if not body:
+                body = piece
+            elif last_index is not None and index == last_index + 1:
+                body = _merge(body, piece)
+            else:
+                body = body + ELLIPSIS + piece
+            last_index = index
+            pieces += 1
+        if not body:
+            continue
+
+        heading = _heading(chunks, rows[0])
+        block = f"{heading}\n{body}" if heading else body
+        cost = estimate_tokens(block) + (estimate_tokens(SEPARATOR) if blocks else 0)
+        remaining = max_tokens - used_tokens
+        if cost > remaining:
+            if blocks and remaining < MIN_ENTRY_TOKENS:
+                break
+            block = _truncate(block, remaining - (estimate_tokens(SEPARATOR) if blocks else 0))
+            blocks.append(block)
+            packed_chunks += pieces
+            break
+        blocks.append(block)
+        packed_chunks += pieces
+        used_tokens += cost
+
+    text = SEPARATOR.join(blocks)
+    return PackedContext(
+        text=text,
+        tokens_before=tokens_before,
+        tokens_after=estimate_tokens(text),
+        chunks=packed_chunks,
+        entries=len(blocks),
+    )
+
+
+def record_packing(packed: PackedContext) -> None:
+    """Report a packed observation's token savings (log + metrics)."""
+    metrics = get_metrics()
+    metrics.observe("agent.observation_tokens_before", packed.tokens_before)
+    metrics.observe("agent.observation_tokens_after", packed.tokens_after)
+    logger.info(
+        f"Observation packed: {packed.tokens_before} -> {packed.tokens_after} tokens "
+        f"({packed.chunks} chunks in {packed.entries} entries)"
+    )
@@ -0,0 +1,180 @@
+"""Server-side conversation state backed by a LangGraph SQLite checkpointer.
+
+In conversation-ID mode the client sends only the new user message together
+with a conversation_id. The compiled graph uses the ID as LangGraph thread_id,
+so the stored AgentState (all prior messages, including tool calls and tool
+results) is restored by the checkpointer and the new message is appended.
+
+Conversation IDs are issued by the server (create_conversation): random,
+unguessable tokens that act as the bearer credential for their thread. IDs
+the server did not issue, or whose conversation has expired, are rejected
+(conversation_exists), so a client cannot pick or guess another thread.
+
+Threads that have not been used for settings.conversation_ttl_seconds are
+evicted by a background sweep.
+"""
+
+import asyncio
+import logging
+import secrets
+import time
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from config import get_settings
+
+if TYPE_CHECKING:
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+logger = logging.getLogger(__name__)
+
+_ACTIVITY_TABLE = "conversation_activity"
+
+_checkpointer: "AsyncSqliteSaver | None" = None
+_exit_stack: AsyncExitStack | None = None
+_evict_task: asyncio.Task | None = None
+
+
+async def open_conversation_store() -> "AsyncSqliteSaver":
+    """Open the SQLite checkpointer and start the TTL eviction loop."""
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    global _checkpointer, _exit_stack, _evict_task
+    settings = get_settings()
+
+    db_path = Path(settings.conversation_db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    _exit_stack = AsyncExitStack()
+    _checkpointer = await _exit_stack.enter_async_context(
+        AsyncSqliteSaver.from_conn_string(str(db_path))
+    )
+    await _checkpointer.setup()
+    await _checkpointer.conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {_ACTIVITY_TABLE} "
+        "(thread_id TEXT PRIMARY KEY, last_seen REAL NOT NULL)"
+    )
+    await _checkpointer.conn.commit()
+
+    _evict_task = asyncio.create_task(_evict_loop())
+    return _checkpointer
+
+
+async def close_conversation_store() -> None:
+    """Stop the eviction loop and close the SQLite connection."""
+    global _checkpointer, _exit_stack, _evict_task
+    if _evict_task is not None:
+        _evict_task.cancel()
+        try:
+            await _evict_task
+        except asyncio.CancelledError:
+            pass
+        _evict_task = None
+    if _exit_stack is not None:
+        await _exit_stack.aclose()
+        _exit_stack = None
+    _checkpointer = None
+
+
+def get_checkpointer() -> "AsyncSqliteSaver | None":
+    """Get the conversation checkpointer (None if the store is not open)."""
+    return _checkpointer
+
+
+def get_thread_config(conversation_id: str) -> dict:
+    """Build the LangGraph config fragment selecting a conversation thread."""
+    return {"configurable": {"thread_id": conversation_id}}
+
+
+def _cutoff() -> float:
+    return time.time() - get_settings().conversation_ttl_seconds
+
+
+async def create_conversation() -> str:
+    """Issue a new conversation ID and record it as active."""
+    conversation_id = f"conv-{secrets.token_urlsafe(24)}"
+    await touch_conversation(conversation_id)
+    return conversation_id
+
+
+async def conversation_exists(conversation_id: str) -> bool:
+    """Whether the server issued this ID and the conversation has not expired."""
+    if _checkpointer is None:
+        return False
+    async with _checkpointer.conn.execute(
+        f"SELECT 1 FROM {_ACTIVITY_TABLE} WHERE thread_id = ? AND last_seen >= ?",
+        (conversation_id, _cutoff()),
+    ) as cursor:
+        return await cursor.fetchone() is not None
+
+
+async def touch_conversation(conversation_id: str) -> None:
+    """Record activity on a conversation so it survives the next TTL sweep."""
+    if _checkpointer is None:
+        return
+    # The saver's lock serializes every write on the shared connection
+    async with _checkpointer.lock:
+        await _checkpointer.conn.execute(
+            f"INSERT INTO {_ACTIVITY_TABLE} (thread_id, last_seen) VALUES (?, ?) "
+            "ON CONFLICT(thread_id) DO UPDATE SET last_seen = excluded.last_seen",
+            (conversation_id, time.time()),
+        )
+        await _checkpointer.conn.commit()
+
+
+async def evict_expired_conversations() -> int:
+    """Delete conversations idle for longer than the configured TTL.
+
+    Returns:
+        Number of evicted conversations
+    """
+    if _checkpointer is None:
+        return 0
+    cutoff = _cutoff()
+
+    async with _checkpointer.lock:
+        async with _checkpointer.conn.execute(
+            f"SELECT thread_id FROM {_ACTIVITY_TABLE} WHERE last_seen < ?", (cutoff,)
+        ) as cursor:
+            candidates = [row[0] for row in await cursor.fetchall()]
+
+    evicted = 0
+    for thread_id in candidates:
+        evicted += await _evict_if_expired(thread_id, cutoff)
+
+    if evicted:
+        logger.info(f"Evicted {evicted} expired conversations")
+    return evicted
+
+
+async def _evict_if_expired(thread_id: str, cutoff: float) -> bool:
+    """Delete one conversation if it was last used before cutoff.
+
+    The activity row is removed only if it is still expired, under the
+    saver's lock, so a conversation touched after the sweep selected it is
+    kept. From then on the ID is unknown (conversation_exists), and the
+    thread's checkpoints are deleted through the saver's own API.
+    """
+    async with _checkpointer.lock:
+        cursor = await _checkpointer.conn.execute(
+            f"DELETE FROM {_ACTIVITY_TABLE} WHERE thread_id = ? AND last_seen < ?",
+            (thread_id, cutoff),
+        )
+        expired = cursor.rowcount > 0
+        await _checkpointer.conn.commit()
+    if expired:
+        # Takes the (non-reentrant) lock itself
+        await _checkpointer.adelete_thread(thread_id)
+    return expired
+
+
+async def _evict_loop() -> None:
+    """Periodically evict expired conversations."""
+    settings = get_settings()
+    while True:
+        await asyncio.sleep(settings.conversation_evict_interval_seconds)
+        try:
+            await evict_expired_conversations()
+        except Exception as e:
+            logger.error(f"Conversation eviction failed: {e}", exc_info=True)
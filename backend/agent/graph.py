@@ -7,61 +7,161 @@ Key points from research:
 - Use stream_mode="messages" for token-by-token streaming
 - Recursion limit = 2 * max_iterations + 1 (LangGraph counts each step)
 - Model must have streaming=True for token visibility
+
+A request deadline (runtime/deadline.py) passed as configurable["deadline"]
+bounds every LLM and tool call by the remaining time; when less than
+deadline_answer_reserve_seconds is left, the agent must answer without tools.
+
+settings.llm_replay_mode records the Mistral streams to a cassette or replays
+them instead of calling Mistral (agent/replay.py, scripts/perf_regression.py).
 """
 
+import asyncio
+import json
 import logging
+from functools import lru_cache
 from typing import Literal
 
-from langchain_mistralai import ChatMistralAI
-from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
-
 from config import get_settings
-from agent.state import AgentState
-from agent.tools import search_knowledge_base
-from agent.prompts import get_agent_prompt
+from agent.history import compact_history
+from agent.llm_client import get_mistral_async_client
+from agent.tokens import estimate_tokens
+from runtime import get_metrics, span
+from runtime.deadline import DeadlineExceeded, get_deadline
 
 logger = logging.getLogger(__name__)
 
+# Appended to the system prompt when the request deadline is nearly reached
+FORCE_ANSWER_NOTE = (
+    "\n\nTime is nearly up for this request: do not call any tools. Answer now "
+    "with the information gathered so far, and say briefly if something could not be looked up."
+)
+
+
+@lru_cache
+def get_tool_schema_tokens() -> int:
+    """Estimated tokens of the tool definitions sent with every LLM call."""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    from agent.tools import search_knowledge_base
+
+    return estimate_tokens(json.dumps(convert_to_openai_tool(search_knowledge_base)))
+
 
-def create_agent_graph(marker: str = "streamdown"):
+def create_agent_graph(marker: str = "streamdown", checkpointer=None):
     """Create and compile the ReAct agent graph.
 
     Args:
         marker: Output format strategy ("streamdown", "flowtoken", or "llm-ui")
+        checkpointer: Optional LangGraph checkpointer for server-side
+            conversation state (threads selected via config thread_id)
 
     Returns:
         Compiled LangGraph state machine ready for streaming execution.
     """
+    # Deferred imports: LangGraph and the Mistral client are only needed once
+    # a graph is built, not when the app module is imported
+    from langchain_core.messages import SystemMessage
+    from langchain_core.runnables import RunnableConfig
+    from langchain_mistralai import ChatMistralAI
+    from langgraph.graph import StateGraph, END
+
+    from agent.prompts import build_prompt_messages, get_rendered_prompt
+    from agent.replay import ReplayChatModel, get_stream_recorder
+    from agent.state import AgentState
+    from agent.tools import run_tool_calls, search_knowledge_base
+
     settings = get_settings()
 
-    # Initialize Mistral LLM with streaming enabled
-    # CRITICAL: streaming=True is required for token-by-token visibility
-    llm = ChatMistralAI(
-        model=settings.mistral_model,
-        api_key=settings.mistral_api_key,
-        temperature=settings.agent_temperature,
-        streaming=True,  # REQUIRED for token streaming
-        timeout=settings.agent_timeout_seconds,
-    )
+    if settings.llm_replay_mode == "replay":
+        # Recorded Mistral streams, no network (see agent/replay.py)
+        llm = ReplayChatModel(
+            cassette_path=settings.llm_cassette_path,
+            speed=settings.llm_replay_speed,
+        )
+    else:
+        # Initialize Mistral LLM with streaming enabled
+        # CRITICAL: streaming=True is required for token-by-token visibility
+        # The shared async client pools connections and applies global concurrency,
+        # rate limiting and retries, so the model's own retry loop is disabled
+        llm = ChatMistralAI(
+            model=settings.mistral_model,
+            api_key=settings.mistral_api_key,
+            base_url=settings.mistral_base_url,
+            temperature=settings.agent_temperature,
+            streaming=True,  # REQUIRED for token streaming
+            timeout=settings.agent_timeout_seconds,
+            async_client=get_mistral_async_client(),
+            max_retries=1,  # Single attempt - retries happen in the shared transport
+            callbacks=(
+                [get_stream_recorder(settings.llm_cassette_path)]
+                if settings.llm_replay_mode == "record" else None
+            ),
+        )
 
     # Bind tools to the model
     tools = [search_knowledge_base]
     llm_with_tools = llm.bind_tools(tools)
+    # Same tool schemas (the history contains tool calls), but no calls allowed
+    llm_answer_only = llm.bind_tools(tools, tool_choice="none")
 
-    # Create prompt chain with marker-aware prompt
-    prompt = get_agent_prompt(marker)
-    agent_chain = prompt | llm_with_tools
+    # Pre-rendered marker prompt: system prompt + tool schemas form a stable
+    # prefix that is identical on every call, followed by the (compacted) history
+    prefix_tokens = get_rendered_prompt(marker).tokens + get_tool_schema_tokens()
 
-    def call_agent(state: AgentState) -> dict:
+    async def call_agent(state: AgentState, config: RunnableConfig) -> dict:
         """Agent node: invoke LLM with current messages.
 
         The LLM decides whether to call a tool or respond directly.
+        Older turns are compacted to keep the prompt within the history budget.
+        Near the request deadline the LLM is made to answer without tools.
         """
-        messages = state["messages"]
-        response = agent_chain.invoke({"messages": messages})
+        deadline = get_deadline(config)
+        if deadline is not None and deadline.expired:
+            deadline.record_exceeded("agent")
+            raise DeadlineExceeded("agent")
+
+        with span("history.compact"):
+            compaction = compact_history(state["messages"])
+        if compaction.tokens_saved > 0:
+            logger.info(
+                f"History compacted: {compaction.tokens_before} -> {compaction.tokens_after} tokens "
+                f"(saved {compaction.tokens_saved})"
+            )
+        metrics = get_metrics()
+        metrics.observe("agent.prompt_prefix_tokens", prefix_tokens)
+        metrics.observe("agent.prompt_history_tokens", compaction.tokens_after)
+        with span("prompt.render"):
+            prompt = build_prompt_messages(marker, compaction.messages)
+        if deadline is None:
+            with span("llm.call"):
+                return {"messages": [await llm_with_tools.ainvoke(prompt)]}
+
+        model = llm_with_tools
+        if deadline.remaining() < settings.deadline_answer_reserve_seconds:
+            # Mistral only accepts system messages first, so the instruction
+            # extends the system prompt (this call misses the prefix cache)
+            metrics.incr("deadline.forced_answers")
+            logger.info(f"Deadline in {deadline.remaining():.1f}s, forcing a final answer")
+            prompt = [SystemMessage(content=prompt[0].content + FORCE_ANSWER_NOTE), *prompt[1:]]
+            model = llm_answer_only
+        try:
+            with span("llm.call", forced_answer=model is llm_answer_only):
+                response = await asyncio.wait_for(model.ainvoke(prompt), timeout=deadline.budget())
+        except asyncio.TimeoutError:
+            deadline.record_exceeded("llm")
+            raise DeadlineExceeded("llm") from None
         return {"messages": [response]}
 
+    async def call_tools(state: AgentState, config: RunnableConfig) -> dict:
+        """Tools node: run every tool call of the last agent turn concurrently.
+
+        Searches of one turn share a batched retrieval; see run_tool_calls.
+        """
+        tool_calls = state["messages"][-1].tool_calls
+        with span("tools.run", calls=len(tool_calls)):
+            return {"messages": await run_tool_calls(tool_calls, tools, config=config)}
+
     def should_continue(state: AgentState) -> Literal["tools", "__end__"]:
         """Route to tools if LLM requested tool call, else end.
 
@@ -86,7 +186,7 @@ def create_agent_graph(marker: str = "streamdown"):
 
     # Add nodes
     workflow.add_node("agent", call_agent)
-    workflow.add_node("tools", ToolNode(tools))
+    workflow.add_node("tools", call_tools)
 
     # Set entry point
     workflow.set_entry_point("agent")
@@ -105,7 +205,7 @@ def create_agent_graph(marker: str = "streamdown"):
     workflow.add_edge("tools", "agent")
 
     # Compile the graph
-    graph = workflow.compile()
+    graph = workflow.compile(checkpointer=checkpointer)
 
     logger.info(
         f"Agent graph compiled with model={settings.mistral_model}, max_iterations={settings.agent_max_iterations}, marker={marker}"
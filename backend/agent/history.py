@@ -0,0 +1,229 @@
+"""Token-budgeted conversation history compaction.
+
+Long conversations would otherwise send every prior turn (including stale
+tool observations and full entity blocks) to Mistral on each LLM call. Before
+each agent call the history is compacted:
+
+1. The most recent turns are kept verbatim (a turn starts at a user message).
+2. Tool observations from older turns are dropped - the assistant's answer
+   already carries what the user saw. Older AI messages keep their text but
+   lose their tool calls, since Mistral rejects tool calls without results.
+3. If the history is still over budget, older messages are replaced by short
+   extractive summaries (entity blocks collapsed to one-liners). Summaries are
+   cached by message ID and content hash, so each message is summarized once
+   and an edited message with the same ID is summarized again.
+4. If even the summaries do not fit, the oldest summaries are dropped.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Sequence
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+
+from config import get_settings
+from agent.tokens import (
+    CHARS_PER_TOKEN,
+    MESSAGE_OVERHEAD_TOKENS,
+    estimate_messages_tokens,
+    estimate_tokens,
+    message_text,
+)
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_HEADER = "Summary of the earlier conversation (older turns were compacted):"
+
+# Entity markers emitted by the three marker strategies
+_XML_ENTITY_RE = re.compile(r"<(contactcard|calendarevent)\b(.*?)/>", re.DOTALL)
+_JSON_ENTITY_RE = re.compile(r"【(.*?)】", re.DOTALL)
+_ATTR_RE = re.compile(r'(\w+)="([^"]*)"')
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Bounded LRU cache: message key -> summary line
+_SUMMARY_CACHE_SIZE = 4096
+_summary_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+@dataclass
+class CompactionResult:
+    """Outcome of compacting a message history."""
+
+    messages: list[BaseMessage]
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _describe_entity(kind: str, fields: dict) -> str:
+    """Render an entity as a compact one-line reference."""
+    if kind in ("contact", "contactcard"):
+        return f"[contact: {fields.get('name', 'unknown')}]"
+    label = " ".join(
+        str(fields[key]) for key in ("title", "date") if fields.get(key)
+    )
+    return f"[event: {label or 'unknown'}]"
+
+
+def _compress_json_entity(match: re.Match) -> str:
+    try:
+        fields = json.loads(match.group(1))
+    except ValueError:
+        return "[entity]"
+    if not isinstance(fields, dict):
+        return "[entity]"
+    return _describe_entity(fields.get("type", "contact"), fields)
+
+
+def compress_entities(text: str) -> str:
+    """Collapse contact/event entity blocks into short references.
+
+    Works for all marker strategies: self-closing XML tags (single or
+    multiline) and llm-ui 【{json}】 blocks.
+    """
+    text = _XML_ENTITY_RE.sub(
+        lambda m: _describe_entity(m.group(1), dict(_ATTR_RE.findall(m.group(2)))),
+        text,
+    )
+    return _JSON_ENTITY_RE.sub(_compress_json_entity, text)
+
+
+def _cache_key(message: BaseMessage) -> str:
+    """Key summaries by message ID plus content hash.
+
+    IDs are chosen by clients and kept when a message is edited or
+    regenerated, so the ID alone could return a stale (or another client's)
+    summary.
+    """
+    digest = hashlib.sha1(message_text(message).encode("utf-8")).hexdigest()
+    return f"{message.type}:{message.id or ''}:{digest}"
+
+
+def summarize_message(message: BaseMessage, max_tokens: int) -> str:
+    """Get the (cached) extractive summary line for a message."""
+    key = _cache_key(message)
+    cached = _summary_cache.get(key)
+    if cached is not None:
+        _summary_cache.move_to_end(key)
+        return cached
+
+    text = _WHITESPACE_RE.sub(" ", compress_entities(message_text(message))).strip()
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0] + " …"
+    role = "User" if isinstance(message, HumanMessage) else "Assistant"
+    summary = f"- {role}: {text}"
+
+    _summary_cache[key] = summary
+    if len(_summary_cache) > _SUMMARY_CACHE_SIZE:
+        _summary_cache.popitem(last=False)
+    return summary
+
+
+def _split_turns(
+    messages: Sequence[BaseMessage],
+) -> tuple[list[BaseMessage], list[list[BaseMessage]]]:
+    """Split history into leading system messages and user-initiated turns."""
+    leading: list[BaseMessage] = []
+    turns: list[list[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or (not turns and not isinstance(message, SystemMessage)):
+            turns.append([message])
+        elif not turns:
+            leading.append(message)
+        else:
+            turns[-1].append(message)
+    return leading, turns
+
+
+def _is_tool_traffic(message: BaseMessage) -> bool:
+    """Tool observations and the tool-call-only AI messages that requested them."""
+    if isinstance(message, ToolMessage):
+        return True
+    return isinstance(message, AIMessage) and bool(message.tool_calls) and not message_text(message)
+
+
+def _without_tool_calls(message: BaseMessage) -> BaseMessage:
+    """An old AI message's text without its tool calls (their results are dropped)."""
+    if isinstance(message, AIMessage) and (message.tool_calls or message.additional_kwargs.get("tool_calls")):
+        return AIMessage(content=message.content, id=message.id, name=message.name)
+    return message
+
+
+def compact_history(
+    messages: Sequence[BaseMessage],
+    max_tokens: int | None = None,
+    keep_recent_turns: int | None = None,
+    summary_max_tokens: int | None = None,
+) -> CompactionResult:
+    """Compact a conversation history to fit a token budget.
+
+    Args:
+        messages: Full conversation history (LangChain messages)
+        max_tokens: History token budget (default: settings.history_max_tokens)
+        keep_recent_turns: Turns kept verbatim (default: settings.history_keep_recent_turns)
+        summary_max_tokens: Max tokens per summarized message
+            (default: settings.history_summary_max_tokens)
+
+    Returns:
+        CompactionResult with the messages to send and token accounting.
+    """
+    settings = get_settings()
+    if max_tokens is None:
+        max_tokens = settings.history_max_tokens
+    if keep_recent_turns is None:
+        keep_recent_turns = settings.history_keep_recent_turns
+    if summary_max_tokens is None:
+        summary_max_tokens = settings.history_summary_max_tokens
+
+    messages = list(messages)
+    tokens_before = estimate_messages_tokens(messages)
+
+    leading, turns = _split_turns(messages)
+    keep = max(1, keep_recent_turns)
+    if len(turns) <= keep:
+        return CompactionResult(messages, tokens_before, tokens_before)
+
+    old_turns, recent_turns = turns[:-keep], turns[-keep:]
+    recent = [m for turn in recent_turns for m in turn]
+
+    # Step 1: drop stale tool traffic from older turns; AI messages that
+    # mixed text and tool calls keep only the text
+    old = [
+        _without_tool_calls(m) for turn in old_turns for m in turn
+        if not _is_tool_traffic(m) and not isinstance(m, SystemMessage)
+    ]
+    compacted = leading + old + recent
+    if estimate_messages_tokens(compacted) <= max_tokens:
+        return CompactionResult(compacted, tokens_before, estimate_messages_tokens(compacted))
+
+    # Step 2: replace older messages with cached summaries, dropping the
+    # oldest summaries until the whole history fits. Each summary is costed
+    # with its joining newline, so the sum bounds the summary message's size
+    fixed_tokens = (
+        estimate_messages_tokens(leading + recent) + MESSAGE_OVERHEAD_TOKENS + estimate_tokens(SUMMARY_HEADER)
+    )
+    summaries = [summarize_message(m, summary_max_tokens) for m in old]
+    summary_tokens = sum(estimate_tokens("\n" + s) for s in summaries)
+    while summaries and fixed_tokens + summary_tokens > max_tokens:
+        summary_tokens -= estimate_tokens("\n" + summaries.pop(0))
+
+    compacted = list(leading)
+    if summaries:
+        compacted.append(SystemMessage(content="\n".join([SUMMARY_HEADER, *summaries])))
+    compacted.extend(recent)
+
+    return CompactionResult(compacted, tokens_before, estimate_messages_tokens(compacted))
@@ -0,0 +1,229 @@
+"""Shared, pooled HTTP client for the Mistral API.
+
+Every ChatMistralAI instance would otherwise create its own httpx client, so
+a burst of chats opens one TLS connection per request and nothing bounds the
+load we put on the provider. All agent graphs share one AsyncClient instead:
+
+- HTTP/2 with keep-alive connection pooling
+- A global semaphore bounding concurrent in-flight requests (held until the
+  response stream is closed, so streaming completions count as in flight)
+- A token bucket limiting the request rate
+- Jittered exponential retries on 429/5xx and transport errors, honouring
+  Retry-After
+
+Queue wait (semaphore + rate limiter) is recorded as the
+mistral.queue_wait_seconds summary.
+"""
+
+import asyncio
+import logging
+import time
+
+import httpx
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception_type,
+    retry_if_result,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from config import get_settings
+from runtime import get_metrics
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_async_client: httpx.AsyncClient | None = None
+
+
+class TokenBucket:
+    """Async token bucket rate limiter.
+
+    Args:
+        rate: Tokens added per second (<= 0 disables limiting)
+        capacity: Maximum burst size
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response stream that releases the concurrency slot when closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _is_retryable_response(response: httpx.Response) -> bool:
+    return response.status_code in RETRYABLE_STATUS_CODES
+
+
+def _retry_after_seconds(response: httpx.Response) -> float:
+    try:
+        return float(response.headers.get("retry-after", 0))
+    except ValueError:
+        return 0.0
+
+
+class ThrottledTransport(httpx.AsyncBaseTransport):
+    """Transport adding concurrency limiting, rate limiting and retries.
+
+    Args:
+        transport: Underlying (pooled) transport
+        max_concurrency: Max requests in flight across all callers
+        rate_limiter: Token bucket applied to every attempt
+        max_retries: Retries after the first attempt
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        max_concurrency: int,
+        rate_limiter: TokenBucket,
+        max_retries: int,
+    ):
+        self._transport = transport
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._rate_limiter = rate_limiter
+        self._max_retries = max_retries
+        self._jitter = wait_random_exponential(multiplier=0.5, max=10)
+
+    def _wait(self, retry_state: RetryCallState) -> float:
+        delay = self._jitter(retry_state)
+        outcome = retry_state.outcome
+        if outcome is not None and not outcome.failed:
+            delay = max(delay, _retry_after_seconds(outcome.result()))
+        return delay
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        wait_start = time.perf_counter()
+        await self._rate_limiter.acquire()
+        get_metrics().observe("mistral.rate_limit_wait_seconds", time.perf_counter() - wait_start)
+
+        response = await self._transport.handle_async_request(request)
+        if _is_retryable_response(response):
+            get_metrics().incr(f"mistral.retryable_status.{response.status_code}")
+            # Error bodies are small: read them so the connection is freed and
+            # the final attempt can still be surfaced with its body
+            await response.aread()
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        metrics = get_metrics()
+        wait_start = time.perf_counter()
+        await self._semaphore.acquire()
+        metrics.observe("mistral.queue_wait_seconds", time.perf_counter() - wait_start)
+        self._in_flight += 1
+        metrics.set_gauge("mistral.in_flight", self._in_flight)
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self._in_flight -= 1
+                self._semaphore.release()
+                metrics.set_gauge("mistral.in_flight", self._in_flight)
+
+        try:
+            retrying = AsyncRetrying(
+                stop=stop_after_attempt(self._max_retries + 1),
+                wait=self._wait,
+                retry=(
+                    retry_if_exception_type(httpx.TransportError)
+                    | retry_if_result(_is_retryable_response)
+                ),
+                retry_error_callback=lambda state: state.outcome.result(),
+                reraise=True,
+            )
+            response = await retrying(self._send, request)
+        except BaseException:
+            release()
+            raise
+
+        if _is_retryable_response(response):
+            # Retries exhausted: the body is already read, nothing left in flight
+            release()
+            return response
+
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def get_mistral_async_client() -> httpx.AsyncClient:
+    """Get the process-wide pooled async client for the Mistral API."""
+    global _async_client
+    if _async_client is None:
+        settings = get_settings()
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=settings.mistral_max_connections,
+                max_keepalive_connections=settings.mistral_max_connections,
+                keepalive_expiry=settings.mistral_keepalive_expiry_seconds,
+            ),
+        )
+        _async_client = httpx.AsyncClient(
+            base_url=settings.mistral_base_url,
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+                "Authorization": f"Bearer {settings.mistral_api_key}",
+            },
+            timeout=settings.agent_timeout_seconds,
+            transport=ThrottledTransport(
+                transport,
+                max_concurrency=settings.mistral_max_concurrency,
+                rate_limiter=TokenBucket(
+                    settings.mistral_rate_limit_per_second, settings.mistral_rate_limit_burst
+                ),
+                max_retries=settings.mistral_max_retries,
+            ),
+        )
+    return _async_client
+
+
+async def close_mistral_async_client() -> None:
+    """Close the shared client and its connection pool."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
@@ -6,7 +6,17 @@ The prompt instructs the agent on:
 3. Tone and error handling behavior
 """
 
-from langchain_core.prompts import ChatPromptTemplate
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+from agent.tokens import estimate_message_tokens
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
 
 # Entity format templates for Streamdown marker - self-closing tags
 STREAMDOWN_CONTACT_FORMAT = """When providing contact information, format EACH contact as:
@@ -127,15 +137,35 @@ Add brief context before and after entities to make the response conversational.
 """
 
 
-def get_agent_prompt(marker: str = "streamdown") -> ChatPromptTemplate:
-    """Get the agent prompt template for the specified marker strategy.
+# Marker strategies with pre-rendered prompts (values of models.schemas.MarkerStrategy)
+MARKERS = ("streamdown", "flowtoken", "llm-ui")
 
-    Args:
-        marker: Output format - "streamdown", "flowtoken", or "llm-ui"
+# Markers without their own entity formats fall back to streamdown
+DEFAULT_MARKER = "streamdown"
 
-    Returns:
-        ChatPromptTemplate with marker-specific entity formatting instructions.
+
+@dataclass(frozen=True)
+class RenderedPrompt:
+    """A system prompt rendered once per marker strategy.
+
+    The system message is the stable prefix of every LLM call: it is the
+    same object (and the same bytes) for every request using the marker, so
+    the provider's prompt caching can reuse it and only history varies.
+
+    Attributes:
+        marker: Marker strategy the prompt was rendered for
+        system_message: Literal system message (never re-templated)
+        tokens: Estimated tokens of the system message
+        prefix_hash: Short content hash, stable across processes
     """
+
+    marker: str
+    system_message: SystemMessage
+    tokens: int
+    prefix_hash: str
+
+
+def _render_system_prompt(marker: str) -> str:
     if marker == "llm-ui":
         contact_format = LLMUI_CONTACT_FORMAT
         event_format = LLMUI_EVENT_FORMAT
@@ -146,13 +176,72 @@ def get_agent_prompt(marker: str = "streamdown") -> ChatPromptTemplate:
         contact_format = STREAMDOWN_CONTACT_FORMAT
         event_format = STREAMDOWN_EVENT_FORMAT
 
-    system_prompt = AGENT_SYSTEM_PROMPT_BASE.format(
+    return AGENT_SYSTEM_PROMPT_BASE.format(
         contact_format=contact_format, event_format=event_format
     )
 
+
+def _render(marker: str) -> RenderedPrompt:
+    text = _render_system_prompt(marker)
+    return RenderedPrompt(
+        marker=marker,
+        system_message=SystemMessage(content=text),
+        tokens=estimate_message_tokens(SystemMessage(content=text)),
+        prefix_hash=hashlib.sha256(text.encode("utf-8")).hexdigest()[:12],
+    )
+
+
+# Rendered once at import; the request path only looks prompts up
+_RENDERED_PROMPTS = {marker: _render(marker) for marker in MARKERS}
+
+
+def get_rendered_prompt(marker: str = DEFAULT_MARKER) -> RenderedPrompt:
+    """Get the pre-rendered system prompt for a marker strategy.
+
+    Args:
+        marker: Output format - "streamdown", "flowtoken", or "llm-ui"
+            (anything else uses streamdown)
+    """
+    return _RENDERED_PROMPTS.get(marker, _RENDERED_PROMPTS[DEFAULT_MARKER])
+
+
+def build_prompt_messages(marker: str, messages: list[BaseMessage]) -> list[BaseMessage]:
+    """Prepend the marker's system prompt to the conversation.
+
+    The system message goes first and is never modified, so it forms a
+    stable prefix shared by every call with this marker.
+    """
+    return [get_rendered_prompt(marker).system_message, *messages]
+
+
+def prompt_stats() -> dict[str, dict]:
+    """Token counts and prefix hashes of the pre-rendered prompts."""
+    return {
+        marker: {"tokens": rendered.tokens, "prefix_hash": rendered.prefix_hash}
+        for marker, rendered in _RENDERED_PROMPTS.items()
+    }
+
+
+@lru_cache
+def get_agent_prompt(marker: str = DEFAULT_MARKER) -> "ChatPromptTemplate":
+    """Get the agent prompt template for the specified marker strategy.
+
+    The graph uses build_prompt_messages directly; this template wraps the
+    same pre-rendered system message for callers that compose chains.
+
+    Args:
+        marker: Output format - "streamdown", "flowtoken", or "llm-ui"
+
+    Returns:
+        ChatPromptTemplate with marker-specific entity formatting instructions.
+    """
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    # A message object rather than a ("system", text) tuple: the llm-ui
+    # formats contain literal JSON braces that must not be parsed as variables
     return ChatPromptTemplate.from_messages(
         [
-            ("system", system_prompt),
-            ("placeholder", "{messages}"),
+            get_rendered_prompt(marker).system_message,
+            MessagesPlaceholder("messages", optional=True),
         ]
     )
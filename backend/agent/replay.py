@@ -0,0 +1,240 @@
+"""Recorded chat model streams for deterministic performance tests.
+
+settings.llm_replay_mode selects the chat model create_agent_graph uses:
+
+- "" (default): live Mistral
+- "record": live Mistral; each call's streamed chunks (text, tool-call
+  chunks, response metadata) and the delay before each chunk are appended
+  to settings.llm_cassette_path as one JSON line per call
+- "replay": no network; ReplayChatModel streams the recorded chunks back,
+  waiting delay / settings.llm_replay_speed before each one (speed 1 is the
+  original timing, 0 replays without delays)
+
+Calls are matched by a hash of the prompt (message types and contents, tool
+calls and tool call IDs), so a replayed conversation follows the recorded
+one as long as the prompts and retrieved context are unchanged. Recorded
+tool calls keep their IDs, which keeps the follow-up prompts identical. A
+prompt without a recording raises ReplayMiss: the cassette is stale and has
+to be recorded again. Several recordings of one prompt are replayed in turn.
+
+Metrics:
+    llm.replay_delay_seconds   time a replayed call spent in recorded delays
+    llm.replay_misses          prompts without a recording
+
+Usage:
+    LLM_REPLAY_MODE=record uvicorn main:app                    # record live streams
+    LLM_REPLAY_MODE=replay LLM_REPLAY_SPEED=0 uvicorn main:app  # replay them offline
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel, generate_from_stream
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult, LLMResult
+
+from runtime import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayMiss(Exception):
+    """Raised when a replayed prompt has no recording."""
+
+    def __init__(self, key: str, path: Path):
+        super().__init__(f"No recorded stream for prompt {key[:12]} in {path}; re-record the cassette")
+        self.key = key
+
+
+def prompt_key(messages: list[BaseMessage]) -> str:
+    """Stable hash of a prompt (ignores message and run IDs)."""
+    canonical = [
+        {
+            "type": message.type,
+            "content": message.content,
+            "tool_calls": [
+                {"name": call["name"], "args": call["args"], "id": call["id"]}
+                for call in getattr(message, "tool_calls", None) or []
+            ],
+            "tool_call_id": getattr(message, "tool_call_id", None),
+        }
+        for message in messages
+    ]
+    encoded = json.dumps(canonical, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def _dump_chunk(message: AIMessageChunk) -> dict:
+    return {
+        "content": message.content,
+        "tool_call_chunks": [dict(chunk) for chunk in message.tool_call_chunks],
+        "response_metadata": message.response_metadata,
+        "usage_metadata": message.usage_metadata,
+    }
+
+
+def _load_chunk(entry: dict) -> AIMessageChunk:
+    return AIMessageChunk(
+        content=entry["content"],
+        tool_call_chunks=entry["tool_call_chunks"],
+        response_metadata=entry["response_metadata"],
+        usage_metadata=entry["usage_metadata"],
+    )
+
+
+class StreamRecorder(AsyncCallbackHandler):
+    """Callback handler appending every chat model stream it sees to a cassette.
+
+    Args:
+        path: Cassette file (JSON lines, appended to)
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._calls: dict[UUID, dict] = {}
+        self._lock = threading.Lock()
+
+    async def on_chat_model_start(
+        self, serialized: dict, messages: list[list[BaseMessage]], *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        started = time.perf_counter()
+        self._calls[run_id] = {"key": prompt_key(messages[0]), "started": started, "last": started, "chunks": []}
+
+    async def on_llm_new_token(
+        self, token: str, *, chunk: ChatGenerationChunk | None = None, run_id: UUID, **kwargs: Any
+    ) -> None:
+        call = self._calls.get(run_id)
+        if call is None or chunk is None:
+            return
+        message = chunk.message
+        # The closing chunk LangChain adds after the provider's stream is
+        # added again on replay
+        if (
+            message.chunk_position == "last"
+            and not message.content
+            and not message.tool_call_chunks
+            and not message.response_metadata
+        ):
+            return
+        now = time.perf_counter()
+        call["chunks"].append({"delay": round(now - call["last"], 6), **_dump_chunk(message)})
+        call["last"] = now
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        record = {
+            "key": call["key"],
+            "recorded_at": time.time(),
+            "seconds": round(time.perf_counter() - call["started"], 6),
+            "chunks": call["chunks"],
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        logger.info(f"Recorded stream {call['key'][:12]} ({len(call['chunks'])} chunks) to {self.path}")
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._calls.pop(run_id, None)
+
+
+@lru_cache
+def get_stream_recorder(path: str) -> StreamRecorder:
+    """One recorder per cassette, shared by every graph of the process."""
+    return StreamRecorder(path)
+
+
+class Cassette:
+    """Recorded streams of a cassette file, by prompt key.
+
+    Args:
+        path: Cassette file written by StreamRecorder
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._recordings: dict[str, list[dict]] = {}
+        self._next: dict[str, int] = {}
+        self._lock = threading.Lock()
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._recordings.setdefault(record["key"], []).append(record)
+        logger.info(f"Loaded {sum(map(len, self._recordings.values()))} recorded streams from {self.path}")
+
+    def __len__(self) -> int:
+        return len(self._recordings)
+
+    def next(self, key: str) -> dict:
+        """The next recording of a prompt (cycling through repeats)."""
+        recordings = self._recordings.get(key)
+        if not recordings:
+            get_metrics().incr("llm.replay_misses")
+            raise ReplayMiss(key, self.path)
+        with self._lock:
+            index = self._next.get(key, 0)
+            self._next[key] = index + 1
+        return recordings[index % len(recordings)]
+
+
+@lru_cache
+def get_cassette(path: str) -> Cassette:
+    """Load a cassette once per process."""
+    return Cassette(path)
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model that streams recorded responses instead of calling Mistral.
+
+    Attributes:
+        cassette_path: Cassette written in record mode
+        speed: Timing factor (1 = recorded delays, 0 = none)
+        streaming: Always stream, like the live model
+    """
+
+    cassette_path: str
+    speed: float = 1.0
+    streaming: bool = True
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools: list, *, tool_choice: Any = None, **kwargs: Any):
+        # The recorded responses already contain the tool calls
+        return self.bind(**kwargs)
+
+    def _recording(self, messages: list[BaseMessage]) -> dict:
+        return get_cassette(self.cassette_path).next(prompt_key(messages))
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return generate_from_stream(self._stream(messages, stop, run_manager, **kwargs))
+
+    def _stream(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for entry in self._recording(messages)["chunks"]:
+            yield ChatGenerationChunk(message=_load_chunk(entry))
+
+    async def _astream(
+        self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        waited = 0.0
+        for entry in self._recording(messages)["chunks"]:
+            if self.speed > 0 and entry["delay"] > 0:
+                delay = entry["delay"] / self.speed
+                await asyncio.sleep(delay)
+                waited += delay
+            yield ChatGenerationChunk(message=_load_chunk(entry))
+        get_metrics().observe("llm.replay_delay_seconds", waited)
@@ -0,0 +1,61 @@
+"""Token estimation for prompt budgeting.
+
+Mistral's tokenizer is not bundled with langchain-mistralai, so token counts
+are estimated from character length. The heuristic (~4 characters per token
+for English/German prose) is accurate enough for budgeting decisions and
+costs nothing on the request path.
+"""
+
+from typing import Iterable
+
+from langchain_core.messages import BaseMessage
+
+# Average characters per token for Mistral's tokenizer on prose
+CHARS_PER_TOKEN = 4
+
+# Fixed per-message overhead (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text string.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count (0 for empty text)
+    """
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def message_text(message: BaseMessage) -> str:
+    """Get the plain text content of a message.
+
+    Handles both string content and the list-of-parts content format.
+    """
+    content = message.content
+    if isinstance(content, str):
+        return content
+    texts = []
+    for part in content:
+        if isinstance(part, str):
+            texts.append(part)
+        elif isinstance(part, dict) and part.get("type") == "text":
+            texts.append(part.get("text", ""))
+    return "".join(texts)
+
+
+def estimate_message_tokens(message: BaseMessage) -> int:
+    """Estimate tokens for a single message including tool call arguments."""
+    tokens = MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message_text(message))
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += estimate_tokens(tool_call["name"]) + estimate_tokens(str(tool_call["args"]))
+    return tokens
+
+
+def estimate_messages_tokens(messages: Iterable[BaseMessage]) -> int:
+    """Estimate total tokens for a sequence of messages."""
+    return sum(estimate_message_tokens(m) for m in messages)
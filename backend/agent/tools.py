@@ -2,13 +2,32 @@ import asyncio
 from functools import wraps
 import logging
 from langchain.tools import tool
-from rag.retriever import get_hybrid_retriever, retrieve_with_scores, deduplicate_results
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from config import get_settings
+from agent.context import pack_context, record_packing
+from rag.chunk_store import ChunkStore
+from rag.retriever import (
+    get_hybrid_retriever,
+    get_index_snapshot,
+    aretrieve_rows_batch,
+    deduplicate_results,
+    fuse_rankings,
+)
+from runtime import get_metrics, get_warmup, WarmupFailed, span
+from runtime.profiling import traced
+from runtime.deadline import get_deadline
 
 logger = logging.getLogger(__name__)
 
 # Timeout decorator for tool execution (30 seconds per user requirement)
 TOOL_TIMEOUT_SECONDS = 30
 
+DEADLINE_MESSAGE = "The search was stopped because this request is running out of time. Answer with what you have."
+
+def timeout_message(seconds: int) -> str:
+    return f"The operation timed out after {seconds} seconds. Please try a simpler query."
+
 def async_tool_timeout(seconds: int):
     """Decorator to timeout async tool execution."""
     def decorator(func):
@@ -21,7 +40,7 @@ def async_tool_timeout(seconds: int):
                 )
             except asyncio.TimeoutError:
                 logger.warning(f"Tool {func.__name__} timed out after {seconds}s")
-                return f"The operation timed out after {seconds} seconds. Please try a simpler query."
+                return timeout_message(seconds)
         return wrapper
     return decorator
 
@@ -48,33 +67,146 @@ async def search_knowledge_base(query: str) -> str:
     Returns:
         Relevant information from the knowledge base with source attribution
     """
+    return (await search_knowledge_base_batch([query]))[0]
+
+
+async def search_knowledge_base_batch(queries: list[str]) -> list[str]:
+    """search_knowledge_base for several queries with one embedding pass and one vector search.
+
+    Returns:
+        One observation per query, in input order
+    """
     try:
+        # Wait for the retriever if the service is still warming up
+        if get_hybrid_retriever() is None:
+            try:
+                await get_warmup().wait_for(
+                    "retriever", timeout=get_settings().warmup_wait_timeout_seconds
+                )
+            except WarmupFailed as e:
+                logger.warning(f"Knowledge base unavailable: {e}")
+
         retriever = get_hybrid_retriever()
         if retriever is None:
-            return "The knowledge base is not currently available. Please try again later."
+            return ["The knowledge base is not currently available. Please try again later."] * len(queries)
+
+        # Hybrid retrieval: semantic hits fused with BM25 hits, deduplicated
+        # The queries are embedded in one batch and the search runs off the
+        # event loop, so a cancelled agent run (client disconnect) abandons
+        # the retrieval instead of blocking until it finishes
+        settings = get_settings()
+        snapshot = get_index_snapshot()
+        semantic, keyword = await asyncio.gather(
+            aretrieve_rows_batch(queries, k=10, snapshot=snapshot),
+            asyncio.to_thread(traced("bm25", snapshot.bm25.top_k), queries, settings.retrieval_k),
+        )
+        observations = []
+        for semantic_hits, keyword_hits in zip(semantic, keyword):
+            with span("fusion"):
+                fused = fuse_rankings(
+                    [[row for row, score in keyword_hits if score > 0], [row for row, _ in semantic_hits]],
+                    [settings.bm25_weight, settings.semantic_weight],
+                )
+            with span("dedup"):
+                unique_results = deduplicate_results(snapshot.chunks, fused)
+            observations.append(format_observation(snapshot.chunks, unique_results))
+        return observations
 
-        # Retrieve with scores and deduplicate
-        raw_results = retrieve_with_scores(query, k=10)
-        unique_results = deduplicate_results(raw_results)
+    except Exception as e:
+        logger.error(f"RAG retrieval failed: {e}", exc_info=True)
+        return ["I couldn't access the knowledge base right now. Please try again in a moment."] * len(queries)
 
-        if not unique_results:
-            return "I didn't find any information matching that query. Try asking about contacts, events, or city services."
 
-        # Log sources for debugging (not sent to frontend)
-        formatted_results = []
-        for doc, score in unique_results[:5]:  # Top 5 results
-            source = doc.metadata.get("attribution", "Unknown source")
-            doc_type = doc.metadata.get("type", "general")
-            # Log source attribution for debugging/observability
-            logger.info(f"RAG result: source={source}, type={doc_type}, score={score:.2f}")
-            # Return content without source prefix (cleaner for frontend)
-            formatted_results.append(doc.page_content)
+def format_observation(chunks: ChunkStore, unique_results: list[tuple[int, float]]) -> str:
+    """Tool observation text for deduplicated (row, fused score) results."""
+    if not unique_results:
+        return "I didn't find any information matching that query. Try asking about contacts, events, or city services."
 
-        return "\n\n---\n\n".join(formatted_results)
+    # Log sources for debugging (not sent to frontend)
+    for row, score in unique_results[:5]:  # Top 5 results
+        source = chunks.value(row, "attribution", "Unknown source")
+        doc_type = chunks.value(row, "type", "general")
+        logger.info(f"RAG result: source={source}, type={doc_type}, score={score:.4f}")
 
-    except Exception as e:
-        logger.error(f"RAG retrieval failed: {e}", exc_info=True)
-        return "I couldn't access the knowledge base right now. Please try again in a moment."
+    # Content without source prefix, packed into the token budget
+    with span("context.pack"):
+        packed = pack_context(chunks, unique_results)
+    record_packing(packed)
+    return packed.text
+
+
+async def run_tool_calls(
+    tool_calls: list[dict],
+    tools: list,
+    timeout: int = TOOL_TIMEOUT_SECONDS,
+    config: RunnableConfig | None = None,
+) -> list[ToolMessage]:
+    """Execute the tool calls of one agent turn concurrently.
+
+    All search_knowledge_base calls of the turn share one batched retrieval
+    (one embedding pass, one vector search), so a multi-entity question
+    costs one retrieval latency instead of one per call. Every call still
+    has its own timeout, and observations are returned in call order.
+
+    Args:
+        tool_calls: tool_calls of the AIMessage that ended the turn
+        tools: Tools bound to the model
+        timeout: Seconds each call may take
+        config: Run config; a request deadline in it shortens the timeout so
+            that deadline_answer_reserve_seconds remain for the final answer
+
+    Returns:
+        One ToolMessage per call, in call order
+    """
+    deadline = get_deadline(config)
+    stage_timeout = timeout
+    if deadline is not None:
+        stage_timeout = deadline.budget(timeout, reserve=get_settings().deadline_answer_reserve_seconds)
+    tools_by_name = {t.name: t for t in tools}
+    searches = [
+        call for call in tool_calls
+        if call["name"] == search_knowledge_base.name and isinstance(call["args"].get("query"), str)
+    ]
+    batch = None
+    if searches:
+        batch = asyncio.create_task(search_knowledge_base_batch([call["args"]["query"] for call in searches]))
+    search_index = {id(call): i for i, call in enumerate(searches)}
+
+    async def observe(call: dict) -> str:
+        if id(call) in search_index:
+            # Shielded: one call timing out does not cancel the shared batch
+            return (await asyncio.shield(batch))[search_index[id(call)]]
+        if call["name"] not in tools_by_name:
+            return f"Error: {call['name']} is not a valid tool, try one of [{', '.join(tools_by_name)}]."
+        try:
+            return await tools_by_name[call["name"]].ainvoke(call["args"], config)
+        except Exception as e:
+            logger.warning(f"Tool {call['name']} failed: {e}")
+            return f"Error: {e!r}\n Please fix your mistakes."
+
+    async def observe_with_timeout(call: dict) -> str:
+        try:
+            return await asyncio.wait_for(observe(call), timeout=stage_timeout)
+        except asyncio.TimeoutError:
+            if stage_timeout < timeout:
+                deadline.record_exceeded("tools")
+                logger.warning(f"Tool {call['name']} stopped at the request deadline ({stage_timeout:.1f}s)")
+                return DEADLINE_MESSAGE
+            get_metrics().incr("agent.tool_timeouts")
+            logger.warning(f"Tool {call['name']} timed out after {timeout}s")
+            return timeout_message(timeout)
+
+    get_metrics().observe("agent.tool_calls_per_turn", len(tool_calls))
+    try:
+        observations = await asyncio.gather(*(observe_with_timeout(call) for call in tool_calls))
+    finally:
+        if batch is not None:
+            batch.cancel()  # No-op once finished; abandons it if every call timed out
+
+    return [
+        ToolMessage(content=str(observation), name=call["name"], tool_call_id=call["id"])
+        for call, observation in zip(tool_calls, observations)
+    ]
 
 
 # Apply timeout wrapper for async execution
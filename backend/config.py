@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Literal
 
 class Settings(BaseSettings):
     # Server
@@ -9,26 +10,86 @@ class Settings(BaseSettings):
 
     # RAG
     embedding_model: str = "sentence-transformers/all-mpnet-base-v2"
+    embedding_backend: Literal["torch", "onnx"] = "torch"
+    onnx_model_dir: str = "./onnx_model"  # Output of scripts/export_onnx.py
+    onnx_num_threads: int = 0  # ONNX Runtime intra-op threads (0 = auto)
+    embedding_batch_window_ms: float = 2.0  # Wait for concurrent queries to share a forward pass
+    embedding_max_batch_size: int = 32  # 1 disables micro-batching
     chroma_persist_dir: str = "./chroma_db"
+    chroma_server_host: str = ""  # Set to share one Chroma server between workers
+    chroma_server_port: int = 8001
     collection_name: str = "berlin_city_knowledge"
+    vector_backend: str = "chroma"  # chroma | numpy (in-process memory-mapped index)
+    vector_index_dir: str = "./vector_index"  # numpy backend files
+    vector_index_dtype: str = "float32"  # float16 / int8 trade CPU and recall for 2x / 4x less memory
+    vector_ann_threshold: int = 20000  # numpy backend: IVF index from this many chunks on
+    vector_ann_probes: int = 32  # IVF lists scored per query (recall vs latency)
 
     # Retrieval
     retrieval_k: int = 10
     bm25_weight: float = 0.2
     semantic_weight: float = 0.8
+    knowledge_watch_enabled: bool = False  # Rebuild the index when knowledge/ changes
+    knowledge_watch_interval_seconds: float = 2.0
+    knowledge_watch_lock_path: str = "./knowledge_watcher.lock"  # Elects the worker that writes vectors
+    index_swap_grace_seconds: float = 60.0  # Keep removed chunks for requests on the old snapshot
 
     # Agent
     mistral_model: str = "mistral-large-latest"
     mistral_api_key: str = ""  # Required - set via MISTRAL_API_KEY env var
     agent_max_iterations: int = 5
     agent_timeout_seconds: int = 30
+    request_deadline_seconds: float = 60.0  # End-to-end budget of a chat request (0 disables)
+    deadline_answer_reserve_seconds: float = 10.0  # Time kept for the final answer
     agent_temperature: float = 0.0  # Deterministic for consistent responses
+    disconnect_poll_interval_seconds: float = 0.5  # Client-disconnect check while streaming
+    entity_data_parts: bool = True  # Emit parsed entities as data-contact/data-calendar parts
+    llm_replay_mode: str = ""  # "" (live) | record | replay (agent/replay.py)
+    llm_cassette_path: str = "./perf/chat_cassette.jsonl"  # Recorded Mistral streams
+    llm_replay_speed: float = 1.0  # Replay timing factor (1 = recorded, 0 = no delays)
+
+    # Mistral HTTP client (one pooled client shared by all requests)
+    mistral_base_url: str = "https://api.mistral.ai/v1"
+    mistral_max_concurrency: int = 16  # Max in-flight Mistral requests per process
+    mistral_rate_limit_per_second: float = 5.0  # Token bucket refill rate (0 disables)
+    mistral_rate_limit_burst: int = 10  # Token bucket capacity
+    mistral_max_retries: int = 3  # Retries on 429/5xx/transport errors
+    mistral_max_connections: int = 32
+    mistral_keepalive_expiry_seconds: float = 30.0
+
+    # Conversation history compaction (token estimates, see agent/tokens.py)
+    history_max_tokens: int = 6000  # Budget for conversation history per LLM call
+    history_keep_recent_turns: int = 3  # Most recent turns kept verbatim
+    history_summary_max_tokens: int = 60  # Max tokens per summarized older message
+    tool_context_max_tokens: int = 300  # Budget per search_knowledge_base observation (agent/context.py)
+
+    # Server-side conversation state (conversation-ID mode)
+    conversation_store_enabled: bool = True
+    conversation_db_path: str = "./conversations.sqlite"
+    conversation_ttl_seconds: int = 86400  # Evict threads idle for 24h
+    conversation_evict_interval_seconds: int = 300
+
+    # Startup
+    warmup_wait_timeout_seconds: float = 60.0  # Max wait for a warming subsystem per request
+
+    # Admission control (per process)
+    chat_max_in_flight: int = 32  # Concurrent agent streams
+    chat_max_queue: int = 64  # Requests allowed to wait for a stream slot
+    chat_queue_timeout_seconds: float = 10.0  # Max wait before shedding with 429
+    admission_priority_lanes: bool = True  # Give /api/retrieve its own lane
+    retrieve_max_in_flight: int = 64
+    retrieve_max_queue: int = 128
+    retrieve_queue_timeout_seconds: float = 2.0
+    retrieve_batch_max_queries: int = 1000  # Max queries per /api/retrieve/batch request
+    retrieve_batch_size: int = 64  # Queries per embedding pass / Chroma call
+    retrieve_batch_max_k: int = 100  # Max results per query in /api/retrieve/batch
 
     # Observability (optional)
     # NOTE: LangChain reads LANGCHAIN_* env vars automatically for tracing
     langchain_api_key: str = ""  # Set via LANGCHAIN_API_KEY for tracing
     langchain_project: str = "berlin-city-chatbot"
     langchain_tracing_v2: bool = False  # Enable LangSmith tracing
+    profiling_token: str = ""  # X-Profile-Token value that enables per-request profiles (empty = off)
 
     class Config:
         env_file = ".env"
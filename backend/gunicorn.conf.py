@@ -0,0 +1,87 @@
+"""Gunicorn config for multi-worker mode.
+
+    gunicorn main:app -c gunicorn.conf.py
+
+The master imports the app and preloads the embedding model, corpus chunks
+and BM25 index (runtime/preload.py) before forking, so workers share those
+pages copy-on-write. Chroma runs as one local server that every worker
+connects to: by default the master starts `chroma run` on
+CHROMA_SERVER_PORT and stops it on exit; set CHROMA_SERVER_HOST to use an
+external server instead. With VECTOR_BACKEND=numpy no server is started:
+workers memory-map the same index files and share them via the page cache.
+With KNOWLEDGE_WATCH_ENABLED every worker rebuilds its own index snapshot,
+but only the worker holding KNOWLEDGE_WATCH_LOCK_PATH writes to the shared
+vector store (see rag/watcher.py).
+
+Environment:
+    WEB_CONCURRENCY      Number of workers (default: CPU count)
+    PORT                 Listen port (default: 8000)
+    CHROMA_SERVER_HOST   External Chroma server (skip spawning one)
+    CHROMA_SERVER_PORT   Chroma server port (default: 8001)
+"""
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+preload_app = True
+timeout = 120
+graceful_timeout = 30
+
+# Workers connect to the shared Chroma server instead of opening the
+# SQLite-backed store themselves (set before the app is imported)
+_spawn_chroma = not os.environ.get("CHROMA_SERVER_HOST")
+os.environ.setdefault("CHROMA_SERVER_HOST", "127.0.0.1")
+os.environ.setdefault("CHROMA_SERVER_PORT", "8001")
+
+_chroma_process: subprocess.Popen | None = None
+
+
+def on_starting(server):
+    """Start the shared Chroma server (if not external) and preload serving state."""
+    global _chroma_process
+    from config import get_settings
+    from runtime.preload import preload
+
+    settings = get_settings()
+    if _spawn_chroma and settings.vector_backend == "chroma":
+        chroma = os.path.join(os.path.dirname(sys.executable), "chroma")
+        _chroma_process = subprocess.Popen([
+            chroma, "run",
+            "--path", settings.chroma_persist_dir,
+            "--host", settings.chroma_server_host,
+            "--port", str(settings.chroma_server_port),
+        ], stdout=subprocess.DEVNULL)
+        _wait_for_chroma(settings.chroma_server_host, settings.chroma_server_port)
+        server.log.info(f"Chroma server started on port {settings.chroma_server_port}")
+
+    stats = preload()
+    server.log.info(f"Preloaded serving state for {workers} workers: {stats}")
+
+
+def post_fork(server, worker):
+    from runtime.preload import limit_worker_threads
+
+    threads = limit_worker_threads(workers)
+    server.log.info(f"Worker {worker.pid} forked ({threads} compute threads)")
+
+
+def on_exit(server):
+    if _chroma_process is not None:
+        _chroma_process.terminate()
+        _chroma_process.wait(timeout=10)
+
+
+def _wait_for_chroma(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://{host}:{port}/api/v2/heartbeat", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Chroma server did not start on {host}:{port}")
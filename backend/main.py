@@ -2,73 +2,170 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from contextlib import asynccontextmanager
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from contextlib import aclosing, asynccontextmanager
 from pathlib import Path
+import asyncio
+import json
 import logging
 import uuid
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, SystemMessage
-from langgraph.errors import GraphRecursionError
 
 from config import get_settings
 from models.schemas import (
     HealthResponse,
+    ReadinessResponse,
     ChatRequest,
+    BatchRetrievalRequest,
     RetrievalResponse,
     RetrievalResult,
     AgentChatRequest,
     MarkerStrategy,
 )
-from rag import get_vectorstore, get_hybrid_retriever
-from rag.retriever import retrieve_with_scores, deduplicate_results
+from rag import get_embeddings, get_vectorstore, get_hybrid_retriever
+from rag.retriever import aretrieve_rows, deduplicate_results, fuse_rankings, to_documents
 from rag.chunking import chunk_all_knowledge
-from rag.vectorstore import init_vectorstore
-from rag.retriever import init_hybrid_retriever
+from rag.retriever import init_hybrid_retriever, get_cached_chunks, get_index_snapshot, index_status
+from rag.vectorstore import count_vectors, sync_vectorstore
+from rag.batch import batch_retrieve
+from rag.watcher import start_knowledge_watcher, stop_knowledge_watcher
 from agent import create_agent_graph, get_recursion_limit
-from streaming import format_text_start, format_text_delta, format_done, SSE_HEADERS
+from agent.llm_client import close_mistral_async_client
+from agent.prompts import prompt_stats
+from agent.conversations import (
+    open_conversation_store,
+    close_conversation_store,
+    get_checkpointer,
+    get_thread_config,
+    touch_conversation,
+    create_conversation,
+    conversation_exists,
+)
+from runtime import (
+    get_metrics,
+    get_admission_controller,
+    AdmissionRejected,
+    get_warmup,
+    WarmupFailed,
+    Deadline,
+    DeadlineExceeded,
+    RequestProfile,
+    bind_profile,
+    get_profile,
+    get_profile_store,
+    span,
+)
+from runtime.profiling import check_profiling_token, traced
+from streaming import (
+    format_text_start,
+    format_text_delta,
+    format_data_part,
+    format_done,
+    SSE_HEADERS,
+    cancel_on_disconnect,
+    ClientDisconnected,
+    EntityStreamParser,
+)
+from agent.tokens import estimate_tokens
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Initialize RAG system on startup."""
-    print("Initializing RAG system...")
-    knowledge_dir = Path(__file__).parent / "knowledge"
-
-    if knowledge_dir.exists() and any(knowledge_dir.rglob("*.md")):
-        # Check if vector store already populated
-        vs = get_vectorstore()
-        if vs._collection.count() == 0:
+KNOWLEDGE_DIR = Path(__file__).parent / "knowledge"
+
+def register_warmup_steps(warmup) -> None:
+    """Register RAG and agent initialization as background warm-up steps.
+
+    embeddings, corpus and agent run concurrently; vectorstore waits for the
+    embedding model and retriever waits for both the store and the corpus.
+    """
+    has_knowledge = KNOWLEDGE_DIR.exists() and any(KNOWLEDGE_DIR.rglob("*.md"))
+    if not has_knowledge:
+        print("Warning: No knowledge base found. Run scripts/ingest.py first.")
+
+    def load_corpus():
+        from rag.chunk_store import ChunkStore  # Deferred: numpy
+
+        # Preloaded by the parent process in multi-worker mode
+        chunks = get_cached_chunks()
+        if chunks is not None:
+            return chunks
+        return ChunkStore.from_documents(chunk_all_knowledge(KNOWLEDGE_DIR) if has_knowledge else [])
+
+    def open_vectorstore():
+        get_vectorstore()
+        return count_vectors()
+
+    def build_retriever():
+        chunks = warmup.result("corpus")
+        if not chunks:
+            return None
+        vector_count = warmup.result("vectorstore")
+        if vector_count == 0:
             print("Vector store empty, running ingestion...")
-            documents = chunk_all_knowledge(knowledge_dir)
-            init_vectorstore(documents)
-            init_hybrid_retriever(documents)
-            print(f"Ingested {len(documents)} chunks")
+        # Embeds only chunks the store is missing and drops chunks that are
+        # no longer in the knowledge base
+        added, deleted = sync_vectorstore(chunks)
+        if vector_count == 0:
+            print(f"Ingested {added} chunks")
         else:
-            # Still need to init hybrid retriever with documents
-            documents = chunk_all_knowledge(knowledge_dir)
-            init_hybrid_retriever(documents)
-            print(f"Loaded existing vector store with {vs._collection.count()} vectors")
-    else:
-        print("Warning: No knowledge base found. Run scripts/ingest.py first.")
+            print(f"Loaded existing vector store with {vector_count} vectors "
+                  f"({added} added, {deleted} stale removed)")
+        return init_hybrid_retriever(chunks)
+
+    def init_agent():
+        # Pre-initialize agent graph (validates API key)
+        try:
+            create_agent_graph("xml")  # Test with default marker
+            print("Agent graph initialized")
+        except Exception as e:
+            print(f"Warning: Agent not initialized - {e}")
+            print("Set MISTRAL_API_KEY in .env to enable agent features")
+            raise
+
+    warmup.add("embeddings", get_embeddings)
+    warmup.add("corpus", load_corpus)
+    warmup.add("vectorstore", open_vectorstore, depends_on=["embeddings"])
+    warmup.add("retriever", build_retriever, depends_on=["vectorstore", "corpus"])
+    warmup.add("agent", init_agent, required=False)
 
-    # Pre-initialize agent graph (validates API key)
-    try:
-        create_agent_graph("xml")  # Test with default marker
-        print("Agent graph initialized")
-    except Exception as e:
-        print(f"Warning: Agent not initialized - {e}")
-        print("Set MISTRAL_API_KEY in .env to enable agent features")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background warm-up of the RAG system and agent.
+
+    The server accepts requests immediately; /ready reports warm-up progress
+    and handlers wait on the subsystems they need.
+    """
+    print("Initializing RAG system in background...")
+    warmup = get_warmup()
+    register_warmup_steps(warmup)
+    warmup.start()
+
+    if settings.knowledge_watch_enabled and KNOWLEDGE_DIR.exists():
+        start_knowledge_watcher(KNOWLEDGE_DIR)
+        print(f"Watching {KNOWLEDGE_DIR} for changes")
+
+    if settings.conversation_store_enabled:
+        try:
+            await open_conversation_store()
+            print(f"Conversation store opened at {settings.conversation_db_path}")
+        except Exception as e:
+            print(f"Warning: Conversation store not available - {e}")
 
     yield
 
     print("Shutting down...")
+    await warmup.stop()
+    await stop_knowledge_watcher()
+    await close_conversation_store()
+    await close_mistral_async_client()
 
 app = FastAPI(
     title="Berlin City Chatbot API",
@@ -94,25 +191,217 @@ app.add_middleware(
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint."""
+    """Liveness check: the process is up and serving (does not wait for warm-up)."""
     return HealthResponse(status="healthy", version="0.2.0")
 
 
+@app.get("/ready", response_model=ReadinessResponse)
+async def readiness_check():
+    """Readiness check: per-subsystem warm-up state and timing.
+
+    Returns 503 until every required subsystem has finished warming up.
+    """
+    readiness = ReadinessResponse(**get_warmup().status())
+    return JSONResponse(
+        status_code=200 if readiness.ready else 503,
+        content=readiness.model_dump(),
+    )
+
+
+async def wait_for_subsystem(name: str) -> None:
+    """Wait for a warming-up subsystem, failing with 503 if it is unavailable."""
+    try:
+        await get_warmup().wait_for(name, timeout=settings.warmup_wait_timeout_seconds)
+    except WarmupFailed as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+
+@app.get("/metrics")
+async def metrics():
+    """In-process serving metrics (counters, gauges, latency summaries)."""
+    return {
+        **get_metrics().snapshot(),
+        "admission": get_admission_controller().stats(),
+        "prompts": prompt_stats(),
+        "index": index_status(),
+    }
+
+
+async def admit_or_reject(lane: str):
+    """Acquire an admission ticket, shedding with 429 + Retry-After on overload."""
+    try:
+        return await get_admission_controller().acquire(lane)
+    except AdmissionRejected as e:
+        logger.warning(f"Shedding request: {e}")
+        raise HTTPException(
+            status_code=429,
+            detail={"error": "Server busy", "lane": e.lane, "reason": e.reason},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def start_profile(http_request: Request, kind: str) -> RequestProfile | None:
+    """Profile this request if it sends X-Profile-Token (see runtime/profiling.py).
+
+    Raises:
+        HTTPException: 403 if the token is wrong or profiling is disabled
+    """
+    provided = http_request.headers.get("x-profile-token")
+    if provided is None:
+        return None
+    if not check_profiling_token(provided, settings.profiling_token):
+        raise HTTPException(status_code=403, detail="Profiling is not authorized")
+    profile = RequestProfile(kind)
+    logger.info(f"Profiling {kind} request as {profile.profile_id}")
+    return profile
+
+
+async def profiled(stream, profile: RequestProfile):
+    """Run a streaming body with the request's profile bound, keeping it when done."""
+    try:
+        with bind_profile(profile):
+            async for chunk in stream:
+                yield chunk
+    finally:
+        get_profile_store().add(profile)
+
+
+@app.get("/api/profiles/{profile_id}")
+async def download_profile(profile_id: str, http_request: Request):
+    """Download a recent request profile (same X-Profile-Token as the profiled request)."""
+    if not check_profiling_token(http_request.headers.get("x-profile-token"), settings.profiling_token):
+        raise HTTPException(status_code=403, detail="Profiling is not authorized")
+    data = get_profile_store().get(profile_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Profile not found (only recent profiles are kept)")
+    return JSONResponse(
+        content=data,
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.json"'},
+    )
+
+
+async def release_when_done(stream, ticket):
+    """Hold an admission ticket until a streaming body finishes or is closed."""
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        ticket.release()
+
+
 # --- Phase 2 legacy endpoint (raw retrieval) ---
 
 @app.post("/api/retrieve", response_model=RetrievalResponse)
-async def retrieve(request: ChatRequest):
+async def retrieve(request: ChatRequest, http_request: Request, response: Response):
     """
     Process a chat message and return relevant knowledge base results.
 
     This is the Phase 2 retrieval-only endpoint. Use /api/chat for
     the full agent experience with streaming.
+
+    Clients sending Accept: text/event-stream or application/x-ndjson get
+    the results streamed instead (see stream_retrieval): BM25 hits first,
+    then the fused hybrid ranking once semantic search has finished.
+
+    With a valid X-Profile-Token header the request is profiled; the
+    profile ID is returned in X-Profile-Id (see /api/profiles/{profile_id}).
     """
     query = request.message.strip()
 
     if not query:
         raise HTTPException(status_code=400, detail="Message cannot be empty")
 
+    profile = start_profile(http_request, "retrieve")
+
+    await wait_for_subsystem("retriever")
+
+    accept = http_request.headers.get("accept", "")
+    stream_format = "sse" if "text/event-stream" in accept else "ndjson" if "application/x-ndjson" in accept else None
+
+    ticket = await admit_or_reject("retrieve")
+    if stream_format is not None:
+        body = stream_retrieval(query, stream_format)
+        headers = SSE_HEADERS if stream_format == "sse" else {}
+        if profile is not None:
+            body = profiled(body, profile)
+            headers = {**headers, "X-Profile-Id": profile.profile_id}
+        return StreamingResponse(
+            release_when_done(body, ticket),
+            media_type="text/event-stream" if stream_format == "sse" else "application/x-ndjson",
+            headers=headers or None,
+            background=BackgroundTask(ticket.release),
+        )
+    try:
+        with bind_profile(profile):
+            return await _retrieve(query)
+    finally:
+        ticket.release()
+        if profile is not None:
+            get_profile_store().add(profile)
+            response.headers["X-Profile-Id"] = profile.profile_id
+
+
+async def stream_retrieval(query: str, stream_format: str):
+    """Stream retrieval results in stages for search-as-you-type clients.
+
+    Semantic search (embedding + vector query) starts immediately in the
+    background while BM25 (~1ms) answers first:
+
+    1. stage "keyword": BM25 hits with BM25 scores
+    2. stage "fused": hybrid ranking (reciprocal rank fusion of BM25 and
+       semantic results), replacing the keyword results
+
+    SSE uses the AI SDK framing: both stages are data-retrieval parts with
+    the same id, so the client replaces the first with the second, followed
+    by [DONE]. NDJSON emits one {"type": "retrieval", ...} line per stage.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    part_id = f"retrieval-{uuid.uuid4().hex[:8]}"
+    # One snapshot for both stages, even if the index is swapped in between
+    snapshot = get_index_snapshot()
+    semantic_task = asyncio.create_task(
+        aretrieve_rows(query, k=settings.retrieval_k, snapshot=snapshot)
+    )
+
+    def event(stage: str, results: list) -> str:
+        # Results are (row, score) pairs of the snapshot (none without one)
+        if results:
+            with span("dedup", stage=stage):
+                unique_results = deduplicate_results(snapshot.chunks, results)[:settings.retrieval_k]
+            results = to_documents(snapshot.chunks, unique_results)
+        data = {
+            "stage": stage,
+            "query": query,
+            "results": format_results(results),
+            "elapsed_ms": round((loop.time() - started) * 1000, 1),
+        }
+        if stream_format == "sse":
+            return format_data_part("retrieval", data, part_id)
+        return json.dumps({"type": "retrieval", **data}) + "\n"
+
+    try:
+        keyword_hits = []
+        if snapshot is not None:
+            keyword_hits = (await asyncio.to_thread(traced("bm25", snapshot.bm25.top_k), [query], settings.retrieval_k))[0]
+            yield event("keyword", [(row, score) for row, score in keyword_hits if score > 0])
+
+        semantic_hits = await semantic_task
+        with span("fusion"):
+            fused = fuse_rankings(
+                [[row for row, _ in keyword_hits], [row for row, _ in semantic_hits]],
+                [settings.bm25_weight, settings.semantic_weight],
+            )
+        yield event("fused", fused)
+    finally:
+        semantic_task.cancel()
+
+    if stream_format == "sse":
+        yield format_done()
+
+
+async def _retrieve(query: str) -> RetrievalResponse:
+    """Run hybrid retrieval and format the response."""
     retriever = get_hybrid_retriever()
     if retriever is None:
         return RetrievalResponse(
@@ -121,11 +410,14 @@ async def retrieve(request: ChatRequest):
             message="Knowledge base not initialized. Run scripts/ingest.py first."
         )
 
-    # Retrieve with scores
-    raw_results = retrieve_with_scores(query, k=settings.retrieval_k)
+    # Retrieve (row, score) pairs of one snapshot
+    snapshot = get_index_snapshot()
+    raw_results = await aretrieve_rows(query, k=settings.retrieval_k, snapshot=snapshot)
 
     # Deduplicate
-    unique_results = deduplicate_results(raw_results)
+    with span("dedup"):
+        unique_rows = deduplicate_results(snapshot.chunks, raw_results)
+    unique_results = to_documents(snapshot.chunks, unique_rows)
 
     if not unique_results:
         return RetrievalResponse(
@@ -148,45 +440,208 @@ async def retrieve(request: ChatRequest):
     return RetrievalResponse(query=query, results=results)
 
 
+def format_results(results: list) -> list[dict]:
+    """Format (document, score) pairs as RetrievalResult dicts."""
+    return [
+        RetrievalResult(
+            content=doc.page_content,
+            source=doc.metadata.get("attribution", "Unknown"),
+            score=round(score, 4),
+            type=doc.metadata.get("type", "general")
+        ).model_dump()
+        for doc, score in results
+    ]
+
+
+@app.post("/api/retrieve/batch")
+async def retrieve_batch(request: BatchRetrievalRequest):
+    """
+    Hybrid retrieval for many queries at once (evaluation, cache warming).
+
+    Queries are processed in slices of settings.retrieve_batch_size: one
+    embedding pass, one multi-query Chroma call and one BM25 matrix product
+    per slice. Results stream back as NDJSON, one line per query in input
+    order, followed by a timing line per slice and a final summary:
+
+        {"type": "result", "index": 0, "query": "...", "results": [...]}
+        {"type": "timing", "batch": 0, "queries": 64, "embed_seconds": ...}
+        {"type": "summary", "queries": 128, "batches": 2, "total_seconds": ...}
+
+    Scores are fused reciprocal-rank scores of the hybrid retriever.
+    """
+    queries = [q.strip() for q in request.queries]
+    if not queries or not all(queries):
+        raise HTTPException(status_code=400, detail="Queries must be non-empty strings")
+    if len(queries) > settings.retrieve_batch_max_queries:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.retrieve_batch_max_queries} queries per batch",
+        )
+
+    await wait_for_subsystem("retriever")
+    ticket = await admit_or_reject("retrieve")
+
+    async def stream_batches():
+        started = asyncio.get_running_loop().time()
+        batch_size = settings.retrieve_batch_size
+        batches = 0
+        for offset in range(0, len(queries), batch_size):
+            batch = queries[offset:offset + batch_size]
+            results, timing = await asyncio.to_thread(batch_retrieve, batch, request.k)
+            for i, (query, query_results) in enumerate(zip(batch, results)):
+                line = {"type": "result", "index": offset + i, "query": query,
+                        "results": format_results(query_results)}
+                yield json.dumps(line) + "\n"
+            yield json.dumps({"type": "timing", "batch": batches, **timing.as_dict()}) + "\n"
+            batches += 1
+        elapsed = asyncio.get_running_loop().time() - started
+        yield json.dumps({
+            "type": "summary",
+            "queries": len(queries),
+            "batches": batches,
+            "total_seconds": round(elapsed, 4),
+            "queries_per_second": round(len(queries) / elapsed, 1) if elapsed else None,
+        }) + "\n"
+
+    return StreamingResponse(
+        release_when_done(stream_batches(), ticket),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(ticket.release),
+    )
+
+
 # --- Phase 3 streaming agent endpoint ---
 
-async def stream_agent_response(messages: list, message_id: str, marker: str):
+async def stream_agent_response(
+    messages: list,
+    message_id: str,
+    marker: str,
+    conversation_id: str | None = None,
+    http_request: Request | None = None,
+    deadline: Deadline | None = None,
+):
     """Stream agent response token-by-token.
 
+    If the client disconnects mid-answer, the graph run is cancelled, which
+    closes the upstream Mistral stream and abandons pending retrieval.
+
+    Entity markers in the text are parsed as they stream; each contact or
+    event is also sent as a data part as soon as its marker closes.
+
     Args:
         messages: List of LangChain message objects
         message_id: Unique ID for the streamed message
         marker: Output format strategy
+        conversation_id: Server-side conversation thread; when set, messages
+            only holds the new message(s) and prior state comes from the store
+        http_request: Incoming request, watched for client disconnects
+        deadline: Request deadline, passed to every graph node and tool
+
+    When the request is profiled (see runtime/profiling.py), the stream ends
+    with a data-profile part holding its span timeline.
 
     Yields:
         SSE formatted events compatible with AI SDK v6
     """
+    from langgraph.errors import GraphRecursionError
+
     # Create request-scoped graph with marker
-    graph = create_agent_graph(marker)
     recursion_limit = get_recursion_limit()
+    config = {"recursion_limit": recursion_limit}
+    with span("graph.create"):
+        if conversation_id:
+            graph = create_agent_graph(marker, checkpointer=get_checkpointer())
+            config.update(get_thread_config(conversation_id))
+        else:
+            graph = create_agent_graph(marker)
+    if deadline is not None:
+        config["configurable"] = {**config.get("configurable", {}), "deadline": deadline}
 
     # REQUIRED by AI SDK v6: Send text-start before any text-delta events
     yield format_text_start(message_id)
 
+    metrics = get_metrics()
+    profile = get_profile()
+    streamed_tokens = 0
+    entity_parser = EntityStreamParser(marker) if settings.entity_data_parts else None
+    entity_count = 0
+
+    def entity_parts(entities) -> list[str]:
+        nonlocal entity_count
+        parts = []
+        for entity in entities:
+            metrics.incr(f"entities.{entity.type.value}")
+            if entity.repairs:
+                metrics.incr("entities.repaired")
+            parts.append(format_data_part(
+                entity.type.value, entity.data, f"{message_id}-entity-{entity_count}"
+            ))
+            entity_count += 1
+        return parts
+
     try:
+        if conversation_id:
+            # Inside the try: a store error ends the stream with an error part
+            await touch_conversation(conversation_id)
+
         # Stream with messages mode for token visibility
         # CRITICAL: stream_mode="messages" is required for token-by-token streaming
-        async for event in graph.astream(
+        events = graph.astream(
             {"messages": messages},
-            config={"recursion_limit": recursion_limit},
+            config=config,
             stream_mode="messages"
-        ):
-            # event is a tuple: (message_chunk, metadata)
-            if isinstance(event, tuple) and len(event) == 2:
-                message_chunk, metadata = event
-
-                # Only stream AIMessageChunk content (not tool calls or tool messages)
-                # ToolMessage contains raw search results - don't send to user
-                if isinstance(message_chunk, AIMessageChunk) and message_chunk.content:
-                    # Skip if this is a tool call (no text content for user)
-                    if not message_chunk.tool_calls:
-                        yield format_text_delta(message_chunk.content, message_id)
+        )
+        if http_request is not None:
+            events = cancel_on_disconnect(
+                http_request, events, settings.disconnect_poll_interval_seconds
+            )
+        async with aclosing(events):
+            async for event in events:
+                # event is a tuple: (message_chunk, metadata)
+                if isinstance(event, tuple) and len(event) == 2:
+                    message_chunk, metadata = event
+
+                    # Only stream AIMessageChunk content (not tool calls or tool messages)
+                    # ToolMessage contains raw search results - don't send to user
+                    if isinstance(message_chunk, AIMessageChunk) and message_chunk.content:
+                        # Skip if this is a tool call (no text content for user)
+                        if not message_chunk.tool_calls:
+                            if streamed_tokens == 0 and profile is not None:
+                                profile.mark("first_token")
+                            streamed_tokens += estimate_tokens(message_chunk.content)
+                            with span("sse.encode", timeline=False):
+                                delta = format_text_delta(message_chunk.content, message_id)
+                            yield delta
+                            if entity_parser is not None:
+                                for part in entity_parts(entity_parser.feed(message_chunk.content)):
+                                    yield part
+
+        metrics.observe("chat.completion_tokens", streamed_tokens)
+        if entity_parser is not None:
+            for part in entity_parts(entity_parser.close()):
+                yield part
+            metrics.incr("entities.rejected", entity_parser.rejected)
+
+    except (ClientDisconnected, asyncio.CancelledError) as e:
+        # Estimate tokens saved from the average length of completed answers
+        saved = max(0, round(metrics.mean("chat.completion_tokens")) - streamed_tokens)
+        metrics.incr("chat.cancelled")
+        metrics.incr("chat.cancelled_tokens_streamed", streamed_tokens)
+        metrics.incr("chat.tokens_saved_estimate", saved)
+        logger.info(
+            f"Client disconnected after {streamed_tokens} tokens; agent run cancelled "
+            f"(~{saved} tokens saved)"
+        )
+        if isinstance(e, asyncio.CancelledError):
+            raise
+        return
 
+    except DeadlineExceeded as e:
+        logger.warning(f"{e} ({deadline.seconds:.0f}s budget, {streamed_tokens} tokens streamed)")
+        yield format_text_delta(
+            "\n\nI ran out of time answering this request. Please try again or ask a narrower question.",
+            message_id
+        )
     except GraphRecursionError:
         logger.warning(f"Agent hit recursion limit ({recursion_limit})")
         yield format_text_delta(
@@ -200,12 +655,18 @@ async def stream_agent_response(messages: list, message_id: str, marker: str):
             message_id
         )
 
+    if deadline is not None:
+        metrics.observe("deadline.remaining_seconds", deadline.remaining())
+    if profile is not None:
+        # Trailing timeline of this request (also downloadable by profile ID)
+        yield format_data_part("profile", get_profile_store().add(profile), f"{message_id}-profile")
     yield format_done()
 
 
 @app.post("/api/chat")
 async def chat_stream(
     request: AgentChatRequest,
+    http_request: Request,
     marker: str = "streamdown"
 ):
     """
@@ -219,8 +680,14 @@ async def chat_stream(
 
     Headers include x-vercel-ai-ui-message-stream: v1 for AI SDK compatibility.
 
+    With new_conversation set, the conversation state is kept server-side and
+    its ID is returned in X-Conversation-Id; requests carrying that
+    conversation_id only need to send the new message. Unknown or expired
+    IDs are rejected with 404.
+
     Args:
         request: Chat request with messages array
+        http_request: Raw request, used to detect client disconnects
         marker: Output format strategy ("streamdown", "flowtoken", or "llm-ui"), defaults to "streamdown"
     """
     # Validate marker parameter
@@ -236,15 +703,27 @@ async def chat_stream(
     if not request.messages:
         raise HTTPException(status_code=400, detail="Messages array cannot be empty")
 
+    profile = start_profile(http_request, "chat")
+
+    # The deadline covers the whole request, including the admission queue
+    deadline = Deadline(settings.request_deadline_seconds) if settings.request_deadline_seconds > 0 else None
+
+    conversation_id = request.conversation_id
+    if (conversation_id or request.new_conversation) and get_checkpointer() is None:
+        raise HTTPException(status_code=503, detail="Conversation store is not available")
+    if conversation_id and not await conversation_exists(conversation_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired conversation")
+
     # Convert to LangChain message format
     lc_messages = []
+    # Keep AI SDK message IDs so history summaries can be cached per message
     for msg in request.messages:
         if msg.role == "user":
-            lc_messages.append(HumanMessage(content=msg.content))
+            lc_messages.append(HumanMessage(content=msg.content, id=msg.id))
         elif msg.role == "assistant":
-            lc_messages.append(AIMessage(content=msg.content))
+            lc_messages.append(AIMessage(content=msg.content, id=msg.id))
         elif msg.role == "system":
-            lc_messages.append(SystemMessage(content=msg.content))
+            lc_messages.append(SystemMessage(content=msg.content, id=msg.id))
 
     if not lc_messages:
         raise HTTPException(status_code=400, detail="No valid messages found")
@@ -252,11 +731,29 @@ async def chat_stream(
     # Generate message ID for this response
     message_id = f"msg-{uuid.uuid4().hex[:8]}"
 
+    if conversation_id is None and request.new_conversation:
+        conversation_id = await create_conversation()
+
+    # Admission control: the slot is held until the stream ends
+    ticket = await admit_or_reject("chat")
+
+    headers = {**SSE_HEADERS, "X-Marker-Strategy": marker}
+    if conversation_id:
+        headers["X-Conversation-Id"] = conversation_id
+
+    body = stream_agent_response(
+        lc_messages, message_id, marker, conversation_id, http_request, deadline
+    )
+    if profile is not None:
+        body = profiled(body, profile)
+        headers["X-Profile-Id"] = profile.profile_id
+
     # Return streaming response with AI SDK headers
     return StreamingResponse(
-        stream_agent_response(lc_messages, message_id, marker),
+        release_when_done(body, ticket),
         media_type="text/event-stream",
-        headers={**SSE_HEADERS, "X-Marker-Strategy": marker},
+        headers=headers,
+        background=BackgroundTask(ticket.release),
     )
 
 
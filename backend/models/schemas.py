@@ -1,7 +1,9 @@
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Optional, Literal, Any
 from enum import Enum
 
+from config import get_settings
+
 class MarkerStrategy(str, Enum):
     """Output format strategy for entity markers."""
     STREAMDOWN = "streamdown"
@@ -25,11 +27,39 @@ class ChatRequest(BaseModel):
     """Request body for legacy /api/chat endpoint (Phase 2)."""
     message: str
 
+class BatchRetrievalRequest(BaseModel):
+    """Request body for /api/retrieve/batch."""
+    queries: list[str]
+    # Results per query (default: settings.retrieval_k)
+    k: Optional[int] = Field(default=None, ge=1)
+
+    @field_validator("k")
+    @classmethod
+    def k_within_batch_limit(cls, k: Optional[int]) -> Optional[int]:
+        """Enforce settings.retrieve_batch_max_k (read per request, not at import)."""
+        max_k = get_settings().retrieve_batch_max_k
+        if k is not None and k > max_k:
+            raise ValueError(f"k must be at most {max_k}")
+        return k
+
 class HealthResponse(BaseModel):
     """Response from /health endpoint."""
     status: str
     version: str
 
+class WarmupStepStatus(BaseModel):
+    """Warm-up state of a single subsystem."""
+    state: Literal["pending", "running", "ready", "failed"]
+    required: bool
+    duration_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+class ReadinessResponse(BaseModel):
+    """Response from /ready endpoint."""
+    ready: bool
+    warmup_seconds: Optional[float] = None  # Set once every step has finished
+    steps: dict[str, WarmupStepStatus]
+
 # --- Agent schemas (Phase 3) ---
 
 class MessagePart(BaseModel):
@@ -63,8 +93,15 @@ class AgentChatRequest(BaseModel):
     """Request body for streaming agent /api/chat endpoint.
 
     Accepts messages array matching AI SDK useChat format.
+
+    With new_conversation set, the server starts a conversation, keeps its
+    state and returns its ID in the X-Conversation-Id header. Later requests
+    send that conversation_id and only the new message(s) instead of the
+    full history. IDs the server did not issue, or that expired, get a 404.
     """
     messages: list[MessageItem]
+    conversation_id: Optional[str] = None
+    new_conversation: bool = False
 
 class AgentChatError(BaseModel):
     """Error response for agent endpoint."""
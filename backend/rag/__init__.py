@@ -1,13 +1,49 @@
-from .embeddings import get_embeddings
-from .chunking import chunk_markdown_file, chunk_all_knowledge
-from .vectorstore import get_vectorstore, init_vectorstore
-from .retriever import get_hybrid_retriever
+"""Retrieval-augmented generation: chunking, embeddings, vector store and retrieval.
+
+Exports are resolved lazily (PEP 562) so importing the package or a light
+submodule does not pull in numpy, the text splitters or the langchain
+retriever stack before they are used.
+"""
+import importlib
+
+_EXPORTS = {
+    "get_embeddings": "rag.embeddings",
+    "chunk_markdown_file": "rag.chunking",
+    "chunk_all_knowledge": "rag.chunking",
+    "iter_chunks": "rag.chunking",
+    "ChunkStore": "rag.chunk_store",
+    "get_vectorstore": "rag.vectorstore",
+    "init_vectorstore": "rag.vectorstore",
+    "get_hybrid_retriever": "rag.retriever",
+    "get_index_snapshot": "rag.retriever",
+    "IndexSnapshot": "rag.retriever",
+    "batch_retrieve": "rag.batch",
+    "iter_batch_retrieve": "rag.batch",
+    "start_knowledge_watcher": "rag.watcher",
+    "stop_knowledge_watcher": "rag.watcher",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'rag' has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
+
 
 __all__ = [
     "get_embeddings",
     "chunk_markdown_file",
     "chunk_all_knowledge",
+    "iter_chunks",
+    "ChunkStore",
     "get_vectorstore",
     "init_vectorstore",
     "get_hybrid_retriever",
+    "get_index_snapshot",
+    "IndexSnapshot",
+    "batch_retrieve",
+    "iter_batch_retrieve",
+    "start_knowledge_watcher",
+    "stop_knowledge_watcher",
 ]
@@ -0,0 +1,125 @@
+"""Batched hybrid retrieval for many queries at once.
+
+Used for offline evaluation and cache warming, where issuing one request,
+one embedding pass and one search per query wastes most of the work:
+
+- all queries of a batch are embedded in one forward pass
+- vector search is a single multi-query call to the vector store
+- BM25 scores for the whole batch are one matrix product between a
+  query-term count matrix and the matching postings of the BM25 index
+  (see rag/bm25.py), instead of a Python loop over chunks per query term
+
+Rankings are fused with the same weighted reciprocal rank fusion as the
+EnsembleRetriever, so results match the agent's hybrid retriever. A batch
+reads one index snapshot (see rag/retriever.py) for all of its queries.
+
+Usage:
+    for results, timing in iter_batch_retrieve(queries, batch_size=64):
+        ...
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Iterator
+
+from langchain_core.documents import Document
+
+from config import get_settings
+from .embeddings import get_embeddings
+from .retriever import deduplicate_results, fuse_rankings, get_index_snapshot, to_documents, vector_fetch_k
+from .vectorstore import search_vectors
+
+
+@dataclass
+class BatchTiming:
+    """Per-batch timing breakdown in seconds."""
+    queries: int
+    embed: float
+    vector_search: float
+    bm25: float
+    fuse: float
+
+    @property
+    def total(self) -> float:
+        return self.embed + self.vector_search + self.bm25 + self.fuse
+
+    def as_dict(self) -> dict:
+        return {
+            "queries": self.queries,
+            "embed_seconds": round(self.embed, 4),
+            "vector_search_seconds": round(self.vector_search, 4),
+            "bm25_seconds": round(self.bm25, 4),
+            "fuse_seconds": round(self.fuse, 4),
+            "total_seconds": round(self.total, 4),
+        }
+
+
+def batch_retrieve(queries: list[str], k: int | None = None) -> tuple[list[list[tuple[Document, float]]], BatchTiming]:
+    """Hybrid retrieval for a batch of queries.
+
+    Args:
+        queries: Query strings (embedded together in one forward pass)
+        k: Results per query after fusion and deduplication (default: retrieval_k)
+
+    Returns:
+        Per-query (document, fused score) lists in input order, and the timing breakdown
+    """
+    settings = get_settings()
+    k = k or settings.retrieval_k
+    if not 1 <= k <= settings.retrieve_batch_max_k:
+        raise ValueError(f"k must be between 1 and {settings.retrieve_batch_max_k}, got {k}")
+    # Candidates per retriever: fusion and deduplication need at least k of them
+    fetch_k = max(k, settings.retrieval_k)
+    snapshot = get_index_snapshot()
+    timing = BatchTiming(queries=len(queries), embed=0.0, vector_search=0.0, bm25=0.0, fuse=0.0)
+    if snapshot is None:
+        return [[] for _ in queries], timing
+    chunks = snapshot.chunks
+
+    started = time.perf_counter()
+    vectors = get_embeddings().embed_documents(queries)
+    timing.embed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    semantic = [
+        [row for row, _ in snapshot.select(hits, fetch_k)]
+        for hits in search_vectors(vectors, vector_fetch_k(fetch_k))
+    ]
+    timing.vector_search = time.perf_counter() - started
+
+    started = time.perf_counter()
+    keyword = snapshot.bm25.top_k(queries, fetch_k)
+    timing.bm25 = time.perf_counter() - started
+
+    started = time.perf_counter()
+    weights = [settings.bm25_weight, settings.semantic_weight]
+    results = [
+        to_documents(
+            chunks,
+            deduplicate_results(chunks, fuse_rankings([[row for row, _ in keyword_hits], semantic_rows], weights))[:k],
+        )
+        for keyword_hits, semantic_rows in zip(keyword, semantic)
+    ]
+    timing.fuse = time.perf_counter() - started
+
+    return results, timing
+
+
+def iter_batch_retrieve(
+    queries: list[str],
+    k: int | None = None,
+    batch_size: int | None = None,
+) -> Iterator[tuple[list[list[tuple[Document, float]]], BatchTiming]]:
+    """Run batch_retrieve over consecutive slices of queries.
+
+    Args:
+        queries: Query strings
+        k: Results per query (default: retrieval_k)
+        batch_size: Queries per slice (default: retrieve_batch_size)
+
+    Yields:
+        (results, timing) per slice of at most batch_size queries, in order
+    """
+    batch_size = batch_size or get_settings().retrieve_batch_size
+    for start in range(0, len(queries), batch_size):
+        yield batch_retrieve(queries[start:start + batch_size], k)
@@ -0,0 +1,106 @@
+"""Micro-batching of concurrent query embeddings.
+
+Concurrent requests each need one query vector. Encoding them one at a time
+leaves most of the CPU's matrix-multiply throughput unused, so queries that
+arrive within a short window (or until the batch is full) are encoded in a
+single forward pass on a worker thread and each caller's future is resolved
+with its own vector.
+
+Metrics:
+    embeddings.batch_size           texts per forward pass
+    embeddings.batch_wait_seconds   time a query waited for its batch to start
+    embeddings.batch_seconds        duration of each forward pass
+
+Usage:
+    vector = await get_embedding_batcher().embed("who handles permits?")
+"""
+
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from config import get_settings
+from runtime import get_metrics
+from .embeddings import get_embeddings
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Collects query embeddings into batches and encodes them together.
+
+    Args:
+        embeddings: Embeddings whose embed_documents encodes a batch
+        window_seconds: How long the first query of a batch waits for others
+        max_batch_size: Flush immediately once this many queries are pending
+    """
+
+    def __init__(self, embeddings: "Embeddings", window_seconds: float, max_batch_size: int):
+        self.embeddings = embeddings
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: list[tuple[str, asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._running: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        """Embed one query, sharing a forward pass with concurrent callers."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window_seconds, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.window_seconds, self._flush)
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future, float]]) -> None:
+        metrics = get_metrics()
+        started = time.perf_counter()
+        metrics.observe("embeddings.batch_size", len(batch))
+        for _, _, enqueued in batch:
+            metrics.observe("embeddings.batch_wait_seconds", started - enqueued)
+
+        try:
+            vectors = await asyncio.to_thread(self.embeddings.embed_documents, [t for t, _, _ in batch])
+        except Exception as e:
+            logger.error(f"Batched embedding of {len(batch)} queries failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        metrics.observe("embeddings.batch_seconds", time.perf_counter() - started)
+
+        # Callers that were cancelled (client disconnect) simply drop their result
+        for (_, future, _), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+@lru_cache
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Get the process-wide query embedding batcher."""
+    settings = get_settings()
+    return EmbeddingBatcher(
+        get_embeddings(),
+        window_seconds=settings.embedding_batch_window_ms / 1000,
+        max_batch_size=settings.embedding_max_batch_size,
+    )
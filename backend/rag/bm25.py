@@ -0,0 +1,182 @@
+"""BM25 keyword index over a ChunkStore's rows.
+
+rank_bm25's BM25Okapi keeps one dict of term counts per chunk, and
+LangChain's BM25Retriever keeps a Document per chunk next to it. BM25Index
+holds the same information as integer arrays:
+
+- a vocabulary (term -> term ID)
+- per chunk: (term ID, count) pairs in CSR layout, from which a chunk's
+  tokens can be recovered for incremental rebuilds (see rag/watcher.py)
+- per term: postings of (row, precomputed BM25 weight), used for scoring
+
+Scoring a batch of queries gathers the postings of the batch's terms into a
+dense (rows x terms) matrix and multiplies it with the query-term counts.
+Scores are identical to rank_bm25's BM25Okapi.get_scores (same IDF with the
+epsilon floor, k1 and b).
+
+KeywordRetriever wraps an index for the EnsembleRetriever, materializing
+Documents only for the hits it returns.
+"""
+
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from .chunk_store import ChunkStore
+
+K1 = 1.5
+B = 0.75
+EPSILON = 0.25
+
+
+@lru_cache
+def ensure_nltk_data() -> None:
+    """Ensure the NLTK tokenizer data is available (downloads once if missing)."""
+    import nltk
+
+    try:
+        nltk.data.find('tokenizers/punkt_tab')
+    except LookupError:
+        nltk.download('punkt_tab', quiet=True)
+
+
+def get_tokenizer() -> Callable[[str], list[str]]:
+    """The BM25 tokenizer (NLTK word_tokenize)."""
+    from nltk.tokenize import word_tokenize
+
+    ensure_nltk_data()
+    return word_tokenize
+
+
+class BM25Index:
+    """BM25 (Okapi) index over tokenized chunks.
+
+    Args:
+        corpus_tokens: Tokens of each chunk, in row order
+        preprocess: Tokenizer applied to queries
+    """
+
+    def __init__(self, corpus_tokens: list[list[str]], preprocess: Callable[[str], list[str]]):
+        self.preprocess = preprocess
+        self.vocabulary: dict[str, int] = {}
+
+        term_ids: list[int] = []
+        counts: list[int] = []
+        indptr = np.zeros(len(corpus_tokens) + 1, dtype=np.int64)
+        doc_len = np.zeros(len(corpus_tokens), dtype=np.float32)
+        for row, tokens in enumerate(corpus_tokens):
+            freqs: dict[int, int] = {}
+            for token in tokens:
+                term = self.vocabulary.setdefault(token, len(self.vocabulary))
+                freqs[term] = freqs.get(term, 0) + 1
+            term_ids.extend(freqs)
+            counts.extend(freqs.values())
+            indptr[row + 1] = len(term_ids)
+            doc_len[row] = len(tokens)
+
+        self.terms = list(self.vocabulary)
+        self._term_ids = np.asarray(term_ids, dtype=np.int32)
+        self._counts = np.asarray(counts, dtype=np.int32)
+        self._indptr = indptr
+        self.size = len(corpus_tokens)
+
+        # IDF as in rank_bm25: negative IDFs (terms in more than half of the
+        # chunks) are replaced by epsilon * the mean IDF
+        doc_freq = np.bincount(self._term_ids, minlength=len(self.terms))
+        idf = np.log(self.size - doc_freq + 0.5) - np.log(doc_freq + 0.5)
+        if len(idf):
+            idf[idf < 0] = EPSILON * idf.mean()
+
+        avgdl = doc_len.sum() / self.size if self.size else 1.0
+        norm = K1 * (1 - B + B * doc_len / avgdl)
+
+        # Term-major postings: rows sorted by term, with the BM25 weight of
+        # the term in each row
+        rows = np.repeat(np.arange(self.size, dtype=np.int32), np.diff(indptr))
+        order = np.argsort(self._term_ids, kind="stable")
+        self._posting_rows = rows[order]
+        tf = self._counts[order].astype(np.float32)
+        self._posting_weights = (
+            idf[self._term_ids[order]] * tf * (K1 + 1) / (tf + norm[self._posting_rows])
+        ).astype(np.float32)
+        self._posting_ptr = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(doc_freq, out=self._posting_ptr[1:])
+
+    def doc_tokens(self, row: int) -> list[str]:
+        """A chunk's tokens (as a bag: grouped by term, not in text order)."""
+        span = slice(self._indptr[row], self._indptr[row + 1])
+        return [
+            self.terms[term]
+            for term, count in zip(self._term_ids[span].tolist(), self._counts[span].tolist())
+            for _ in range(count)
+        ]
+
+    def scores(self, queries: list[str]) -> np.ndarray:
+        """BM25 scores of every row for every query, shape (queries, rows)."""
+        tokenized = [self.preprocess(query) for query in queries]
+        terms = sorted({term for tokens in tokenized for term in tokens if term in self.vocabulary})
+        if not terms:
+            return np.zeros((len(queries), self.size), dtype=np.float32)
+        column = {term: j for j, term in enumerate(terms)}
+
+        query_terms = np.zeros((len(queries), len(terms)), dtype=np.float32)
+        for i, tokens in enumerate(tokenized):
+            for token in tokens:
+                j = column.get(token)
+                if j is not None:
+                    query_terms[i, j] += 1
+
+        term_weights = np.zeros((self.size, len(terms)), dtype=np.float32)
+        for term, j in column.items():
+            term_id = self.vocabulary[term]
+            postings = slice(self._posting_ptr[term_id], self._posting_ptr[term_id + 1])
+            term_weights[self._posting_rows[postings], j] = self._posting_weights[postings]
+
+        return query_terms @ term_weights.T
+
+    def top_k(self, queries: list[str], k: int) -> list[list[tuple[int, float]]]:
+        """Top-k (row, BM25 score) pairs per query."""
+        scores = self.scores(queries)
+        k = min(k, scores.shape[1])
+        if k == 0:
+            return [[] for _ in queries]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        ranked = []
+        for row_scores, candidates in zip(scores, top):
+            order = candidates[np.argsort(-row_scores[candidates], kind="stable")]
+            ranked.append([(int(row), float(row_scores[row])) for row in order])
+        return ranked
+
+
+def build_bm25_index(chunks: ChunkStore, corpus_tokens: list[list[str]] | None = None) -> BM25Index:
+    """Build a BM25 index over a chunk store.
+
+    Args:
+        chunks: Corpus chunks
+        corpus_tokens: Tokens of each chunk, if already known (skips tokenizing)
+    """
+    tokenize = get_tokenizer()
+    if corpus_tokens is None:
+        corpus_tokens = [tokenize(chunks.text(row)) for row in range(len(chunks))]
+    return BM25Index(corpus_tokens, tokenize)
+
+
+class KeywordRetriever(BaseRetriever):
+    """LangChain retriever over a BM25Index (replaces BM25Retriever)."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    chunks: ChunkStore
+    index: BM25Index
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        hits = self.index.top_k([query], self.k)[0]
+        return self.chunks.documents(row for row, _ in hits)
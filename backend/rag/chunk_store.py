@@ -0,0 +1,169 @@
+"""Columnar storage of corpus chunks.
+
+A list of LangChain Documents costs several hundred bytes of object
+overhead per chunk on top of its text, and every chunk repeats the same
+metadata strings (source, title, attribution, type, headers). ChunkStore
+keeps the corpus in a few flat arrays instead:
+
+- texts: one UTF-8 buffer plus an offsets array
+- metadata: dictionary-encoded columns, one small integer code per row and
+  key, with every distinct value stored once
+- chunk IDs: the 40-hex SHA-1 IDs from chunking.chunk_id as 20 raw bytes,
+  with a sorted 64-bit prefix index for ID -> row lookups
+
+Rows (integer positions) are the chunk references used by the retrieval
+layer; Documents are materialized only when results leave it.
+
+Usage:
+    chunks = ChunkStore.from_documents(documents)
+    row = chunks.row(doc_id)
+    doc = chunks.document(row)
+"""
+
+from typing import Iterable
+
+import numpy as np
+from langchain_core.documents import Document
+
+MISSING = -1
+
+_ID_BYTES = 20
+
+
+def _is_hex_id(chunk_id: str | None) -> bool:
+    if chunk_id is None or len(chunk_id) != 2 * _ID_BYTES:
+        return False
+    try:
+        bytes.fromhex(chunk_id)
+    except ValueError:
+        return False
+    return True
+
+
+class ChunkStore:
+    """Read-only, columnar chunk texts, metadata and IDs.
+
+    Build with from_documents or from_records.
+    """
+
+    def __init__(
+        self,
+        buffer: bytes,
+        offsets: np.ndarray,
+        ids: np.ndarray | list[str],
+        columns: dict[str, tuple[np.ndarray, list]],
+    ):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._columns = columns
+
+        if isinstance(ids, np.ndarray):
+            # Binary SHA-1 IDs: look up by 64-bit prefix, confirm on the full ID
+            self._ids = ids
+            keys = ids[:, :8].copy().view(np.uint64).ravel()
+            self._order = np.argsort(keys, kind="stable")
+            self._sorted_keys = keys[self._order]
+            self._index = None
+        else:
+            # Arbitrary string IDs (e.g. from a vector store that assigned UUIDs)
+            self._ids = ids
+            self._index = {chunk_id: row for row, chunk_id in enumerate(ids)}
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Document]) -> "ChunkStore":
+        ids, texts, metadatas = [], [], []
+        for doc in documents:
+            ids.append(doc.id)
+            texts.append(doc.page_content)
+            metadatas.append(doc.metadata)
+        return cls.from_records(ids, texts, metadatas)
+
+    @classmethod
+    def from_records(cls, ids: list[str], texts: list[str], metadatas: list[dict]) -> "ChunkStore":
+        encoded = [text.encode("utf-8") for text in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+
+        if all(_is_hex_id(chunk_id) for chunk_id in ids):
+            packed = b"".join(bytes.fromhex(chunk_id) for chunk_id in ids)
+            id_array = np.frombuffer(packed, dtype=np.uint8).reshape(len(ids), _ID_BYTES)
+        else:
+            id_array = [str(chunk_id) for chunk_id in ids]
+
+        keys: dict[str, None] = {}
+        for metadata in metadatas:
+            keys.update(dict.fromkeys(metadata))
+        columns = {}
+        for key in keys:
+            vocab: dict = {}
+            codes = [
+                vocab.setdefault(metadata[key], len(vocab)) if key in metadata else MISSING
+                for metadata in metadatas
+            ]
+            dtype = np.int16 if len(vocab) < np.iinfo(np.int16).max else np.int32
+            columns[key] = (np.asarray(codes, dtype=dtype), list(vocab))
+
+        return cls(b"".join(encoded), offsets, id_array, columns)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def chunk_id(self, row: int) -> str:
+        if self._index is None:
+            return self._ids[row].tobytes().hex()
+        return self._ids[row]
+
+    def row(self, chunk_id: str | None) -> int | None:
+        """Row of a chunk ID (None if the ID is not in the store)."""
+        if self._index is not None:
+            return self._index.get(chunk_id)
+        if not _is_hex_id(chunk_id):
+            return None
+        raw = np.frombuffer(bytes.fromhex(chunk_id), dtype=np.uint8)
+        key = raw[:8].copy().view(np.uint64)[0]
+        i = int(np.searchsorted(self._sorted_keys, key))
+        while i < len(self._sorted_keys) and self._sorted_keys[i] == key:
+            row = int(self._order[i])
+            if np.array_equal(self._ids[row], raw):
+                return row
+            i += 1
+        return None
+
+    def text(self, row: int) -> str:
+        return self._buffer[self._offsets[row]:self._offsets[row + 1]].decode("utf-8")
+
+    def value(self, row: int, key: str, default=None):
+        """One metadata value of a row."""
+        column = self._columns.get(key)
+        if column is None or column[0][row] == MISSING:
+            return default
+        return column[1][column[0][row]]
+
+    def metadata(self, row: int) -> dict:
+        return {
+            key: values[codes[row]]
+            for key, (codes, values) in self._columns.items()
+            if codes[row] != MISSING
+        }
+
+    def column(self, key: str) -> tuple[np.ndarray, list]:
+        """Dictionary-encoded metadata column: (code per row, MISSING if absent; values by code)."""
+        if key not in self._columns:
+            return np.full(len(self), MISSING, dtype=np.int16), []
+        return self._columns[key]
+
+    def document(self, row: int) -> Document:
+        return Document(id=self.chunk_id(row), page_content=self.text(row), metadata=self.metadata(row))
+
+    def documents(self, rows: Iterable[int] | None = None) -> list[Document]:
+        """Materialize rows (default: all) as Documents."""
+        rows = range(len(self)) if rows is None else rows
+        return [self.document(row) for row in rows]
+
+    def rows_by_source(self) -> dict[str, list[int]]:
+        """Rows of each source file, in row order."""
+        codes, values = self.column("source")
+        by_source: dict[str, list[int]] = {}
+        for row, code in enumerate(codes.tolist()):
+            by_source.setdefault(values[code] if code != MISSING else "", []).append(row)
+        return by_source
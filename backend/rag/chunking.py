@@ -1,13 +1,64 @@
+"""Markdown chunking of the knowledge base.
+
+Files are split by headers (Department > Section > Entry), then long
+sections are split to the chunk size. iter_chunks streams chunks file by
+file in a deterministic (sorted path) order; for large directories the
+files are fanned out over a process pool with a bounded window of pending
+files, so memory stays flat regardless of corpus size.
+
+Every chunk gets a stable ID derived from its source file, position in the
+file and content, so an unchanged chunk keeps its ID (and its stored
+embedding) across re-chunking.
+"""
+import hashlib
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
+from typing import TYPE_CHECKING, Iterator
+
 from langchain_core.documents import Document
 
+if TYPE_CHECKING:
+    from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
+
 HEADERS_TO_SPLIT = [
     ("#", "Department"),
     ("##", "Section"),
     ("###", "Entry"),
 ]
 
+CHUNK_SIZE = 512
+CHUNK_OVERLAP = 50
+
+# Below this many files the process pool costs more than it saves
+PARALLEL_MIN_FILES = 64
+
+# Files per pool task (amortizes pickling/IPC for small markdown files)
+FILES_PER_TASK = 16
+
+# Tasks in flight per pool worker (bounds memory held by pending results)
+PENDING_TASKS_PER_WORKER = 2
+
+@lru_cache
+def get_splitters() -> tuple["MarkdownHeaderTextSplitter", "RecursiveCharacterTextSplitter"]:
+    """Splitter instances reused for every file (one pair per process)."""
+    from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
+
+    # First pass: split by headers
+    md_splitter = MarkdownHeaderTextSplitter(
+        headers_to_split_on=HEADERS_TO_SPLIT,
+        strip_headers=False
+    )
+    # Second pass: enforce size limits
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
+    )
+    return md_splitter, text_splitter
+
 def chunk_markdown_file(file_path: Path) -> list[Document]:
     """Chunk a markdown file preserving header structure."""
     content = file_path.read_text(encoding="utf-8")
@@ -23,19 +74,9 @@ def chunk_markdown_file(file_path: Path) -> list[Document]:
     # Extract title from filename
     title = file_path.stem.replace("-", " ").title()
 
-    # First pass: split by headers
-    md_splitter = MarkdownHeaderTextSplitter(
-        headers_to_split_on=HEADERS_TO_SPLIT,
-        strip_headers=False
-    )
+    md_splitter, text_splitter = get_splitters()
     header_splits = md_splitter.split_text(content)
 
-    # Second pass: enforce size limits
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=512,
-        chunk_overlap=50
-    )
-
     final_docs = []
     for doc in header_splits:
         # Build attribution from metadata
@@ -47,7 +88,7 @@ def chunk_markdown_file(file_path: Path) -> list[Document]:
         attribution = " > ".join(parts)
 
         # Apply size splitting if needed
-        if len(doc.page_content) > 512:
+        if len(doc.page_content) > CHUNK_SIZE:
             sub_docs = text_splitter.split_documents([doc])
             for i, sub_doc in enumerate(sub_docs):
                 sub_doc.metadata.update({
@@ -67,12 +108,61 @@ def chunk_markdown_file(file_path: Path) -> list[Document]:
             })
             final_docs.append(doc)
 
+    for i, doc in enumerate(final_docs):
+        doc.id = chunk_id(str(file_path), i, doc.page_content)
+
     return final_docs
 
+def chunk_id(source: str, index: int, content: str) -> str:
+    """Stable chunk ID, so re-ingesting unchanged chunks upserts instead of duplicating."""
+    return hashlib.sha1(f"{source}\0{index}\0{content}".encode("utf-8")).hexdigest()
+
+def iter_knowledge_files(knowledge_dir: Path) -> list[Path]:
+    """Markdown files under the knowledge directory, in sorted order."""
+    return sorted(knowledge_dir.rglob("*.md"))
+
+def _chunk_files(paths: list[str]) -> list[Document]:
+    """Process pool entry point (paths cross the process boundary as str)."""
+    return [doc for path in paths for doc in chunk_markdown_file(Path(path))]
+
+def iter_chunks(knowledge_dir: Path, workers: int | None = None) -> Iterator[Document]:
+    """Yield chunks of every knowledge file in deterministic order.
+
+    Args:
+        knowledge_dir: Directory searched recursively for *.md files
+        workers: Pool processes (None = CPU count; <= 1 chunks in-process).
+            Directories with fewer than PARALLEL_MIN_FILES files are always
+            chunked in-process.
+
+    Yields:
+        Chunks file by file in sorted path order, identical to serial chunking
+    """
+    files = iter_knowledge_files(knowledge_dir)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(files) < PARALLEL_MIN_FILES:
+        for path in files:
+            yield from chunk_markdown_file(path)
+        return
+
+    tasks = iter([
+        [str(path) for path in files[start:start + FILES_PER_TASK]]
+        for start in range(0, len(files), FILES_PER_TASK)
+    ])
+
+    # Spawned (not forked) workers: callers may run in a threaded server process
+    context = multiprocessing.get_context("spawn")
+    window = workers * PENDING_TASKS_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        # Results are consumed in submission order; a new task is submitted
+        # only when one is consumed, so at most `window` results are held
+        pending = deque(pool.submit(_chunk_files, task) for _, task in zip(range(window), tasks))
+        while pending:
+            docs = pending.popleft().result()
+            task = next(tasks, None)
+            if task is not None:
+                pending.append(pool.submit(_chunk_files, task))
+            yield from docs
+
 def chunk_all_knowledge(knowledge_dir: Path) -> list[Document]:
     """Chunk all markdown files in knowledge directory."""
-    all_docs = []
-    for md_file in knowledge_dir.rglob("*.md"):
-        docs = chunk_markdown_file(md_file)
-        all_docs.extend(docs)
-    return all_docs
+    return list(iter_chunks(knowledge_dir))
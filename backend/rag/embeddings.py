@@ -1,13 +1,32 @@
 from functools import lru_cache
-from langchain_huggingface import HuggingFaceEmbeddings
+from typing import TYPE_CHECKING
 import sys
 sys.path.insert(0, '..')
 from config import get_settings
 
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
 @lru_cache
-def get_embeddings() -> HuggingFaceEmbeddings:
-    """Get cached HuggingFace embeddings instance."""
+def get_embeddings() -> "Embeddings":
+    """Get cached embeddings instance for the configured backend.
+
+    - "torch": HuggingFace sentence-transformers model on CPU (default)
+    - "onnx": int8-quantized ONNX Runtime export of the same model
+      (see scripts/export_onnx.py)
+
+    Backends are imported here rather than at module import, so importing
+    the app stays fast until the model is needed.
+    """
     settings = get_settings()
+
+    if settings.embedding_backend == "onnx":
+        from .onnx_embeddings import OnnxEmbeddings
+
+        return OnnxEmbeddings(settings.onnx_model_dir, num_threads=settings.onnx_num_threads)
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
     return HuggingFaceEmbeddings(
         model_name=settings.embedding_model,
         model_kwargs={"device": "cpu"},
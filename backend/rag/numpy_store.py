@@ -0,0 +1,524 @@
+"""In-process NumPy vector store (VECTOR_BACKEND=numpy).
+
+For a corpus of a few hundred to tens of thousands of chunks, a Chroma query
+(client call, HNSW search, SQLite metadata fetch) costs more than scoring
+every vector. This store keeps the normalized embeddings as one contiguous
+matrix memory-mapped from disk (float32, float16 or int8), with chunk IDs,
+texts and metadata in parallel arrays:
+
+- exact top-k is one matrix-vector product plus argpartition; float16 and
+  int8 rows are widened to float32 in cache-sized blocks (int8 stores one
+  scale per row, so each row uses the full 8-bit range)
+- metadata filters ({"type": "contact"}, {"type": {"$in": [...]}}) are
+  boolean masks over dictionary-encoded metadata columns; only the rows
+  that pass are scored
+- above vector_ann_threshold chunks, an IVF index (spherical k-means
+  centroids, rows grouped by nearest centroid) limits scoring to the rows
+  of the vector_ann_probes closest centroids
+
+Scores follow Chroma's cosine space (distance = 1 - cosine similarity), so
+callers can switch backends without changing score handling.
+
+Each write stores a new generation of the index in its own directory and
+then points CURRENT at it with an atomic rename, so a reader sees either the
+old or the new generation, never a mix of both. Loads and writes hold an
+exclusive lock on the index directory (fcntl.flock). The lock serializes
+writers across worker processes. A writer re-reads the index first if
+another process published a newer generation, so no update is lost.
+Searches keep using the arrays they started with. The writing process keeps
+the arrays it wrote in memory. Other processes memory-map the generation
+files, which share them through the page cache. Every search, count and ID
+listing first stats CURRENT and reloads the index when it points somewhere
+new, so a process that only reads sees what other workers or
+scripts/ingest.py published.
+
+Files in vector_index_dir:
+    CURRENT           name of the current generation directory
+    .lock             flock target serializing loads and writes
+    gen-*/            one generation:
+        vectors.npy   (chunks, dim) embeddings, rows grouped by IVF list
+        scales.npy    per-row dequantization scales (int8 only)
+        records.json  chunk IDs, texts and metadata in row order
+        ivf.npz       IVF centroids and list offsets (above the threshold only)
+
+An index written before generations were introduced (the files directly in
+vector_index_dir) is still loaded. The next write replaces it.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within the process
+    fcntl = None
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+logger = logging.getLogger(__name__)
+
+DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+INT8_MAX = 127.0
+
+# Rows widened to float32 per block during a full scan (stays in cache)
+BLOCK_ROWS = 1024
+
+# Spherical k-means for the IVF centroids
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLES_PER_LIST = 64
+
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+GENERATION_PREFIX = "gen-"
+
+# Index files directly in vector_index_dir (layout before generations)
+LEGACY_FILES = ("vectors.npy", "scales.npy", "records.json", "ivf.npz")
+
+
+@dataclass
+class _Arrays:
+    """One immutable generation of the index (replaced as a whole on write)."""
+
+    ids: list[str]
+    texts: list[str]
+    metadatas: list[dict]
+    vectors: np.ndarray
+    scales: np.ndarray | None = None
+    centroids: np.ndarray | None = None
+    offsets: np.ndarray | None = None
+    columns: dict[str, tuple[np.ndarray, dict]] = field(default_factory=dict)
+    generation: str | None = None  # Directory the arrays were stored in (None = empty or legacy)
+
+    def column(self, key: str) -> tuple[np.ndarray, dict]:
+        """Dictionary-encoded metadata column: (codes per row, value -> code)."""
+        if key not in self.columns:
+            vocab: dict = {}
+            codes = np.fromiter(
+                (vocab.setdefault(metadata.get(key), len(vocab)) for metadata in self.metadatas),
+                dtype=np.int32,
+                count=len(self.metadatas),
+            )
+            self.columns[key] = (codes, vocab)
+        return self.columns[key]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _widen(arrays: _Arrays, rows) -> np.ndarray:
+    """Stored rows (slice or index array) as float32 unit vectors."""
+    vectors = np.asarray(arrays.vectors[rows], dtype=np.float32)
+    if arrays.scales is not None:
+        vectors = vectors * arrays.scales[rows][:, None]
+    return vectors
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def _kmeans(vectors: np.ndarray, lists: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids over a sample of unit vectors."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), lists * KMEANS_SAMPLES_PER_LIST)
+    sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    centroids = sample[rng.choice(sample_size, lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        filled = np.bincount(assign, minlength=lists) > 0
+        centroids[filled] = _normalize(sums[filled])
+    return centroids
+
+
+class NumpyVectorStore(VectorStore):
+    """Brute-force (or IVF) cosine search over a memory-mapped embedding matrix.
+
+    Args:
+        embedding: Embeddings used for texts and queries
+        index_dir: Directory holding the index files
+        dtype: Storage type of the vectors ("float32", "float16" or "int8")
+        ann_threshold: Build an IVF index from this many chunks on
+        ann_probes: IVF lists scored per query
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        index_dir: Path,
+        dtype: str = "float32",
+        ann_threshold: int = 20000,
+        ann_probes: int = 32,
+    ):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported vector dtype {dtype!r} (expected one of {', '.join(DTYPES)})")
+        self._embedding = embedding
+        self.index_dir = Path(index_dir)
+        self.dtype = dtype
+        self.ann_threshold = ann_threshold
+        self.ann_probes = ann_probes
+        self._write_lock = threading.Lock()
+        self._pointer: tuple[int, int] | None = None  # CURRENT's (inode, mtime) when last read
+        self._arrays = self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def count(self) -> int:
+        """Number of stored chunks."""
+        return len(self._fresh().ids)
+
+    def get_ids(self) -> list[str]:
+        """IDs of all stored chunks."""
+        return list(self._fresh().ids)
+
+    def search_by_vectors(
+        self, embeddings: list[list[float]], k: int, filter: dict | None = None
+    ) -> list[list[tuple[Document, float]]]:
+        """Top-k (document, cosine distance) per query vector, closest first."""
+        arrays = self._fresh()
+        if not embeddings or not arrays.ids:
+            return [[] for _ in embeddings]
+        queries = _normalize(np.asarray(embeddings, dtype=np.float32))
+        allowed = self._mask(arrays, filter) if filter else None
+
+        if arrays.centroids is not None:
+            ranked = [self._search_ivf(arrays, query, k, allowed) for query in queries]
+        else:
+            rows = np.flatnonzero(allowed) if allowed is not None else None
+            scores = self._score_all(arrays, queries) if rows is None else self._score_rows(arrays, queries, rows)
+            ranked = []
+            for row_scores in scores:
+                top = _top_k(row_scores, k)
+                ranked.append((top if rows is None else rows[top], row_scores[top]))
+
+        return [
+            [(self._document(arrays, row), 1.0 - float(score)) for row, score in zip(rows, row_scores)]
+            for rows, row_scores in ranked
+        ]
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self, embedding: list[float], k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        """Docs closest to the vector with cosine distance (lower = more similar, as in Chroma)."""
+        return self.search_by_vectors([embedding], k, filter)[0]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_relevance_scores(
+            self._embedding.embed_query(query), k, filter
+        )
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_relevance_scores(embedding, k, filter)]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _score_all(self, arrays: _Arrays, queries: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every row with every query, shape (queries, rows)."""
+        n = len(arrays.ids)
+        scores = np.empty((len(queries), n), dtype=np.float32)
+        for start in range(0, n, BLOCK_ROWS):
+            rows = slice(start, min(start + BLOCK_ROWS, n))
+            scores[:, rows] = self._score_range(arrays, queries, rows)
+        return scores
+
+    @staticmethod
+    def _score_range(arrays: _Arrays, queries: np.ndarray, rows: slice) -> np.ndarray:
+        """Cosine similarity of a contiguous row range with the query (or queries)."""
+        block = np.asarray(arrays.vectors[rows], dtype=np.float32)  # No copy for float32
+        scores = queries @ block.T
+        if arrays.scales is not None:
+            scores *= arrays.scales[rows]
+        return scores
+
+    def _score_rows(self, arrays: _Arrays, queries: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the given rows with every query, shape (queries, rows)."""
+        scores = queries @ np.asarray(arrays.vectors[rows], dtype=np.float32).T
+        if arrays.scales is not None:
+            scores *= arrays.scales[rows]
+        return scores
+
+    def _search_ivf(
+        self, arrays: _Arrays, query: np.ndarray, k: int, allowed: np.ndarray | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # IVF lists are contiguous row ranges, scored in place without gathering
+        ranges = [
+            slice(arrays.offsets[i], arrays.offsets[i + 1])
+            for i in np.sort(_top_k(arrays.centroids @ query, self.ann_probes))
+        ]
+        rows = np.concatenate([np.arange(r.start, r.stop) for r in ranges])
+        scores = np.concatenate([self._score_range(arrays, query, r) for r in ranges])
+        if allowed is not None:
+            keep = allowed[rows]
+            rows, scores = rows[keep], scores[keep]
+            if len(rows) < k:  # Selective filter: scan every matching row instead
+                rows = np.flatnonzero(allowed)
+                scores = self._score_rows(arrays, query[None, :], rows)[0]
+        top = _top_k(scores, k)
+        return rows[top], scores[top]
+
+    @staticmethod
+    def _mask(arrays: _Arrays, filter: dict) -> np.ndarray:
+        """Boolean row mask for an equality / $in metadata filter."""
+        mask = np.ones(len(arrays.ids), dtype=bool)
+        for key, condition in filter.items():
+            if isinstance(condition, dict):
+                if set(condition) - {"$eq", "$in"}:
+                    raise ValueError(f"Unsupported filter operator in {condition!r} (use $eq or $in)")
+                values = condition.get("$in", []) + ([condition["$eq"]] if "$eq" in condition else [])
+            else:
+                values = [condition]
+            codes, vocab = arrays.column(key)
+            mask &= np.isin(codes, [vocab[value] for value in values if value in vocab])
+        return mask
+
+    @staticmethod
+    def _document(arrays: _Arrays, row: int) -> Document:
+        return Document(id=arrays.ids[row], page_content=arrays.texts[row], metadata=dict(arrays.metadatas[row]))
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        """Embed and store texts; existing IDs are replaced (upsert)."""
+        texts = list(texts)
+        if not texts:
+            return []
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        vectors = _normalize(np.asarray(self._embedding.embed_documents(texts), dtype=np.float32))
+
+        with self._index_lock():
+            arrays = self._latest()
+            replaced = set(ids)
+            keep = [row for row, chunk_id in enumerate(arrays.ids) if chunk_id not in replaced]
+            self._write(
+                ids=[arrays.ids[row] for row in keep] + ids,
+                texts=[arrays.texts[row] for row in keep] + texts,
+                metadatas=[arrays.metadatas[row] for row in keep] + list(metadatas),
+                vectors=np.vstack([_widen(arrays, keep), vectors]) if keep else vectors,
+            )
+        return ids
+
+    def delete(self, ids: list[str] | None = None, **kwargs: Any) -> None:
+        """Remove chunks by ID (unknown IDs are ignored)."""
+        if not ids:
+            return
+        with self._index_lock():
+            arrays = self._latest()
+            removed = set(ids)
+            keep = [row for row, chunk_id in enumerate(arrays.ids) if chunk_id not in removed]
+            if len(keep) == len(arrays.ids):
+                return
+            self._write(
+                ids=[arrays.ids[row] for row in keep],
+                texts=[arrays.texts[row] for row in keep],
+                metadatas=[arrays.metadatas[row] for row in keep],
+                vectors=_widen(arrays, keep),
+            )
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+        index_dir: Path = Path("./vector_index"),
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding, index_dir, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    @contextmanager
+    def _index_lock(self) -> Iterator[None]:
+        """Exclusive lock on the index directory, held across every process using it."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        with self._write_lock, open(self.index_dir / LOCK_FILE, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)  # Released when f is closed
+            yield
+
+    def _current_generation(self) -> str | None:
+        try:
+            return (self.index_dir / CURRENT_FILE).read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _pointer_state(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.index_dir / CURRENT_FILE)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _fresh(self) -> _Arrays:
+        """The arrays to read from, reloaded if another process published a generation.
+
+        One stat of CURRENT per call; the atomic rename gives every new
+        pointer a new inode.
+        """
+        if self._pointer_state() != self._pointer:
+            with self._index_lock():
+                self._latest()
+        return self._arrays
+
+    def _latest(self) -> _Arrays:
+        """The stored index, re-read if another process wrote since this one loaded it.
+
+        Must be called with the index lock held.
+        """
+        if self._current_generation() != self._arrays.generation:
+            logger.info("Vector index changed on disk, reloading it")
+            self._arrays = self._read()
+        self._pointer = self._pointer_state()
+        return self._arrays
+
+    def _write(self, ids: list[str], texts: list[str], metadatas: list[dict], vectors: np.ndarray) -> None:
+        """Store a new generation of the index and swap it in.
+
+        Must be called with the index lock held.
+        """
+        if not ids:
+            self._publish(None)
+            self._pointer = None
+            self._arrays = _Arrays(ids=[], texts=[], metadatas=[], vectors=np.zeros((0, 0), dtype=DTYPES[self.dtype]))
+            return
+
+        centroids = offsets = None
+        if len(ids) >= self.ann_threshold:
+            lists = max(1, int(np.sqrt(len(ids))))
+            centroids = _kmeans(vectors, lists)
+            assign = np.concatenate([
+                np.argmax(vectors[start:start + BLOCK_ROWS] @ centroids.T, axis=1)
+                for start in range(0, len(vectors), BLOCK_ROWS)
+            ])
+            order = np.argsort(assign, kind="stable")
+            ids = [ids[row] for row in order]
+            texts = [texts[row] for row in order]
+            metadatas = [metadatas[row] for row in order]
+            vectors = vectors[order]
+            offsets = np.searchsorted(assign[order], np.arange(lists + 1))
+
+        scales = None
+        if self.dtype == "int8":
+            scales = (np.maximum(np.abs(vectors).max(axis=1), 1e-12) / INT8_MAX).astype(np.float32)
+            stored = np.rint(vectors / scales[:, None]).astype(np.int8)
+        else:
+            stored = vectors.astype(DTYPES[self.dtype])
+
+        generation = f"{GENERATION_PREFIX}{uuid.uuid4().hex[:16]}"
+        directory = self.index_dir / generation
+        directory.mkdir(parents=True)
+        np.save(directory / "vectors.npy", stored)
+        (directory / "records.json").write_text(
+            json.dumps({"ids": ids, "texts": texts, "metadatas": metadatas}, ensure_ascii=False), encoding="utf-8"
+        )
+        if scales is not None:
+            np.save(directory / "scales.npy", scales)
+        if centroids is not None:
+            np.savez(directory / "ivf.npz", centroids=centroids, offsets=offsets)
+        self._publish(generation)
+        self._pointer = self._pointer_state()
+
+        self._arrays = _Arrays(
+            ids=ids,
+            texts=texts,
+            metadatas=metadatas,
+            vectors=stored,
+            scales=scales,
+            centroids=centroids,
+            offsets=offsets,
+            generation=generation,
+        )
+
+    def _publish(self, generation: str | None) -> None:
+        """Point CURRENT at a generation (None = empty index) and delete the others.
+
+        Loads hold the index lock, so no process is reading a deleted
+        generation; memory maps of its files stay valid after the unlink.
+        """
+        current = self.index_dir / CURRENT_FILE
+        if generation is None:
+            current.unlink(missing_ok=True)
+        else:
+            tmp = self.index_dir / f"{CURRENT_FILE}.{os.getpid()}.tmp"
+            tmp.write_text(generation, encoding="utf-8")
+            os.replace(tmp, current)
+        for path in self.index_dir.glob(f"{GENERATION_PREFIX}*"):
+            if path.name != generation:
+                shutil.rmtree(path, ignore_errors=True)
+        for name in LEGACY_FILES:
+            (self.index_dir / name).unlink(missing_ok=True)
+
+    def _read(self) -> _Arrays:
+        """Open the current generation (or a legacy index) from disk."""
+        self._pointer = self._pointer_state()
+        generation = self._current_generation()
+        directory = self.index_dir / generation if generation else self.index_dir
+        vectors_path = directory / "vectors.npy"
+        records_path = directory / "records.json"
+        if not (vectors_path.exists() and records_path.exists()):
+            return _Arrays(ids=[], texts=[], metadatas=[], vectors=np.zeros((0, 0), dtype=DTYPES[self.dtype]))
+
+        records = json.loads(records_path.read_text(encoding="utf-8"))
+        arrays = _Arrays(
+            ids=records["ids"],
+            texts=records["texts"],
+            metadatas=records["metadatas"],
+            vectors=np.load(vectors_path, mmap_mode="r"),
+            generation=generation,
+        )
+        scales_path = directory / "scales.npy"
+        if scales_path.exists():
+            arrays.scales = np.load(scales_path)
+        ivf_path = directory / "ivf.npz"
+        if ivf_path.exists():
+            with np.load(ivf_path) as ivf:
+                arrays.centroids, arrays.offsets = ivf["centroids"], ivf["offsets"]
+        return arrays
+
+    def _load(self) -> _Arrays:
+        """Open the stored index, converting it if dtype or ANN settings changed."""
+        with self._index_lock():
+            arrays = self._read()
+            if not arrays.ids:
+                return arrays
+            wants_ivf = len(arrays.ids) >= self.ann_threshold
+            if arrays.vectors.dtype != DTYPES[self.dtype] or wants_ivf != (arrays.centroids is not None):
+                logger.info(f"Converting vector index to dtype={self.dtype}, ivf={wants_ivf}")
+                self._write(arrays.ids, arrays.texts, arrays.metadatas, _widen(arrays, slice(None)))
+                return self._arrays
+            return arrays
@@ -0,0 +1,92 @@
+"""ONNX Runtime embedding backend for CPU query encoding.
+
+Runs an int8-quantized ONNX export of the sentence-transformers model
+(produced by scripts/export_onnx.py) instead of PyTorch. Pooling matches
+sentence-transformers for mpnet: mean over non-padding tokens followed by
+L2 normalization, so vectors stay compatible with the existing index within
+a small tolerance (verified by the export script).
+
+Model directory layout:
+    model_quantized.onnx   int8 dynamic-quantized transformer
+    tokenizer.json         HuggingFace fast tokenizer
+    onnx_config.json       {"max_seq_length": 384, ...}
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+ONNX_MODEL_FILE = "model_quantized.onnx"
+ONNX_CONFIG_FILE = "onnx_config.json"
+TOKENIZER_FILE = "tokenizer.json"
+
+# Texts per forward pass when embedding many documents
+ONNX_BATCH_SIZE = 32
+
+
+def default_num_threads() -> int:
+    """Intra-op threads for single-query latency: more than 4 rarely helps a base-size model."""
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+class OnnxEmbeddings(Embeddings):
+    """LangChain Embeddings backed by an ONNX Runtime session.
+
+    Args:
+        model_dir: Directory produced by scripts/export_onnx.py
+        num_threads: Intra-op threads (0 = default_num_threads())
+    """
+
+    def __init__(self, model_dir: str, num_threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = Path(model_dir)
+        config = json.loads((model_path / ONNX_CONFIG_FILE).read_text(encoding="utf-8"))
+
+        self.tokenizer = Tokenizer.from_file(str(model_path / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=config["max_seq_length"])
+        pad_token = config.get("pad_token", "<pad>")
+        self.tokenizer.enable_padding(
+            pad_id=self.tokenizer.token_to_id(pad_token) or 0, pad_token=pad_token
+        )
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or default_num_threads()
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(model_path / ONNX_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self._input_names})[0]
+
+        # Mean pooling over real tokens, then L2 normalization
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts in batches of ONNX_BATCH_SIZE."""
+        vectors = []
+        for start in range(0, len(texts), ONNX_BATCH_SIZE):
+            vectors.extend(self._embed_batch(texts[start:start + ONNX_BATCH_SIZE]).tolist())
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed_batch([text])[0].tolist()
@@ -1,34 +1,97 @@
-from functools import lru_cache
-from langchain_classic.retrievers.ensemble import EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
+"""Hybrid (BM25 + semantic) retrieval over a versioned index snapshot.
+
+The retrieval index (corpus chunks, BM25 index, hybrid retriever) is held in
+an immutable IndexSnapshot. Publishing a new snapshot is a single reference
+swap, and retrieval reads the current snapshot once per request, so a
+request that started before a hot swap (see rag/watcher.py) finishes on the
+index it started with. The vector store is shared between snapshots: vector
+hits are mapped to rows of the snapshot, and hits outside it are dropped.
+
+Chunks are held in a columnar ChunkStore (rag/chunk_store.py). Keyword and
+semantic retrieval, rank fusion and deduplication work on (row, score)
+pairs; Documents are materialized (to_documents) only where results leave
+the retrieval layer.
+"""
+import asyncio
+import dataclasses
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 from langchain_core.documents import Document
-from nltk.tokenize import word_tokenize
-import nltk
 import sys
 sys.path.insert(0, '..')
 from config import get_settings
-from .vectorstore import get_vectorstore
+from runtime import get_metrics, span
+from runtime.profiling import traced
+from .vectorstore import get_vectorstore, search_vectors
 
-# Ensure NLTK data is available
-try:
-    nltk.data.find('tokenizers/punkt_tab')
-except LookupError:
-    nltk.download('punkt_tab', quiet=True)
+if TYPE_CHECKING:
+    from langchain_classic.retrievers.ensemble import EnsembleRetriever
 
-_hybrid_retriever = None
-_documents_cache = None
+    from .bm25 import BM25Index
+    from .chunk_store import ChunkStore
 
-def init_hybrid_retriever(documents: list[Document]) -> EnsembleRetriever:
-    """Initialize hybrid retriever with BM25 + semantic search."""
-    global _hybrid_retriever, _documents_cache
-    settings = get_settings()
+ScoredRows = list[tuple[int, float]]
 
-    # BM25 retriever for keyword search
-    bm25_retriever = BM25Retriever.from_documents(
-        documents,
-        k=settings.retrieval_k,
-        preprocess_func=word_tokenize
-    )
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """An immutable, versioned view of the retrieval index.
+
+    Attributes:
+        version: Increases with every published snapshot (0 = preloaded,
+            not yet connected to the vector store)
+        chunks: Corpus chunks in sorted-source order
+        bm25: BM25 keyword index over the chunks' rows
+        hybrid_retriever: BM25 + semantic ensemble (None when preloaded)
+        build_seconds: Time it took to build (or rebuild) this snapshot
+        built_at: Unix time the snapshot was built
+    """
+
+    version: int
+    chunks: "ChunkStore"
+    bm25: "BM25Index"
+    hybrid_retriever: "EnsembleRetriever | None" = None
+    build_seconds: float = 0.0
+    built_at: float = field(default_factory=time.time)
+
+    def select(self, results: list[tuple[Document, float]], k: int) -> ScoredRows:
+        """Rows of the first k vector hits that belong to this snapshot."""
+        selected = []
+        for doc, score in results:
+            row = self.chunks.row(doc.id)
+            if row is not None:
+                selected.append((row, score))
+        return selected[:k]
+
+    def status(self) -> dict:
+        return {
+            "version": self.version,
+            "chunks": len(self.chunks),
+            "build_seconds": round(self.build_seconds, 3),
+            "built_at": self.built_at,
+        }
+
+
+_snapshot: IndexSnapshot | None = None
+
+# Vector-store chunks that are not part of every live snapshot (chunks added
+# for a rebuild, or removed but still inside the swap grace period); vector
+# searches fetch this many extra hits so filtering still leaves k
+_vector_overfetch = 0
+# Adjusted from the watcher's worker threads and from the event loop
+_vector_overfetch_lock = threading.Lock()
+
+def build_hybrid_retriever(chunks: "ChunkStore", bm25: "BM25Index") -> "EnsembleRetriever":
+    """Combine a BM25 index with semantic search over the vector store."""
+    # Deferred imports: pull in the langchain retriever stack
+    from langchain_classic.retrievers.ensemble import EnsembleRetriever
+
+    from .bm25 import KeywordRetriever
+
+    settings = get_settings()
 
     # Semantic retriever from vector store
     vectorstore = get_vectorstore()
@@ -38,54 +101,230 @@ def init_hybrid_retriever(documents: list[Document]) -> EnsembleRetriever:
     )
 
     # Ensemble with weights [BM25, semantic] = [0.2, 0.8]
-    _hybrid_retriever = EnsembleRetriever(
-        retrievers=[bm25_retriever, semantic_retriever],
+    return EnsembleRetriever(
+        retrievers=[KeywordRetriever(chunks=chunks, index=bm25, k=settings.retrieval_k), semantic_retriever],
         weights=[settings.bm25_weight, settings.semantic_weight]
     )
 
-    _documents_cache = documents
-    return _hybrid_retriever
+def build_snapshot(
+    chunks: "ChunkStore",
+    version: int,
+    corpus_tokens: list[list[str]] | None = None,
+    hybrid: bool = True,
+) -> IndexSnapshot:
+    """Build every index structure for a corpus into a new snapshot.
+
+    Args:
+        chunks: Corpus chunks (with stable IDs)
+        version: Version of the new snapshot
+        corpus_tokens: BM25 tokens of each chunk, if already known
+        hybrid: Also build the hybrid retriever (needs the vector store)
+    """
+    from .bm25 import build_bm25_index  # Deferred: numpy and the langchain retriever base
+
+    started = time.perf_counter()
+    bm25 = build_bm25_index(chunks, corpus_tokens)
+    return IndexSnapshot(
+        version=version,
+        chunks=chunks,
+        bm25=bm25,
+        hybrid_retriever=build_hybrid_retriever(chunks, bm25) if hybrid else None,
+        build_seconds=time.perf_counter() - started,
+    )
+
+def publish_snapshot(snapshot: IndexSnapshot) -> None:
+    """Make a snapshot current.
+
+    A single reference assignment: readers see either the old or the new
+    snapshot, never a mix of both.
+    """
+    global _snapshot
+    _snapshot = snapshot
+    metrics = get_metrics()
+    metrics.set_gauge("index.version", snapshot.version)
+    metrics.set_gauge("index.chunks", len(snapshot.chunks))
+
+def get_index_snapshot() -> IndexSnapshot | None:
+    """Get the current index snapshot (None before init)."""
+    return _snapshot
+
+def adjust_vector_overfetch(delta: int) -> None:
+    """Account for chunks entering or leaving the vector store outside a snapshot swap."""
+    global _vector_overfetch
+    with _vector_overfetch_lock:
+        _vector_overfetch = max(0, _vector_overfetch + delta)
+
+def vector_fetch_k(k: int) -> int:
+    """Vector hits to fetch so that k remain after filtering to one snapshot."""
+    return k + _vector_overfetch
+
+def index_status() -> dict | None:
+    """Current snapshot version, size and build time (for /metrics)."""
+    if _snapshot is None:
+        return None
+    return {**_snapshot.status(), "vector_overfetch": _vector_overfetch}
+
+def init_keyword_index(chunks: "ChunkStore") -> "BM25Index":
+    """Build the BM25 index over the corpus as a preloaded (version 0) snapshot.
+
+    Kept separate from the hybrid retriever so a preloading parent process
+    can build it once and share it with forked workers (see runtime/preload.py).
+    """
+    publish_snapshot(build_snapshot(chunks, version=0, hybrid=False))
+    return _snapshot.bm25
 
-def get_hybrid_retriever() -> EnsembleRetriever | None:
+def get_cached_chunks() -> "ChunkStore | None":
+    """Get the corpus the retrievers were built from (None before init)."""
+    return _snapshot.chunks if _snapshot is not None else None
+
+def init_hybrid_retriever(chunks: "ChunkStore") -> "EnsembleRetriever":
+    """Initialize hybrid retriever with BM25 + semantic search.
+
+    Reuses a BM25 index already built for the same chunks (preload mode).
+    """
+    current = _snapshot
+    if current is not None and current.chunks is chunks:
+        started = time.perf_counter()
+        snapshot = dataclasses.replace(
+            current,
+            version=current.version + 1,
+            hybrid_retriever=build_hybrid_retriever(current.chunks, current.bm25),
+            build_seconds=current.build_seconds + time.perf_counter() - started,
+        )
+    else:
+        snapshot = build_snapshot(chunks, version=current.version + 1 if current else 1)
+    publish_snapshot(snapshot)
+    return snapshot.hybrid_retriever
+
+def get_hybrid_retriever() -> "EnsembleRetriever | None":
     """Get hybrid retriever instance (must be initialized first)."""
-    return _hybrid_retriever
+    return _snapshot.hybrid_retriever if _snapshot is not None else None
+
+def retrieve_rows(query: str, k: int = 10, snapshot: IndexSnapshot | None = None) -> ScoredRows:
+    """Semantic retrieval as (row, relevance) pairs of a snapshot.
 
-def retrieve_with_scores(query: str, k: int = 10) -> list[tuple[Document, float]]:
-    """Retrieve documents with relevance scores."""
-    if _hybrid_retriever is None:
+    Args:
+        query: Search query
+        k: Number of results
+        snapshot: Index snapshot to search (default: the current one)
+    """
+    snapshot = snapshot or _snapshot
+    if snapshot is None or snapshot.hybrid_retriever is None:
         return []
 
     # EnsembleRetriever doesn't return scores directly
     # Use vector store for scored results
     vectorstore = get_vectorstore()
-    results = vectorstore.similarity_search_with_score(query, k=k)
+    results = vectorstore.similarity_search_with_score(query, k=vector_fetch_k(k))
+
+    return _to_relevance(snapshot.select(results, k))
+
+async def aretrieve_rows(query: str, k: int = 10, snapshot: IndexSnapshot | None = None) -> ScoredRows:
+    """Async retrieve_rows: the query vector comes from the embedding batcher,
+    so concurrent queries share one forward pass."""
+    from .batching import get_embedding_batcher
+
+    snapshot = snapshot or _snapshot
+    if snapshot is None or snapshot.hybrid_retriever is None:
+        return []
+
+    with span("embedding", queries=1):
+        query_vector = await get_embedding_batcher().embed(query)
+    vectorstore = get_vectorstore()
+    results = await asyncio.to_thread(
+        traced("vector.search", vectorstore.similarity_search_by_vector_with_relevance_scores),
+        query_vector,
+        k=vector_fetch_k(k),
+    )
+    return _to_relevance(snapshot.select(results, k))
+
+async def aretrieve_rows_batch(
+    queries: list[str], k: int = 10, snapshot: IndexSnapshot | None = None
+) -> list[ScoredRows]:
+    """aretrieve_rows for several queries at once (e.g. the tool calls of one agent turn).
+
+    The queries join the embedding batcher together, so they share one
+    forward pass, and are searched with a single multi-query vector call.
 
-    # Convert distance to similarity (lower distance = higher similarity)
+    Returns:
+        (row, relevance) pairs per query, in input order
+    """
+    from .batching import get_embedding_batcher
+
+    snapshot = snapshot or _snapshot
+    if snapshot is None or snapshot.hybrid_retriever is None or not queries:
+        return [[] for _ in queries]
+
+    batcher = get_embedding_batcher()
+    with span("embedding", queries=len(queries)):
+        query_vectors = await asyncio.gather(*(batcher.embed(query) for query in queries))
+    results = await asyncio.to_thread(traced("vector.search", search_vectors), list(query_vectors), vector_fetch_k(k))
+    return [_to_relevance(snapshot.select(hits, k)) for hits in results]
+
+def retrieve_with_scores(
+    query: str, k: int = 10, snapshot: IndexSnapshot | None = None
+) -> list[tuple[Document, float]]:
+    """Retrieve documents with relevance scores (retrieve_rows, materialized)."""
+    snapshot = snapshot or _snapshot
+    rows = retrieve_rows(query, k, snapshot)
+    return to_documents(snapshot.chunks, rows) if rows else []
+
+async def aretrieve_with_scores(
+    query: str, k: int = 10, snapshot: IndexSnapshot | None = None
+) -> list[tuple[Document, float]]:
+    """Async retrieve_with_scores."""
+    snapshot = snapshot or _snapshot
+    rows = await aretrieve_rows(query, k, snapshot)
+    return to_documents(snapshot.chunks, rows) if rows else []
+
+def to_documents(chunks: "ChunkStore", results: ScoredRows) -> list[tuple[Document, float]]:
+    """Materialize (row, score) pairs as (Document, score) pairs."""
+    return [(chunks.document(row), score) for row, score in results]
+
+def _to_relevance(results: ScoredRows) -> ScoredRows:
+    """Convert Chroma cosine distances to similarity (lower distance = higher similarity)."""
     scored_results = []
-    for doc, distance in results:
+    for row, distance in results:
         relevance = max(0, 1 - distance)  # Clamp to [0, 1]
-        scored_results.append((doc, relevance))
+        scored_results.append((row, relevance))
 
     return scored_results
 
+def fuse_rankings(
+    row_lists: list[list[int]],
+    weights: list[float],
+    c: int = 60,
+) -> ScoredRows:
+    """Weighted reciprocal rank fusion, as done by the EnsembleRetriever.
+
+    A row found by several retrievers accumulates weight / (rank + c) from
+    each list.
+
+    Returns:
+        (row, fused score) sorted by descending score
+    """
+    scores: dict[int, float] = {}
+    for row_list, weight in zip(row_lists, weights):
+        for rank, row in enumerate(row_list, start=1):
+            scores[row] = scores.get(row, 0.0) + weight / (rank + c)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
 def deduplicate_results(
-    results: list[tuple[Document, float]],
+    chunks: "ChunkStore",
+    results: ScoredRows,
     similarity_threshold: float = 0.95
-) -> list[tuple[Document, float]]:
+) -> ScoredRows:
     """Remove near-duplicate chunks from same source."""
-    from collections import defaultdict
-
+    source_codes, _ = chunks.column("source")
     seen_sources = defaultdict(list)
     unique_results = []
 
-    for doc, score in results:
-        source = doc.metadata.get("source", "")
-        content = doc.page_content
-        content_words = set(content.lower().split())
+    for row, score in results:
+        source = source_codes[row]
+        content_words = set(chunks.text(row).lower().split())
 
         is_duplicate = False
-        for seen_content in seen_sources[source]:
-            seen_words = set(seen_content.lower().split())
+        for seen_words in seen_sources[source]:
             if len(content_words) == 0:
                 continue
             overlap = len(content_words & seen_words) / len(content_words)
@@ -94,7 +333,7 @@ def deduplicate_results(
                 break
 
         if not is_duplicate:
-            seen_sources[source].append(content)
-            unique_results.append((doc, score))
+            seen_sources[source].append(content_words)
+            unique_results.append((row, score))
 
     return unique_results
@@ -1,5 +1,5 @@
 from pathlib import Path
-from langchain_chroma import Chroma
+from typing import TYPE_CHECKING
 from langchain_core.documents import Document
 import sys
 
@@ -7,31 +7,138 @@ sys.path.insert(0, "..")
 from config import get_settings
 from .embeddings import get_embeddings
 
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
+    from .chunk_store import ChunkStore
+
+    from .numpy_store import NumpyVectorStore
+
 _vectorstore = None
 
 
-def init_vectorstore(documents: list[Document] | None = None) -> Chroma:
-    """Initialize ChromaDB vector store, optionally with documents."""
+def init_vectorstore(documents: list[Document] | None = None) -> "Chroma | NumpyVectorStore":
+    """Initialize the vector store, optionally with documents.
+
+    VECTOR_BACKEND=numpy selects the in-process NumPy index (rag/numpy_store.py).
+    Otherwise ChromaDB is used, with an embedded persistent client by default.
+    With CHROMA_SERVER_HOST set, connects to a Chroma server instead, so
+    several worker processes share one index (multi-worker mode, see
+    gunicorn.conf.py).
+    """
     global _vectorstore
     settings = get_settings()
 
-    persist_dir = Path(settings.chroma_persist_dir)
-    persist_dir.mkdir(parents=True, exist_ok=True)
+    if settings.vector_backend == "numpy":
+        from .numpy_store import NumpyVectorStore  # Deferred: pulls in numpy
 
-    _vectorstore = Chroma(
-        collection_name=settings.collection_name,
-        embedding_function=get_embeddings(),
-        persist_directory=str(persist_dir),
-        collection_metadata={"hnsw:space": "cosine"},
-    )
+        _vectorstore = NumpyVectorStore(
+            get_embeddings(),
+            Path(settings.vector_index_dir),
+            dtype=settings.vector_index_dtype,
+            ann_threshold=settings.vector_ann_threshold,
+            ann_probes=settings.vector_ann_probes,
+        )
+    elif settings.chroma_server_host:
+        import chromadb
+        from langchain_chroma import Chroma  # Deferred: chromadb is slow to import
+
+        client = chromadb.HttpClient(
+            host=settings.chroma_server_host, port=settings.chroma_server_port
+        )
+        _vectorstore = Chroma(
+            collection_name=settings.collection_name,
+            embedding_function=get_embeddings(),
+            client=client,
+            collection_metadata={"hnsw:space": "cosine"},
+        )
+    else:
+        from langchain_chroma import Chroma
+
+        persist_dir = Path(settings.chroma_persist_dir)
+        persist_dir.mkdir(parents=True, exist_ok=True)
+
+        _vectorstore = Chroma(
+            collection_name=settings.collection_name,
+            embedding_function=get_embeddings(),
+            persist_directory=str(persist_dir),
+            collection_metadata={"hnsw:space": "cosine"},
+        )
 
     if documents:
-        _vectorstore.add_documents(documents)
+        _vectorstore.add_documents(documents, ids=[doc.id for doc in documents])
 
     return _vectorstore
 
 
-def get_vectorstore() -> Chroma:
+def sync_vectorstore(chunks: "ChunkStore") -> tuple[int, int]:
+    """Make the vector store hold exactly the given chunks.
+
+    Chunk IDs are stable (see rag/chunking.py), so only chunks missing from
+    the store are embedded, and stored chunks that are no longer part of the
+    corpus are deleted. Workers that sync a shared index concurrently write
+    the same IDs, so the writes are idempotent.
+
+    Returns:
+        (chunks added, chunks deleted)
+    """
+    vectorstore = get_vectorstore()
+    stored = set(stored_ids())
+    corpus_ids = [chunks.chunk_id(row) for row in range(len(chunks))]
+    missing = [row for row, chunk_id in enumerate(corpus_ids) if chunk_id not in stored]
+    stale = stored.difference(corpus_ids)
+
+    if missing:
+        vectorstore.add_documents(chunks.documents(missing), ids=[corpus_ids[row] for row in missing])
+    if stale:
+        vectorstore.delete(ids=list(stale))
+    return len(missing), len(stale)
+
+
+def _is_numpy_store(vectorstore) -> bool:
+    # numpy_store is only imported once a NumPy backend has been created
+    numpy_store = sys.modules.get(f"{__package__}.numpy_store")
+    return numpy_store is not None and isinstance(vectorstore, numpy_store.NumpyVectorStore)
+
+
+def count_vectors() -> int:
+    """Number of chunks in the vector store."""
+    vectorstore = get_vectorstore()
+    if _is_numpy_store(vectorstore):
+        return vectorstore.count()
+    return vectorstore._collection.count()
+
+
+def stored_ids() -> list[str]:
+    """IDs of all chunks in the vector store."""
+    vectorstore = get_vectorstore()
+    if _is_numpy_store(vectorstore):
+        return vectorstore.get_ids()
+    return vectorstore._collection.get(include=[])["ids"]
+
+
+def search_vectors(embeddings: list[list[float]], k: int) -> list[list[tuple[Document, float]]]:
+    """Nearest chunks for several query vectors in one call, as (document, cosine distance), closest first."""
+    vectorstore = get_vectorstore()
+    if _is_numpy_store(vectorstore):
+        return vectorstore.search_by_vectors(embeddings, k)
+    found = vectorstore._collection.query(
+        query_embeddings=embeddings,
+        n_results=k,
+        include=["documents", "metadatas", "distances"],
+    )
+    return [
+        [
+            (Document(id=chunk_id, page_content=text, metadata=metadata or {}), distance)
+            for chunk_id, text, metadata, distance in zip(ids, texts, metadatas, distances)
+        ]
+        for ids, texts, metadatas, distances in zip(
+            found["ids"], found["documents"], found["metadatas"], found["distances"]
+        )
+    ]
+
+
+def get_vectorstore() -> "Chroma | NumpyVectorStore":
     """Get or create vector store instance."""
     global _vectorstore
     if _vectorstore is None:
@@ -0,0 +1,302 @@
+"""Knowledge-directory watcher with incremental, hot-swapped index rebuilds.
+
+The knowledge directory is polled (stat only: mtime and size of every
+*.md file) every knowledge_watch_interval_seconds. When files were added,
+modified or removed, the index is rebuilt on a worker thread:
+
+- only added/modified files are re-chunked; chunks of unchanged files and
+  their BM25 tokens are taken from the current snapshot's chunk store and
+  BM25 index
+- only chunks whose stable ID is new are embedded into the vector store
+- the BM25 index and its vectorized scorer are rebuilt from the cached
+  token counts (IDF is corpus-wide, so every term weight may change, but
+  nothing is re-tokenized)
+
+The result is published as a new IndexSnapshot with one reference swap.
+Requests already running keep the snapshot they started with: their vector
+hits are mapped to that snapshot's rows, and chunks that left the
+corpus are deleted from the vector store only after
+index_swap_grace_seconds.
+
+Under gunicorn every worker runs a watcher, because each worker holds its
+own snapshot (chunk store and BM25 index) and has to rebuild it. The vector
+store is shared, though, so only one process writes to it: the watcher
+holding an exclusive flock on knowledge_watch_lock_path embeds added chunks
+and deletes removed ones. The other workers only re-chunk and swap their
+snapshot. Until the writer has embedded new chunks, their vector hits are
+missing there (keyword search finds them right away). A watcher that does
+not hold the lock retries before every rebuild, so a replacement worker
+takes over when the writer exits.
+
+Metrics:
+    index.version           current snapshot version (gauge)
+    index.chunks            chunks in the current snapshot (gauge)
+    index.rebuild_seconds   duration of each rebuild, from scan to swap
+    index.chunks_added      chunks embedded by rebuilds
+    index.chunks_removed    chunks dropped by rebuilds
+    index.rebuild_errors    failed rebuilds (the previous snapshot stays live)
+"""
+
+import asyncio
+import dataclasses
+import logging
+import time
+from pathlib import Path
+from typing import IO
+
+try:
+    import fcntl
+except ImportError:  # Windows: every watcher writes to the vector store
+    fcntl = None
+
+from config import get_settings
+from runtime import get_metrics
+from .chunking import chunk_markdown_file, iter_knowledge_files
+from .retriever import (
+    IndexSnapshot,
+    adjust_vector_overfetch,
+    build_snapshot,
+    get_index_snapshot,
+    publish_snapshot,
+)
+from .vectorstore import get_vectorstore
+
+logger = logging.getLogger(__name__)
+
+Fingerprints = dict[str, tuple[int, int]]
+
+
+def scan_knowledge_dir(knowledge_dir: Path) -> Fingerprints:
+    """(mtime_ns, size) of every knowledge file, keyed by chunk source path."""
+    fingerprints = {}
+    for path in iter_knowledge_files(knowledge_dir):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:  # Deleted while scanning
+            continue
+        fingerprints[str(path)] = (stat.st_mtime_ns, stat.st_size)
+    return fingerprints
+
+
+def rebuild_index(
+    sources: list[str],
+    changed: set[str],
+    write_vectors: bool = True,
+) -> tuple[IndexSnapshot, int, list[str]] | None:
+    """Build and publish the next snapshot for the given knowledge files.
+
+    Args:
+        sources: Paths of all knowledge files now present
+        changed: Paths among them that were added or modified
+        write_vectors: Embed the added chunks into the vector store (False
+            when another process writes them)
+
+    Returns:
+        The published snapshot, the number of chunks added and the IDs of
+        chunks it no longer contains (still in the vector store), or None if
+        the corpus is now empty
+    """
+    from .chunk_store import ChunkStore  # Deferred: numpy
+
+    started = time.perf_counter()
+    current = get_index_snapshot()
+    previous = current.chunks.rows_by_source()
+    preprocess = current.bm25.preprocess
+
+    ids: list[str] = []
+    texts: list[str] = []
+    metadatas: list[dict] = []
+    corpus_tokens: list[list[str]] = []
+    added = []
+    for source in sorted(sources):
+        if source in changed or source not in previous:
+            for doc in chunk_markdown_file(Path(source)):
+                ids.append(doc.id)
+                texts.append(doc.page_content)
+                metadatas.append(doc.metadata)
+                corpus_tokens.append(preprocess(doc.page_content))
+                if current.chunks.row(doc.id) is None:
+                    added.append(doc)
+        else:
+            for row in previous[source]:
+                ids.append(current.chunks.chunk_id(row))
+                texts.append(current.chunks.text(row))
+                metadatas.append(current.chunks.metadata(row))
+                corpus_tokens.append(current.bm25.doc_tokens(row))
+
+    if not ids:
+        logger.warning("Knowledge directory is empty, keeping the current index")
+        return None
+
+    kept = set(ids)
+    stale = [
+        chunk_id for chunk_id in map(current.chunks.chunk_id, range(len(current.chunks)))
+        if chunk_id not in kept
+    ]
+
+    # Until the stale chunks are deleted, vector searches on either snapshot
+    # see chunks of the other one
+    adjust_vector_overfetch(len(added) + len(stale))
+    try:
+        if added and write_vectors:
+            get_vectorstore().add_documents(added, ids=[doc.id for doc in added])
+        chunks = ChunkStore.from_records(ids, texts, metadatas)
+        snapshot = build_snapshot(chunks, version=current.version + 1, corpus_tokens=corpus_tokens)
+    except BaseException:
+        adjust_vector_overfetch(-(len(added) + len(stale)))
+        raise
+
+    snapshot = dataclasses.replace(snapshot, build_seconds=time.perf_counter() - started)
+    publish_snapshot(snapshot)
+
+    metrics = get_metrics()
+    metrics.observe("index.rebuild_seconds", snapshot.build_seconds)
+    metrics.incr("index.chunks_added", len(added))
+    metrics.incr("index.chunks_removed", len(stale))
+    logger.info(
+        f"Index v{snapshot.version}: {len(changed)} changed file(s), "
+        f"{len(added)} chunks added, {len(stale)} removed in {snapshot.build_seconds:.2f}s"
+    )
+    return snapshot, len(added), stale
+
+
+def _try_lock(lock_file: IO) -> bool:
+    """Take the exclusive flock without waiting (True if this process holds it)."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+class KnowledgeWatcher:
+    """Polls the knowledge directory and hot-swaps a rebuilt index on change.
+
+    Args:
+        knowledge_dir: Directory the corpus was chunked from
+        interval_seconds: Time between scans
+        grace_seconds: Delay before removed chunks are deleted from the vector store
+        lock_path: Lock file electing the one watcher that writes to the
+            shared vector store (None = this watcher always writes)
+    """
+
+    def __init__(
+        self,
+        knowledge_dir: Path,
+        interval_seconds: float,
+        grace_seconds: float,
+        lock_path: Path | None = None,
+    ):
+        self.knowledge_dir = knowledge_dir
+        self.interval_seconds = interval_seconds
+        self.grace_seconds = grace_seconds
+        self.lock_path = lock_path
+        self.writes_vectors = lock_path is None
+        self._lock_file: IO | None = None
+        self._fingerprints: Fingerprints = {}
+        self._task: asyncio.Task | None = None
+        self._deletes: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        """Record the current file state and start polling."""
+        self._fingerprints = scan_knowledge_dir(self.knowledge_dir)
+        if self.lock_path is not None:
+            self._lock_file = open(self.lock_path, "a")
+            self._claim_vector_writes()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop polling; pending deletions of removed chunks are abandoned."""
+        tasks = [task for task in (self._task, *self._deletes) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._lock_file is not None:
+            self._lock_file.close()  # Releases the flock for another worker
+            self._lock_file = None
+            self.writes_vectors = False
+
+    def _claim_vector_writes(self) -> None:
+        if not self.writes_vectors and self._lock_file is not None:
+            self.writes_vectors = _try_lock(self._lock_file)
+            if self.writes_vectors:
+                logger.info(f"Knowledge watcher writes the vector store (lock {self.lock_path})")
+
+    async def check(self) -> IndexSnapshot | None:
+        """Scan once and rebuild if anything changed.
+
+        Returns:
+            The new snapshot, or None if nothing changed
+        """
+        snapshot = get_index_snapshot()
+        if snapshot is None or snapshot.hybrid_retriever is None:
+            return None  # Still warming up
+
+        fingerprints = await asyncio.to_thread(scan_knowledge_dir, self.knowledge_dir)
+        changed = {
+            source for source, fingerprint in fingerprints.items()
+            if self._fingerprints.get(source) != fingerprint
+        }
+        if not changed and fingerprints.keys() == self._fingerprints.keys():
+            return None
+
+        self._claim_vector_writes()
+        result = await asyncio.to_thread(rebuild_index, list(fingerprints), changed, self.writes_vectors)
+        self._fingerprints = fingerprints
+        if result is None:
+            return None
+
+        snapshot, added, stale = result
+        self._schedule_delete(stale, overfetch=added + len(stale))
+        return snapshot
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.check()
+            except Exception as e:
+                get_metrics().incr("index.rebuild_errors")
+                logger.error(f"Knowledge index rebuild failed: {e}", exc_info=True)
+
+    def _schedule_delete(self, stale: list[str], overfetch: int) -> None:
+        """Delete removed chunks once requests on older snapshots have finished."""
+
+        async def delete_later():
+            await asyncio.sleep(self.grace_seconds)
+            try:
+                if stale and self.writes_vectors:
+                    await asyncio.to_thread(get_vectorstore().delete, ids=stale)
+            finally:
+                adjust_vector_overfetch(-overfetch)
+
+        task = asyncio.create_task(delete_later())
+        self._deletes.add(task)
+        task.add_done_callback(self._deletes.discard)
+
+
+_watcher: KnowledgeWatcher | None = None
+
+
+def start_knowledge_watcher(knowledge_dir: Path) -> KnowledgeWatcher:
+    """Start polling the knowledge directory (call from the running event loop)."""
+    global _watcher
+    settings = get_settings()
+    _watcher = KnowledgeWatcher(
+        knowledge_dir,
+        interval_seconds=settings.knowledge_watch_interval_seconds,
+        grace_seconds=settings.index_swap_grace_seconds,
+        lock_path=Path(settings.knowledge_watch_lock_path),
+    )
+    _watcher.start()
+    return _watcher
+
+
+async def stop_knowledge_watcher() -> None:
+    """Stop the knowledge watcher if it was started."""
+    global _watcher
+    if _watcher is not None:
+        await _watcher.stop()
+        _watcher = None
@@ -0,0 +1,28 @@
+"""Serving runtime utilities shared across the API, agent and RAG layers."""
+from runtime.metrics import get_metrics, MetricsRegistry
+from runtime.admission import get_admission_controller, AdmissionController, AdmissionRejected
+from runtime.warmup import get_warmup, Warmup, WarmupFailed
+from runtime.deadline import Deadline, DeadlineExceeded, get_deadline
+from runtime.profiling import RequestProfile, bind_profile, get_profile, get_profile_store, span
+from runtime.preload import preload, limit_worker_threads
+
+__all__ = [
+    "get_metrics",
+    "MetricsRegistry",
+    "get_admission_controller",
+    "AdmissionController",
+    "AdmissionRejected",
+    "get_warmup",
+    "Warmup",
+    "WarmupFailed",
+    "Deadline",
+    "DeadlineExceeded",
+    "get_deadline",
+    "RequestProfile",
+    "bind_profile",
+    "get_profile",
+    "get_profile_store",
+    "span",
+    "preload",
+    "limit_worker_threads",
+]
@@ -0,0 +1,206 @@
+"""Admission control and backpressure for expensive endpoints.
+
+Each lane bounds the number of in-flight requests and keeps a bounded FIFO
+wait queue with a deadline. Requests that find the queue full, or that wait
+past the deadline, are shed early with AdmissionRejected (mapped to HTTP 429
+with Retry-After) instead of all running requests slowing down together.
+
+Lanes:
+- "chat": streaming agent runs (/api/chat), slot held for the whole stream
+- "retrieve": cheap retrieval calls; with priority lanes enabled they have
+  their own capacity and never queue behind long agent runs
+
+Queue length, in-flight count, shed counts and queue wait are exported via
+the metrics registry under admission.<lane>.*
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from config import get_settings
+from runtime.metrics import get_metrics
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed by admission control."""
+
+    def __init__(self, lane: str, reason: str, retry_after: int):
+        super().__init__(f"{lane} lane overloaded ({reason})")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """An admitted request's slot. release() is idempotent."""
+
+    def __init__(self, lane: "Lane"):
+        self._lane = lane
+        self._admitted_at = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._lane.release(time.monotonic() - self._admitted_at)
+
+
+class Lane:
+    """Bounded concurrency with a bounded, deadline-limited wait queue.
+
+    Args:
+        name: Lane name (used in metrics)
+        max_in_flight: Concurrently admitted requests
+        max_queue: Requests allowed to wait for a slot
+        queue_timeout: Max seconds a request waits before being shed
+    """
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        # EWMA of slot hold time, used to estimate Retry-After
+        self._avg_hold_seconds = 1.0
+
+    @property
+    def queue_length(self) -> int:
+        return len(self._waiters)
+
+    def _publish(self) -> None:
+        metrics = get_metrics()
+        metrics.set_gauge(f"admission.{self.name}.in_flight", self.in_flight)
+        metrics.set_gauge(f"admission.{self.name}.queue_length", self.queue_length)
+
+    def _retry_after(self) -> int:
+        backlog = self.queue_length + 1
+        return max(1, math.ceil(self._avg_hold_seconds * backlog / self.max_in_flight))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        get_metrics().incr(f"admission.{self.name}.shed")
+        get_metrics().incr(f"admission.{self.name}.shed.{reason}")
+        return AdmissionRejected(self.name, reason, self._retry_after())
+
+    async def acquire(self) -> Ticket:
+        """Admit the request or raise AdmissionRejected."""
+        metrics = get_metrics()
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            metrics.incr(f"admission.{self.name}.admitted")
+            metrics.observe(f"admission.{self.name}.queue_wait_seconds", 0.0)
+            self._publish()
+            return Ticket(self)
+
+        if self.queue_length >= self.max_queue:
+            raise self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        wait_start = time.monotonic()
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Caller went away while queued; hand back a slot we may have been given
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)
+            else:
+                waiter.cancel()
+                self._discard(waiter)
+            raise
+
+        if not waiter.done():
+            waiter.cancel()
+            self._discard(waiter)
+            raise self._reject("timeout")
+
+        # Slot was transferred to us by release(); in_flight already counts it
+        metrics.incr(f"admission.{self.name}.admitted")
+        metrics.observe(f"admission.{self.name}.queue_wait_seconds", time.monotonic() - wait_start)
+        return Ticket(self)
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        self._publish()
+
+    def release(self, held_seconds: float) -> None:
+        """Free a slot, handing it directly to the oldest live waiter."""
+        if held_seconds > 0:
+            self._avg_hold_seconds = 0.8 * self._avg_hold_seconds + 0.2 * held_seconds
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._publish()
+                return
+        self.in_flight -= 1
+        self._publish()
+
+
+class AdmissionController:
+    """Routes requests to admission lanes."""
+
+    def __init__(self, lanes: dict[str, Lane], aliases: dict[str, str] | None = None):
+        self._lanes = lanes
+        self._aliases = aliases or {}
+
+    def lane(self, name: str) -> Lane:
+        return self._lanes[self._aliases.get(name, name)]
+
+    async def acquire(self, lane: str) -> Ticket:
+        """Admit a request to a lane; the caller must release the ticket."""
+        return await self.lane(lane).acquire()
+
+    @asynccontextmanager
+    async def admit(self, lane: str):
+        """Hold a lane slot for the duration of the block."""
+        ticket = await self.acquire(lane)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "in_flight": lane.in_flight,
+                "queue_length": lane.queue_length,
+                "max_in_flight": lane.max_in_flight,
+                "max_queue": lane.max_queue,
+            }
+            for name, lane in self._lanes.items()
+        }
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide admission controller built from settings."""
+    settings = get_settings()
+    lanes = {
+        "chat": Lane(
+            "chat",
+            settings.chat_max_in_flight,
+            settings.chat_max_queue,
+            settings.chat_queue_timeout_seconds,
+        ),
+    }
+    aliases = {}
+    if settings.admission_priority_lanes:
+        lanes["retrieve"] = Lane(
+            "retrieve",
+            settings.retrieve_max_in_flight,
+            settings.retrieve_max_queue,
+            settings.retrieve_queue_timeout_seconds,
+        )
+    else:
+        aliases["retrieve"] = "chat"
+    return AdmissionController(lanes, aliases)
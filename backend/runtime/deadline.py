@@ -0,0 +1,82 @@
+"""Per-request deadlines propagated through the agent run.
+
+A chat request gets one Deadline when it is accepted. It travels in the
+LangGraph run config (configurable["deadline"]) to every node and tool, and
+each stage runs with what is left of it instead of its own fixed timeout:
+
+- an LLM call gets the remaining time
+- a tool call gets min(its own timeout, remaining time minus the answer
+  reserve), so a slow tool cannot use up the time the final answer needs
+- once less than the answer reserve is left, the agent is called without
+  tools and told to answer with what it has gathered
+
+When a stage is cut short by the deadline, deadline.exceeded.<stage> is
+counted.
+
+Metrics:
+    deadline.exceeded.llm      LLM calls cut off by the deadline
+    deadline.exceeded.tools    tool calls cut off by the deadline
+    deadline.exceeded.agent    agent steps not started because time was up
+    deadline.forced_answers    agent calls forced to answer without tools
+    deadline.remaining_seconds time left when a chat request finished
+
+Usage:
+    deadline = Deadline(settings.request_deadline_seconds)
+    config = {"configurable": {"deadline": deadline}}
+    ...
+    deadline = get_deadline(config)
+    timeout = deadline.budget(TOOL_TIMEOUT_SECONDS, reserve=settings.deadline_answer_reserve_seconds)
+"""
+
+import time
+from typing import Any, Mapping
+
+from runtime.metrics import get_metrics
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage cannot run (or finish) before the request deadline.
+
+    Args:
+        stage: Stage that ran out of time ("llm", "tools", "agent")
+    """
+
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded during {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """A point in (monotonic) time by which a request must be answered.
+
+    Args:
+        seconds: Time budget from now
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left (negative once expired)."""
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def budget(self, cap: float | None = None, reserve: float = 0.0) -> float:
+        """Time a stage may take: the remaining time minus a reserve, at most cap (never negative)."""
+        available = max(0.0, self.remaining() - reserve)
+        return available if cap is None else min(cap, available)
+
+    def record_exceeded(self, stage: str) -> None:
+        """Count a stage that was cut short by this deadline."""
+        get_metrics().incr(f"deadline.exceeded.{stage}")
+
+
+def get_deadline(config: Mapping[str, Any] | None) -> Deadline | None:
+    """The request deadline carried in a LangGraph/LangChain run config, if any."""
+    if not config:
+        return None
+    return (config.get("configurable") or {}).get("deadline")
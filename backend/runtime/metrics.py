@@ -0,0 +1,105 @@
+"""In-process metrics registry.
+
+Counters, gauges and summaries for the serving path, exposed as JSON via
+GET /metrics. Summaries keep count/sum/max plus a bounded window of recent
+observations for percentiles, so memory stays constant under load.
+
+Usage:
+    from runtime import get_metrics
+
+    get_metrics().incr("chat.requests")
+    get_metrics().observe("mistral.queue_wait_seconds", waited)
+"""
+
+import threading
+from collections import deque
+
+# Recent observations kept per summary for percentile estimates
+SUMMARY_WINDOW = 1024
+
+
+class Summary:
+    """Running summary of observed values."""
+
+    def __init__(self, window: int = SUMMARY_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self._recent.append(value)
+
+    def snapshot(self) -> dict:
+        recent = sorted(self._recent)
+
+        def percentile(p: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(p * len(recent)))]
+
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "p50": round(percentile(0.50), 6),
+            "p95": round(percentile(0.95), 6),
+            "p99": round(percentile(0.99), 6),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of named counters, gauges and summaries."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, float] = {}
+        self._summaries: dict[str, Summary] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to its current value."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record an observation in a summary."""
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                summary = self._summaries[name] = Summary()
+            summary.observe(value)
+
+    def mean(self, name: str) -> float:
+        """Get the mean of a summary (0.0 if nothing was observed)."""
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None or not summary.count:
+                return 0.0
+            return summary.total / summary.count
+
+    def snapshot(self) -> dict:
+        """Get a JSON-serializable snapshot of all metrics."""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {name: s.snapshot() for name, s in self._summaries.items()},
+            }
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return _metrics
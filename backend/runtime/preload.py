@@ -0,0 +1,76 @@
+"""Preloading of read-only serving state before forking workers.
+
+In multi-worker mode (gunicorn.conf.py) the master process loads the
+embedding model weights, chunks the corpus and builds the BM25 index once,
+then forks workers that share those pages copy-on-write instead of each
+holding a private copy.
+
+Only state that is safe to inherit across fork() is built here:
+- no inference runs in the parent, so no BLAS/OpenMP thread pools exist
+  when workers fork (they would hang in the child)
+- no Chroma client, HTTP client or event loop is created; each worker opens
+  its own connection to the shared Chroma server during warm-up
+- ONNX Runtime sessions own thread pools that do not survive fork(), so
+  with EMBEDDING_BACKEND=onnx each worker loads its own (small, int8) model
+
+gc.freeze() moves everything loaded so far into the permanent generation,
+so the garbage collector in the workers does not touch (and thereby copy)
+the shared objects.
+"""
+
+import gc
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_DIR = Path(__file__).parent.parent / "knowledge"
+
+
+def preload() -> dict:
+    """Load the embedding model, corpus and BM25 indexes in the current process.
+
+    Returns:
+        Timing and size information for the startup log
+    """
+    from config import get_settings
+    from rag.chunk_store import ChunkStore
+    from rag.chunking import chunk_all_knowledge
+    from rag.embeddings import get_embeddings
+    from rag.retriever import init_keyword_index
+
+    started = time.perf_counter()
+    if get_settings().embedding_backend == "torch":
+        get_embeddings()
+    model_seconds = time.perf_counter() - started
+
+    chunks = ChunkStore.from_documents([])
+    if KNOWLEDGE_DIR.exists() and any(KNOWLEDGE_DIR.rglob("*.md")):
+        chunks = ChunkStore.from_documents(chunk_all_knowledge(KNOWLEDGE_DIR))
+        init_keyword_index(chunks)
+
+    gc.collect()
+    gc.freeze()
+    return {
+        "model_seconds": round(model_seconds, 2),
+        "total_seconds": round(time.perf_counter() - started, 2),
+        "chunks": len(chunks),
+        "frozen_objects": gc.get_freeze_count(),
+    }
+
+
+def limit_worker_threads(workers: int) -> int:
+    """Split CPU cores between workers so intra-op thread pools don't oversubscribe.
+
+    Called in each worker after fork. Only affects torch if it was preloaded.
+
+    Returns:
+        Threads per worker
+    """
+    threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    return threads
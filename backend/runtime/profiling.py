@@ -0,0 +1,214 @@
+"""Opt-in span timeline of a single chat or retrieval request.
+
+A request to /api/chat or /api/retrieve carrying X-Profile-Token equal to
+settings.profiling_token (profiling is off while it is empty) gets a
+RequestProfile bound to a context variable. Instrumented stages record
+spans on it:
+
+    graph.create     building the request-scoped agent graph
+    history.compact  compacting the conversation history
+    prompt.render    assembling the prompt messages
+    llm.call         one Mistral call, streamed (per agent step)
+    tools.run        one agent turn's tool calls
+    embedding        waiting for the query embedding(s)
+    vector.search    Chroma / NumPy vector query
+    bm25             BM25 scoring
+    fusion           reciprocal rank fusion
+    dedup            near-duplicate removal
+    context.pack     packing a tool observation
+    sse.encode       SSE framing of text deltas (totals only)
+
+asyncio tasks and asyncio.to_thread calls copy the context, so spans opened
+in graph nodes, tools and worker threads land on the request that caused
+them. Spans are wall-clock intervals from the request start; concurrent
+stages show up as overlapping spans. Requests without a profile pay one
+context-variable lookup per span, and other requests are not affected.
+
+A process-wide profiler (cProfile, a stack sampler) cannot be scoped to one
+request on a shared event loop - it would record, and slow down, every
+concurrent request - so the span timeline is the per-request profile.
+
+Finished profiles are kept in memory (the last PROFILE_HISTORY) and can be
+downloaded from GET /api/profiles/{profile_id} with the same token. The chat
+stream also ends with a data-profile part.
+
+Metrics:
+    profiling.requests   profiled requests
+
+Usage:
+    profile = RequestProfile("chat")
+    with bind_profile(profile):
+        with span("bm25"):
+            ...
+    get_profile_store().add(profile)
+"""
+
+import hmac
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+from typing import Callable, Iterator
+
+from runtime.metrics import get_metrics
+
+# Finished profiles kept for download
+PROFILE_HISTORY = 32
+
+# Timeline entries kept per request (totals are always complete)
+MAX_SPANS = 1000
+
+_current_profile: ContextVar["RequestProfile | None"] = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """Span timeline and per-stage totals of one request.
+
+    Args:
+        kind: Profiled endpoint ("chat", "retrieve")
+    """
+
+    def __init__(self, kind: str):
+        self.profile_id = f"prof-{uuid.uuid4().hex[:12]}"
+        self.kind = kind
+        self.started_at = time.time()
+        self.duration: float | None = None
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._spans: list[dict] = []
+        self._marks: list[dict] = []
+        self._totals: dict[str, list] = {}
+        self._dropped = 0
+
+    def _offset_ms(self, at: float) -> float:
+        return round((at - self._origin) * 1000, 3)
+
+    def add_span(self, name: str, started: float, ended: float, timeline: bool = True, **attrs) -> None:
+        """Record a finished span (perf_counter start/end)."""
+        with self._lock:
+            total = self._totals.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += ended - started
+            if not timeline:
+                return
+            if len(self._spans) >= MAX_SPANS:
+                self._dropped += 1
+                return
+            self._spans.append({
+                "name": name,
+                "start_ms": self._offset_ms(started),
+                "duration_ms": round((ended - started) * 1000, 3),
+                "thread": threading.current_thread().name,
+                **attrs,
+            })
+
+    def mark(self, name: str, **attrs) -> None:
+        """Record an instant event (e.g. the first streamed token)."""
+        with self._lock:
+            self._marks.append({"name": name, "at_ms": self._offset_ms(time.perf_counter()), **attrs})
+
+    def finish(self) -> "RequestProfile":
+        """Stop the request clock (idempotent)."""
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._origin
+            get_metrics().incr("profiling.requests")
+        return self
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "profile_id": self.profile_id,
+                "kind": self.kind,
+                "started_at": self.started_at,
+                "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+                "spans": sorted(self._spans, key=lambda s: s["start_ms"]),
+                "marks": list(self._marks),
+                "totals": {
+                    name: {"count": count, "total_ms": round(seconds * 1000, 3)}
+                    for name, (count, seconds) in sorted(self._totals.items(), key=lambda item: -item[1][1])
+                },
+                "dropped_spans": self._dropped,
+            }
+
+
+class ProfileStore:
+    """The most recent finished profiles, by ID."""
+
+    def __init__(self, capacity: int = PROFILE_HISTORY):
+        self.capacity = capacity
+        self._profiles: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> dict:
+        """Finish and keep a profile (re-adding replaces it); returns its dict."""
+        data = profile.finish().to_dict()
+        with self._lock:
+            self._profiles[profile.profile_id] = data
+            while len(self._profiles) > self.capacity:
+                self._profiles.popitem(last=False)
+        return data
+
+    def get(self, profile_id: str) -> dict | None:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+@lru_cache
+def get_profile_store() -> ProfileStore:
+    return ProfileStore()
+
+
+def check_profiling_token(provided: str | None, expected: str) -> bool:
+    """Whether a request may be profiled (constant-time token comparison)."""
+    return bool(expected) and provided is not None and hmac.compare_digest(provided.encode(), expected.encode())
+
+
+def get_profile() -> RequestProfile | None:
+    """The profile of the current request, if it is being profiled."""
+    return _current_profile.get()
+
+
+@contextmanager
+def bind_profile(profile: RequestProfile | None) -> Iterator[RequestProfile | None]:
+    """Make profile the current request's profile for the enclosed code."""
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        try:
+            _current_profile.reset(token)
+        except ValueError:
+            # A streaming body finalized outside the task that ran it
+            pass
+
+
+@contextmanager
+def span(name: str, timeline: bool = True, **attrs) -> Iterator[None]:
+    """Time the enclosed code as a span of the current request's profile.
+
+    Args:
+        name: Stage name
+        timeline: False records the stage in the totals only (per-token stages)
+        **attrs: Extra JSON-serializable fields for the timeline entry
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_span(name, started, time.perf_counter(), timeline, **attrs)
+
+
+def traced(name: str, func: Callable) -> Callable:
+    """Wrap func to run inside a span (e.g. for asyncio.to_thread)."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,167 @@
+"""Background warm-up of slow subsystems.
+
+Startup work (loading the embedding model, opening Chroma, chunking the
+corpus, building BM25, compiling a test agent graph) runs as a dependency
+graph of steps in worker threads, so independent steps overlap and the
+server starts answering /health immediately. Request handlers that need a
+subsystem await its step via wait_for() instead of failing while it warms up.
+
+Usage:
+    warmup = get_warmup()
+    warmup.add("embeddings", get_embeddings)
+    warmup.add("vectorstore", open_store, depends_on=["embeddings"])
+    warmup.start()
+
+    await warmup.wait_for("vectorstore", timeout=30)
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+
+
+class WarmupFailed(Exception):
+    """Raised when waiting on a step that failed or did not finish in time."""
+
+
+class WarmupStep:
+    """A named warm-up step and its state."""
+
+    def __init__(self, name: str, func: Callable[[], Any], depends_on: list[str], required: bool):
+        self.name = name
+        self.func = func
+        self.depends_on = depends_on
+        self.required = required
+        self.state = PENDING
+        self.result: Any = None
+        self.error: str | None = None
+        self.started_at: float | None = None
+        self.duration: float | None = None
+        self.task: asyncio.Task | None = None
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "required": self.required,
+            "duration_seconds": round(self.duration, 3) if self.duration is not None else None,
+            "error": self.error,
+        }
+
+
+class Warmup:
+    """Dependency-ordered background warm-up of named steps."""
+
+    def __init__(self):
+        self._steps: dict[str, WarmupStep] = {}
+        self._started_at: float | None = None
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        depends_on: list[str] | None = None,
+        required: bool = True,
+    ) -> None:
+        """Register a step. func runs in a worker thread once its dependencies are ready.
+
+        Args:
+            name: Step name (used by wait_for and /ready)
+            func: Blocking callable; its return value is kept as the step result
+            depends_on: Steps that must finish successfully first
+            required: Whether the service is not ready until this step succeeds
+        """
+        self._steps[name] = WarmupStep(name, func, list(depends_on or []), required)
+
+    def start(self) -> None:
+        """Schedule all registered steps on the running event loop."""
+        self._started_at = time.perf_counter()
+        for step in self._steps.values():
+            step.task = asyncio.create_task(self._run(step), name=f"warmup:{step.name}")
+
+    async def _run(self, step: WarmupStep) -> None:
+        for dependency in step.depends_on:
+            dep = self._steps[dependency]
+            await asyncio.shield(dep.task)
+            if dep.state != READY:
+                step.state = FAILED
+                step.error = f"dependency {dependency} failed"
+                return
+
+        step.state = RUNNING
+        step.started_at = time.perf_counter()
+        try:
+            step.result = await asyncio.to_thread(step.func)
+            step.state = READY
+        except Exception as e:
+            step.state = FAILED
+            step.error = str(e)
+            log = logger.error if step.required else logger.warning
+            log(f"Warm-up step {step.name} failed: {e}", exc_info=step.required)
+        finally:
+            step.duration = time.perf_counter() - step.started_at
+        if step.state == READY:
+            logger.info(f"Warm-up step {step.name} ready in {step.duration:.2f}s")
+
+    def result(self, name: str) -> Any:
+        """Get a finished step's result."""
+        return self._steps[name].result
+
+    def is_ready(self, name: str | None = None) -> bool:
+        """Whether one step (or every required step) finished successfully."""
+        if name is not None:
+            return name in self._steps and self._steps[name].state == READY
+        return all(s.state == READY for s in self._steps.values() if s.required)
+
+    async def wait_for(self, name: str, timeout: float | None = None) -> Any:
+        """Wait for a step to finish and return its result.
+
+        Raises:
+            WarmupFailed: If the step failed, is unknown or did not finish in time
+        """
+        step = self._steps.get(name)
+        if step is None or step.task is None:
+            raise WarmupFailed(f"{name} is not being warmed up")
+        if not step.task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(step.task), timeout)
+            except asyncio.TimeoutError:
+                raise WarmupFailed(f"{name} is still warming up")
+        if step.state != READY:
+            raise WarmupFailed(f"{name} failed to initialize: {step.error}")
+        return step.result
+
+    async def stop(self) -> None:
+        """Cancel steps still waiting on dependencies (running threads finish on their own)."""
+        for step in self._steps.values():
+            if step.task is not None and not step.task.done():
+                step.task.cancel()
+
+    def status(self) -> dict:
+        """Per-step warm-up state and timing."""
+        finished = [s.started_at + s.duration for s in self._steps.values() if s.duration is not None]
+        elapsed = None
+        if self._started_at is not None and finished and all(
+            s.state in (READY, FAILED) for s in self._steps.values()
+        ):
+            elapsed = round(max(finished) - self._started_at, 3)
+        return {
+            "ready": self.is_ready(),
+            "warmup_seconds": elapsed,
+            "steps": {name: step.status() for name, step in self._steps.items()},
+        }
+
+
+_warmup = Warmup()
+
+
+def get_warmup() -> Warmup:
+    """Get the process-wide warm-up coordinator."""
+    return _warmup
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""Corpus memory benchmark: bytes per chunk of Documents + BM25Retriever vs ChunkStore + BM25Index.
+
+Builds a synthetic corpus by copying the knowledge directory --copies times
+into a temporary directory and chunking it, then measures (with tracemalloc,
+in a fresh interpreter per layout) the memory each retrieval-index layout
+holds after construction:
+
+- documents: a list of LangChain Documents, a BM25Retriever (rank_bm25
+  BM25Okapi with one term-count dict per chunk) and per-term BM25 posting
+  arrays (the previous vectorized scorer)
+- columnar: a ChunkStore (one text buffer, dictionary-encoded metadata,
+  binary chunk IDs) and a BM25Index (CSR term counts and postings)
+
+Both layouts start from the same decoded JSON records, so text, metadata and
+ID strings are counted in full for each. "text" is the UTF-8 size of the
+chunk texts alone, for reference.
+
+Usage:
+    python scripts/bench_chunk_store.py --copies 10 100
+"""
+import argparse
+import gc
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+LAYOUTS = ["documents", "columnar"]
+
+
+def legacy_postings(bm25) -> dict:
+    """Per-term (chunk indices, BM25 weights) arrays over a BM25Okapi index."""
+    import numpy as np
+
+    doc_len = np.asarray(bm25.doc_len, dtype=np.float32)
+    norm = bm25.k1 * (1 - bm25.b + bm25.b * doc_len / bm25.avgdl)
+    term_docs: dict[str, list[int]] = {}
+    term_freqs: dict[str, list[int]] = {}
+    for doc_index, freqs in enumerate(bm25.doc_freqs):
+        for term, freq in freqs.items():
+            term_docs.setdefault(term, []).append(doc_index)
+            term_freqs.setdefault(term, []).append(freq)
+    postings = {}
+    for term, docs in term_docs.items():
+        doc_indices = np.asarray(docs, dtype=np.int32)
+        tf = np.asarray(term_freqs[term], dtype=np.float32)
+        weights = bm25.idf.get(term, 0.0) * tf * (bm25.k1 + 1) / (tf + norm[doc_indices])
+        postings[term] = (doc_indices, weights.astype(np.float32))
+    return postings
+
+
+def measure(corpus: Path, layout: str) -> dict:
+    """Build one layout over the corpus in this process (child mode)."""
+    import time
+    import tracemalloc
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag.bm25 import build_bm25_index, get_tokenizer
+    from rag.chunk_store import ChunkStore
+    from rag.chunking import chunk_all_knowledge
+
+    documents = chunk_all_knowledge(corpus)
+    blob = json.dumps([[doc.id, doc.page_content, doc.metadata] for doc in documents])
+    text_bytes = sum(len(doc.page_content.encode("utf-8")) for doc in documents)
+    del documents
+    tokenize = get_tokenizer()
+    tokenize("warm up")
+    gc.collect()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    records = json.loads(blob)
+    if layout == "documents":
+        from langchain_community.retrievers import BM25Retriever
+        from langchain_core.documents import Document
+
+        corpus_store = [Document(id=chunk_id, page_content=text, metadata=metadata) for chunk_id, text, metadata in records]
+        del records
+        gc.collect()
+        corpus_bytes = tracemalloc.get_traced_memory()[0]
+        retriever = BM25Retriever.from_documents(corpus_store, preprocess_func=tokenize)
+        index = (retriever, legacy_postings(retriever.vectorizer))
+    else:
+        ids, texts, metadatas = (list(column) for column in zip(*records))
+        del records
+        corpus_store = ChunkStore.from_records(ids, texts, metadatas)
+        del ids, texts, metadatas
+        gc.collect()
+        corpus_bytes = tracemalloc.get_traced_memory()[0]
+        index = build_bm25_index(corpus_store)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    total_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    chunks = len(corpus_store)
+    return {
+        "chunks": chunks,
+        "text": text_bytes / chunks,
+        "corpus": corpus_bytes / chunks,
+        "index": (total_bytes - corpus_bytes) / chunks,
+        "total": total_bytes / chunks,
+        "seconds": round(elapsed, 2),
+    }
+
+
+def build_corpus(target: Path, copies: int) -> None:
+    """Replicate the knowledge directory `copies` times under target."""
+    source = BACKEND_DIR / "knowledge"
+    for i in range(copies):
+        shutil.copytree(source, target / f"copy-{i:05d}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, nargs="+", default=[10, 100], help="Copies of the knowledge directory")
+    parser.add_argument("--child", nargs=2, metavar=("CORPUS", "LAYOUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(Path(args.child[0]), args.child[1])))
+        return 0
+
+    print(f"{'chunks':>7}  {'layout':<10}{'text B':>8}{'corpus B':>10}{'index B':>9}{'total B':>9}{'build s':>9}")
+    for copies in args.copies:
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus = Path(tmp)
+            build_corpus(corpus, copies)
+            for layout in LAYOUTS:
+                command = [sys.executable, __file__, "--child", str(corpus), layout]
+                result = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+                stats = json.loads(result.stdout.strip().splitlines()[-1])
+                print(
+                    f"{stats['chunks']:>7}  {layout:<10}{stats['text']:>8.0f}{stats['corpus']:>10.0f}"
+                    f"{stats['index']:>9.0f}{stats['total']:>9.0f}{stats['seconds']:>9.2f}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
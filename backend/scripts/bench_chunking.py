@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Chunking throughput benchmark: files/sec and peak memory, serial vs process pool.
+
+Builds a synthetic corpus by copying the knowledge directory --copies times
+into a temporary directory, then streams it through rag.chunking.iter_chunks
+with each worker count. Every run happens in a fresh interpreter so peak RSS
+reflects that run only. Chunks are counted, not kept, as a downstream
+embedding stage consuming the generator would do; --collect keeps them in a
+list instead (the old chunk_all_knowledge behaviour) for comparison.
+
+Usage:
+    python scripts/bench_chunking.py --copies 200 --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def run_chunking(corpus: Path, workers: int, collect: bool) -> dict:
+    """Chunk the corpus in this process (child mode)."""
+    import resource
+    import time
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag.chunking import iter_chunks, iter_knowledge_files
+
+    files = len(iter_knowledge_files(corpus))
+    started = time.perf_counter()
+    if collect:
+        chunks = len(list(iter_chunks(corpus, workers=workers)))
+    else:
+        chunks = sum(1 for _ in iter_chunks(corpus, workers=workers))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "files": files,
+        "chunks": chunks,
+        "seconds": round(elapsed, 2),
+        "files_per_second": round(files / elapsed, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def build_corpus(target: Path, copies: int) -> None:
+    """Replicate the knowledge directory `copies` times under target."""
+    source = BACKEND_DIR / "knowledge"
+    for i in range(copies):
+        shutil.copytree(source, target / f"copy-{i:05d}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=100, help="Copies of the knowledge directory")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--collect", action="store_true", help="Materialize all chunks in a list")
+    parser.add_argument("--child", nargs=2, metavar=("CORPUS", "WORKERS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_chunking(Path(args.child[0]), int(args.child[1]), args.collect)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = Path(tmp)
+        build_corpus(corpus, args.copies)
+
+        print(f"{'workers':>7}{'files':>8}{'chunks':>9}{'seconds':>9}{'files/s':>10}{'max RSS':>10}")
+        for workers in args.workers:
+            command = [sys.executable, __file__, "--child", str(corpus), str(workers)]
+            if args.collect:
+                command.append("--collect")
+            result = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            print(
+                f"{workers:>7}{stats['files']:>8}{stats['chunks']:>9}{stats['seconds']:>9.2f}"
+                f"{stats['files_per_second']:>10.1f}{stats['max_rss_mb']:>8.0f}MB"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""Benchmark embedding backends: query latency, throughput and resident memory.
+
+Each backend runs in a fresh interpreter so load time and RSS are not
+polluted by the other backend's libraries (torch alone is several hundred MB).
+
+Reported per backend:
+- load time (import + model load)
+- single-query latency p50/p95 over the sample queries
+- batch throughput (texts/sec) embedding every knowledge chunk
+- peak resident memory (ru_maxrss)
+
+Usage:
+    python scripts/bench_embeddings.py                      # torch and onnx
+    python scripts/bench_embeddings.py --backends onnx --threads 2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+QUERIES = [
+    "Who handles emergency services?",
+    "When is the next city council meeting?",
+    "How do I get a building permit?",
+    "Parks department contact email",
+    "Events in March",
+    "Who is the mayor?",
+    "Recycling pickup schedule",
+    "Library opening hours",
+]
+
+
+def run_backend(rounds: int) -> dict:
+    """Benchmark the configured backend in this process (child mode)."""
+    import resource
+    import time
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag.chunking import chunk_all_knowledge
+
+    texts = [doc.page_content for doc in chunk_all_knowledge(BACKEND_DIR / "knowledge")]
+
+    start = time.perf_counter()
+    from rag.embeddings import get_embeddings
+
+    embeddings = get_embeddings()
+    embeddings.embed_query("warm up")
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            t0 = time.perf_counter()
+            embeddings.embed_query(query)
+            latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+
+    t0 = time.perf_counter()
+    embeddings.embed_documents(texts)
+    batch_seconds = time.perf_counter() - t0
+
+    return {
+        "load_seconds": round(load_seconds, 2),
+        "query_p50_ms": round(latencies[len(latencies) // 2], 2),
+        "query_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "batch_texts": len(texts),
+        "batch_texts_per_second": round(len(texts) / batch_seconds, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def bench(backend: str, rounds: int, threads: int) -> dict:
+    """Run one backend in a subprocess and return its measurements."""
+    env = dict(os.environ, EMBEDDING_BACKEND=backend)
+    if threads:
+        env["ONNX_NUM_THREADS"] = str(threads)
+        env["OMP_NUM_THREADS"] = str(threads)
+    result = subprocess.run(
+        [sys.executable, __file__, "--child", "--rounds", str(rounds)],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    parser.add_argument("--rounds", type=int, default=20, help="Passes over the sample queries")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0 = backend default)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_backend(args.rounds)))
+        return 0
+
+    results = {backend: bench(backend, args.rounds, args.threads) for backend in args.backends}
+    columns = ["load_seconds", "query_p50_ms", "query_p95_ms", "batch_texts_per_second", "max_rss_mb"]
+    print(f"{'backend':<8}" + "".join(f"{c:>24}" for c in columns))
+    for backend, stats in results.items():
+        if "error" in stats:
+            print(f"{backend:<8}  error: {stats['error']}")
+            continue
+        print(f"{backend:<8}" + "".join(f"{stats[c]:>24}" for c in columns))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
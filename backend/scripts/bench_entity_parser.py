@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""Throughput benchmark for the streaming entity-marker parser.
+
+Replays recorded streams through EntityStreamParser delta by delta and
+reports characters/sec, deltas/sec, per-delta latency and the entities
+found (including how many needed repair).
+
+Recordings are SSE captures of /api/chat, e.g.:
+    curl -sN -X POST 'localhost:8000/api/chat?marker=flowtoken' \\
+        -H 'content-type: application/json' \\
+        -d '{"messages":[{"role":"user","content":"Parks contacts"}]}' > flowtoken.sse
+
+Without recordings, built-in samples for every marker (well-formed and
+near-miss) are split into token-sized deltas.
+
+Usage:
+    python scripts/bench_entity_parser.py
+    python scripts/bench_entity_parser.py --recording flowtoken.sse --marker flowtoken
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from streaming.entities import EntityStreamParser
+
+SAMPLES = {
+    "streamdown": (
+        "Here are the contacts for the Parks department:\n\n"
+        '<contactcard name="Anna Müller" email="anna.mueller@berlin.de" phone="+49 30 1234567" address="Am Park 1, Berlin" />\n\n'
+        '<contactcard name="Jonas Weber" email="" phone="+49 30 7654321" />\n\n'
+        "And the next event:\n\n"
+        '<calendarevent title="Spring Festival" date="2026-04-12" startTime="14:00" location="Tiergarten" description="Music & food" />\n\n'
+        'Let me know if you need more.<contactcard name="Lea Braun" email="lea.braun.at.berlin.de"'
+    ),
+    "flowtoken": (
+        "I found this contact:\n\n"
+        '<contactcard\n    name="Anna Müller"\n    phone="+49 30 1234567"\n    email="anna.mueller.at.berlin.de"\n    address="Am Park 1, Berlin"\n/>\n\n'
+        '<calendarevent\n    title="Council Meeting"\n    date="2026-03-02"\n    startTime="18:00"\n    location="Rotes Rathaus\n/>\n\n'
+        "Anything else?"
+    ),
+    "llm-ui": (
+        "Here you go:\n\n"
+        '【{"type": "contact", "name": "Anna Müller", "email": "anna.mueller@berlin.de", "phone": "+49 30 1234567"}】\n\n'
+        '【{"type": "calendar", "title": "Spring Festival", "date": "2026-04-12", "location": "Tiergarten",}】\n\n'
+        '【{"name": "Jonas Weber", "phone": "+49 30 7654321"}】\n\n'
+        'Also: 【{"type": "calendar", "title": "Flea Market", "date": "2026-05-03'
+    ),
+}
+
+
+def split_deltas(text: str, rng: random.Random) -> list[str]:
+    """Split text into token-sized deltas (1-8 characters)."""
+    deltas, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 8)
+        deltas.append(text[i:i + size])
+        i += size
+    return deltas
+
+
+def load_recording(path: Path) -> list[str]:
+    """Extract text-delta payloads from an SSE capture."""
+    deltas = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.startswith("data: ") or line == "data: [DONE]":
+            continue
+        event = json.loads(line[len("data: "):])
+        if event.get("type") == "text-delta":
+            deltas.append(event["delta"])
+    return deltas
+
+
+def bench(marker: str, streams: list[list[str]], rounds: int) -> dict:
+    """Parse every stream `rounds` times and collect throughput figures."""
+    chars = sum(len(d) for stream in streams for d in stream) * rounds
+    deltas = sum(len(stream) for stream in streams) * rounds
+    entities = repaired = rejected = 0
+    latencies = []
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for stream in streams:
+            parser = EntityStreamParser(marker)
+            found = []
+            for delta in stream:
+                t0 = time.perf_counter()
+                found += parser.feed(delta)
+                latencies.append(time.perf_counter() - t0)
+            found += parser.close()
+            entities += len(found)
+            repaired += sum(1 for e in found if e.repairs)
+            rejected += parser.rejected
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    return {
+        "chars_per_second": chars / elapsed,
+        "deltas_per_second": deltas / elapsed,
+        "delta_p50_us": latencies[len(latencies) // 2] * 1e6,
+        "delta_p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+        "entities": entities // rounds,
+        "repaired": repaired // rounds,
+        "rejected": rejected // rounds,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recording", type=Path, nargs="*", default=[], help="SSE captures of /api/chat")
+    parser.add_argument("--marker", default=None, help="Marker of the recordings")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.recording:
+        if args.marker is None:
+            parser.error("--marker is required with --recording")
+        workloads = {args.marker: [load_recording(path) for path in args.recording]}
+    else:
+        workloads = {
+            marker: [split_deltas(text, rng) for _ in range(10)]
+            for marker, text in SAMPLES.items()
+        }
+
+    print(f"{'marker':<11}{'MB/s':>8}{'deltas/s':>12}{'p50 us':>9}{'p99 us':>9}"
+          f"{'entities':>10}{'repaired':>10}{'rejected':>10}")
+    for marker, streams in workloads.items():
+        stats = bench(marker, streams, args.rounds)
+        print(
+            f"{marker:<11}{stats['chars_per_second'] / 1e6:>8.2f}{stats['deltas_per_second']:>12,.0f}"
+            f"{stats['delta_p50_us']:>9.2f}{stats['delta_p99_us']:>9.2f}"
+            f"{stats['entities']:>10}{stats['repaired']:>10}{stats['rejected']:>10}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
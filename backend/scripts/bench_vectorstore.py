@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""Vector backend benchmark: Chroma vs the NumPy index at several corpus sizes.
+
+Builds each backend from the same synthetic, clustered unit vectors (sized
+like all-mpnet-base-v2 embeddings) with chunk-like texts and metadata, then
+reports for single-query top-k search:
+
+- build time and index size on disk
+- p50/p95 latency, unfiltered and with a {"type": ...} metadata filter
+  (documents and metadata are fetched, as retrieval does)
+- recall@k against exact float32 search
+
+Backends: chroma, numpy exact search stored as float32/float16/int8, and
+numpy IVF (float32, --probes lists per query).
+
+Usage:
+    python scripts/bench_vectorstore.py --sizes 1000 10000 50000
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag.numpy_store import NumpyVectorStore
+
+TYPES = ["contact", "event", "general"]
+CHROMA_BATCH = 4000
+
+
+class Precomputed(Embeddings):
+    """Embeddings looked up from precomputed vectors (no model needed)."""
+
+    def __init__(self, texts: list[str], vectors: np.ndarray):
+        self.table = dict(zip(texts, vectors.tolist()))
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.table[text] for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.table[text]
+
+
+def make_corpus(size: int, dim: int, queries: int, rng: np.random.Generator):
+    """Clustered unit vectors, chunk-sized texts, metadata and query vectors."""
+    centers = rng.standard_normal((max(8, size // 50), dim)).astype(np.float32)
+    vectors = centers[rng.integers(len(centers), size=size)] + 0.6 * rng.standard_normal((size, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    texts = [f"chunk {i} " + "lorem ipsum " * 35 for i in range(size)]
+    metadatas = [
+        {"type": TYPES[i % 3], "source": f"knowledge/file-{i // 20}.md", "title": f"File {i // 20}"}
+        for i in range(size)
+    ]
+    ids = [f"chunk-{i}" for i in range(size)]
+    picks = rng.integers(size, size=queries)
+    query_vectors = vectors[picks] + 0.3 * rng.standard_normal((queries, dim)).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return ids, texts, metadatas, vectors, query_vectors
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> list[set[str]]:
+    scores = queries @ vectors.T
+    top = np.argsort(-scores, axis=1)[:, :k]
+    return [{f"chunk-{i}" for i in row} for row in top]
+
+
+def dir_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def timed_queries(search, queries: np.ndarray) -> tuple[list[float], list[set[str]]]:
+    latencies, found = [], []
+    for query in queries:
+        started = time.perf_counter()
+        ids = search(query.tolist())
+        latencies.append(time.perf_counter() - started)
+        found.append(set(ids))
+    return latencies, found
+
+
+def bench_chroma(workdir: Path, corpus, k: int) -> dict:
+    import chromadb
+
+    ids, texts, metadatas, vectors, queries = corpus
+    started = time.perf_counter()
+    client = chromadb.PersistentClient(path=str(workdir))
+    collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+    for start in range(0, len(ids), CHROMA_BATCH):
+        end = start + CHROMA_BATCH
+        collection.add(
+            ids=ids[start:end], embeddings=vectors[start:end], documents=texts[start:end], metadatas=metadatas[start:end]
+        )
+    build_seconds = time.perf_counter() - started
+
+    def search(vector, where=None):
+        found = collection.query(
+            query_embeddings=[vector], n_results=k, where=where, include=["documents", "metadatas", "distances"]
+        )
+        return found["ids"][0]
+
+    latencies, found = timed_queries(search, queries)
+    filtered, _ = timed_queries(lambda v: search(v, {"type": "event"}), queries)
+    return {"build": build_seconds, "latencies": latencies, "filtered": filtered, "found": found, "bytes": dir_bytes(workdir)}
+
+
+def bench_numpy(workdir: Path, corpus, k: int, dtype: str, ann_threshold: int, probes: int) -> dict:
+    ids, texts, metadatas, vectors, queries = corpus
+    started = time.perf_counter()
+    store = NumpyVectorStore(
+        Precomputed(texts, vectors), workdir, dtype=dtype, ann_threshold=ann_threshold, ann_probes=probes
+    )
+    store.add_texts(texts, metadatas=metadatas, ids=ids)
+    build_seconds = time.perf_counter() - started
+
+    def search(vector, where=None):
+        return [doc.id for doc, _ in store.similarity_search_by_vector_with_relevance_scores(vector, k, where)]
+
+    latencies, found = timed_queries(search, queries)
+    filtered, _ = timed_queries(lambda v: search(v, {"type": "event"}), queries)
+    return {"build": build_seconds, "latencies": latencies, "filtered": filtered, "found": found, "bytes": dir_bytes(workdir)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--probes", type=int, default=32)
+    parser.add_argument("--skip-chroma", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    backends = [] if args.skip_chroma else [("chroma", None)]
+    backends += [
+        ("numpy f32", dict(dtype="float32", ann_threshold=10**12)),
+        ("numpy f16", dict(dtype="float16", ann_threshold=10**12)),
+        ("numpy int8", dict(dtype="int8", ann_threshold=10**12)),
+        ("numpy ivf", dict(dtype="float32", ann_threshold=0)),
+    ]
+
+    print(f"{'chunks':>7}  {'backend':<11}{'build s':>9}{'disk MB':>9}{'p50 ms':>8}{'p95 ms':>8}"
+          f"{'filt p50':>10}{'recall':>8}")
+    for size in args.sizes:
+        corpus = make_corpus(size, args.dim, args.queries, np.random.default_rng(args.seed))
+        truth = exact_top_k(corpus[3], corpus[4], args.k)
+        for name, options in backends:
+            workdir = Path(tempfile.mkdtemp(prefix="bench-vectors-"))
+            try:
+                if options is None:
+                    stats = bench_chroma(workdir, corpus, args.k)
+                else:
+                    stats = bench_numpy(workdir, corpus, args.k, probes=args.probes, **options)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            recall = np.mean([len(found & expected) / len(expected) for found, expected in zip(stats["found"], truth)])
+            print(
+                f"{size:>7}  {name:<11}{stats['build']:>9.2f}{stats['bytes'] / 1e6:>9.1f}"
+                f"{percentile(stats['latencies'], 0.5) * 1000:>8.2f}{percentile(stats['latencies'], 0.95) * 1000:>8.2f}"
+                f"{percentile(stats['filtered'], 0.5) * 1000:>10.2f}{recall:>8.3f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
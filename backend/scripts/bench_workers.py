@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""Multi-worker scaling report: per-worker memory and throughput for 1..N workers.
+
+For each worker count the script starts the backend in multi-worker mode
+(gunicorn.conf.py: preloaded model/corpus/BM25, shared Chroma server),
+waits for /ready, runs a /api/retrieve load test and reads memory from
+/proc for the master and every worker:
+
+- RSS: resident pages, including pages shared copy-on-write with the master
+- PSS: proportional share (shared pages split between the processes that
+  map them), so summing PSS gives the real footprint of the deployment
+
+Linux only (reads /proc/<pid>/smaps_rollup).
+
+Usage:
+    python scripts/bench_workers.py --workers 1 2 4 --requests 400 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from loadgen import run_load
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def memory_kb(pid: int) -> dict:
+    """RSS and PSS of a process in kB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key.lower()] = int(rest.split()[0])
+    return values
+
+
+def child_pids(pid: int) -> list[int]:
+    """Direct children of a process."""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def is_chroma(pid: int) -> bool:
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        return b"chroma" in f.read()
+
+
+def wait_ready(base_url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"backend not ready after {timeout}s")
+
+
+def bench(workers: int, port: int, requests: int, concurrency: int, timeout: float) -> dict:
+    """Start gunicorn with `workers` workers, measure memory and throughput, stop it."""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port))
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "main:app", "-c", "gunicorn.conf.py"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(base_url, timeout)
+        # Warm every worker's lazy state before measuring memory
+        asyncio.run(run_load(base_url, "retrieve", workers * 8, workers * 2))
+        load = asyncio.run(run_load(base_url, "retrieve", requests, concurrency))
+
+        worker_pids = [pid for pid in child_pids(master.pid) if not is_chroma(pid)]
+        master_memory = memory_kb(master.pid)
+        worker_memory = [memory_kb(pid) for pid in worker_pids]
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+    return {
+        "workers": workers,
+        "throughput_rps": load["throughput_rps"],
+        "p99_seconds": load["total_seconds"]["p99"],
+        "master_rss_mb": master_memory["rss"] / 1024,
+        "worker_rss_mb": sum(m["rss"] for m in worker_memory) / len(worker_memory) / 1024,
+        "worker_pss_mb": sum(m["pss"] for m in worker_memory) / len(worker_memory) / 1024,
+        "total_pss_mb": (master_memory["pss"] + sum(m["pss"] for m in worker_memory)) / 1024,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--ready-timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7}{'req/s':>9}{'p99 s':>8}{'master RSS':>12}{'worker RSS':>12}"
+          f"{'worker PSS':>12}{'total PSS':>11}")
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        stats = bench(workers, args.port, args.requests, args.concurrency, args.ready_timeout)
+        baseline = baseline or stats["throughput_rps"]
+        print(
+            f"{workers:>7}{stats['throughput_rps']:>9.1f}{stats['p99_seconds']:>8.3f}"
+            f"{stats['master_rss_mb']:>10.0f}MB{stats['worker_rss_mb']:>10.0f}MB"
+            f"{stats['worker_pss_mb']:>10.0f}MB{stats['total_pss_mb']:>9.0f}MB"
+            f"   x{stats['throughput_rps'] / baseline:.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""Export the embedding model to int8-quantized ONNX and verify compatibility.
+
+Steps:
+1. Export the sentence-transformers transformer to ONNX (dynamic batch/sequence)
+2. Dynamic int8 quantization with onnxruntime.quantization
+3. Verify: embed every knowledge chunk with ONNX and look it up in the
+   existing vector index (Chroma or NumPy), comparing it with the vector
+   stored for that chunk, and compare top-k results of torch and ONNX query
+   vectors for sample queries
+
+Exits non-zero if the mean cosine similarity to the stored vectors is below
+--tolerance. Requires torch/sentence-transformers (export only; serving with
+EMBEDDING_BACKEND=onnx does not).
+
+Usage:
+    python scripts/export_onnx.py --output ./onnx_model
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import get_settings
+from rag.onnx_embeddings import ONNX_CONFIG_FILE, ONNX_MODEL_FILE, OnnxEmbeddings
+
+KNOWLEDGE_DIR = Path(__file__).parent.parent / "knowledge"
+
+SAMPLE_QUERIES = [
+    "Who handles emergency services?",
+    "When is the next city council meeting?",
+    "How do I get a building permit?",
+    "Parks department contact email",
+    "Events in March",
+]
+
+
+def export(output_dir: Path, opset: int = 17) -> None:
+    """Export and quantize the configured embedding model."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    settings = get_settings()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    model = SentenceTransformer(settings.embedding_model, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask)[0]
+
+    dummy = tokenizer(["export sample"], return_tensors="pt")
+    fp32_path = output_dir / "model.onnx"
+    print(f"Exporting {settings.embedding_model} to {fp32_path}...")
+    torch.onnx.export(
+        LastHiddenState(transformer),
+        (dummy["input_ids"], dummy["attention_mask"]),
+        str(fp32_path),
+        input_names=["input_ids", "attention_mask"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=opset,
+    )
+
+    print("Quantizing to int8...")
+    quantize_dynamic(str(fp32_path), str(output_dir / ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+
+    tokenizer.save_pretrained(str(output_dir))
+    (output_dir / ONNX_CONFIG_FILE).write_text(json.dumps({
+        "source_model": settings.embedding_model,
+        "max_seq_length": model.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        "pooling": "mean",
+        "normalize": True,
+    }, indent=2))
+
+
+def verify(output_dir: Path, tolerance: float, k: int = 5) -> bool:
+    """Compare ONNX vectors with the stored index and the torch backend."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from rag.chunking import chunk_all_knowledge
+    from rag.vectorstore import count_vectors, search_vectors
+
+    onnx = OnnxEmbeddings(str(output_dir))
+    torch_embeddings = HuggingFaceEmbeddings(
+        model_name=get_settings().embedding_model,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": True},
+    )
+    if count_vectors() == 0:
+        print("Vector store is empty - run scripts/ingest.py first to verify against the index")
+        return False
+
+    # Each chunk's ONNX vector should find the chunk's stored vector (or that
+    # of a chunk with identical text) among its nearest hits; the hit's
+    # cosine distance gives their similarity
+    texts = sorted({doc.page_content for doc in chunk_all_knowledge(KNOWLEDGE_DIR)})
+    hits = search_vectors(onnx.embed_documents(texts), k)
+    distances = [
+        next((distance for hit, distance in found if hit.page_content == text), None)
+        for text, found in zip(texts, hits)
+    ]
+    cosine = np.array([1.0 - distance for distance in distances if distance is not None])
+    if len(cosine) == 0:
+        print("No knowledge chunk found itself in the index - run scripts/ingest.py to rebuild it")
+        return False
+    print(
+        f"Index vectors: {len(cosine)}/{len(texts)} chunk texts found themselves, "
+        f"cosine mean={cosine.mean():.4f} min={cosine.min():.4f}"
+    )
+
+    # Top-k agreement over the stored index: torch query vectors vs ONNX query vectors
+    torch_queries = [torch_embeddings.embed_query(query) for query in SAMPLE_QUERIES]
+    onnx_queries = [onnx.embed_query(query) for query in SAMPLE_QUERIES]
+    query_cosines = [
+        float(np.asarray(torch_query, dtype=np.float32) @ np.asarray(onnx_query, dtype=np.float32))
+        for torch_query, onnx_query in zip(torch_queries, onnx_queries)
+    ]
+    overlaps = [
+        len({doc.id for doc, _ in torch_top} & {doc.id for doc, _ in onnx_top}) / k
+        for torch_top, onnx_top in zip(search_vectors(torch_queries, k), search_vectors(onnx_queries, k))
+    ]
+    print(f"Query vectors vs torch: cosine mean={np.mean(query_cosines):.4f}")
+    print(f"Top-{k} agreement with torch on sample queries: {np.mean(overlaps):.2f}")
+
+    # Chunks that did not find themselves count against the export as well
+    passed = cosine.mean() >= tolerance and len(cosine) >= tolerance * len(texts)
+    print(
+        f"{'PASS' if passed else 'FAIL'}: mean cosine {cosine.mean():.4f}, "
+        f"{len(cosine) / len(texts):.0%} found (tolerance {tolerance})"
+    )
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", type=Path, default=Path(get_settings().onnx_model_dir))
+    parser.add_argument("--tolerance", type=float, default=0.98, help="Min mean cosine similarity")
+    parser.add_argument("--skip-export", action="store_true", help="Only verify an existing export")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        export(args.output)
+    sys.exit(0 if verify(args.output, args.tolerance) else 1)
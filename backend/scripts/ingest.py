@@ -6,8 +6,9 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from rag.chunk_store import ChunkStore
 from rag.chunking import chunk_all_knowledge
-from rag.vectorstore import init_vectorstore
+from rag.vectorstore import count_vectors, init_vectorstore, sync_vectorstore
 from rag.retriever import init_hybrid_retriever
 
 def ingest(knowledge_dir: Path | None = None) -> dict:
@@ -34,14 +35,17 @@ def ingest(knowledge_dir: Path | None = None) -> dict:
 
     print(f"Chunk breakdown: {type_counts}")
 
-    # Initialize vector store with documents
+    # Initialize vector store with documents (only new chunks are embedded)
     print("Initializing vector store...")
-    vectorstore = init_vectorstore(documents)
-    print(f"Vector store initialized with {vectorstore._collection.count()} vectors")
+    init_vectorstore()
+    chunks = ChunkStore.from_documents(documents)
+    added, deleted = sync_vectorstore(chunks)
+    print(f"Vector store initialized with {count_vectors()} vectors "
+          f"({added} added, {deleted} stale removed)")
 
     # Initialize hybrid retriever
     print("Initializing hybrid retriever...")
-    init_hybrid_retriever(documents)
+    init_hybrid_retriever(chunks)
     print("Hybrid retriever initialized")
 
     # Test retrieval
@@ -62,7 +66,7 @@ def ingest(knowledge_dir: Path | None = None) -> dict:
     return {
         "total_chunks": len(documents),
         "by_type": type_counts,
-        "vector_count": vectorstore._collection.count()
+        "vector_count": count_vectors()
     }
 
 if __name__ == "__main__":
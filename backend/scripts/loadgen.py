@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""Concurrent load test for /api/chat and /api/retrieve.
+
+Fires bursts of requests at a running backend and reports status counts and
+latency percentiles (time to first byte and total), followed by the server's
+admission metrics. Run the backend against scripts/stub_mistral.py to keep
+LLM latency fixed and avoid API cost:
+
+    python scripts/stub_mistral.py --port 8100 &
+    MISTRAL_BASE_URL=http://127.0.0.1:8100/v1 MISTRAL_API_KEY=stub uvicorn main:app &
+    python scripts/loadgen.py --concurrency 200 --requests 400
+
+With admission control, p99 of admitted requests should stay close to the
+single-request latency while excess load is shed with 429s.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+import httpx
+
+CHAT_BODY = {"messages": [{"role": "user", "content": "Who handles parks and green spaces?"}]}
+RETRIEVE_BODY = {"message": "parks department contact"}
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+async def run_request(client: httpx.AsyncClient, endpoint: str) -> tuple[int, float, float]:
+    """Send one request; returns (status, ttfb_seconds, total_seconds)."""
+    body = CHAT_BODY if endpoint == "chat" else RETRIEVE_BODY
+    start = time.perf_counter()
+    ttfb = None
+    async with client.stream("POST", f"/api/{endpoint}", json=body) as response:
+        async for _ in response.aiter_bytes():
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+    total = time.perf_counter() - start
+    return response.status_code, ttfb or total, total
+
+
+async def run_load(base_url: str, endpoint: str, requests: int, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded():
+            async with semaphore:
+                try:
+                    return await run_request(client, endpoint)
+                except httpx.HTTPError as e:
+                    return type(e).__name__, 0.0, 0.0
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[bounded() for _ in range(requests)])
+        elapsed = time.perf_counter() - start
+        server_metrics = (await client.get("/metrics")).json()
+
+    statuses = Counter(str(status) for status, _, _ in results)
+    ok = [r for r in results if r[0] == 200]
+    return {
+        "endpoint": endpoint,
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "statuses": dict(statuses),
+        "ttfb_seconds": {
+            "p50": round(percentile([r[1] for r in ok], 0.50), 3),
+            "p99": round(percentile([r[1] for r in ok], 0.99), 3),
+        },
+        "total_seconds": {
+            "p50": round(percentile([r[2] for r in ok], 0.50), 3),
+            "p99": round(percentile([r[2] for r in ok], 0.99), 3),
+        },
+        "admission": server_metrics.get("admission", {}),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", choices=["chat", "retrieve"], default="chat")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(args.base_url, args.endpoint, args.requests, args.concurrency))
+    print(json.dumps(report, indent=2))
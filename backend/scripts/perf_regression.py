@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+"""Offline /api/chat performance regression check against recorded Mistral streams.
+
+Runs a fixed set of chat queries through the whole app in process (lifespan
+warm-up, admission, agent graph, retrieval tool, entity parsing, SSE
+framing) over httpx's ASGI transport. The chat model is replayed from a
+cassette (agent/replay.py), by default without the recorded delays, so what
+is measured is server-side overhead: request wall time minus the time the
+replayed model spent waiting. At --speed > 0 this includes timer overshoot
+per chunk, so a baseline is only compared at the speed it was taken at.
+
+After one warm-up pass each query runs --repeat times. The median overhead
+per request and the overhead per streamed token (estimate_tokens) are
+compared with the stored baseline; the check fails (exit 1) when either
+exceeds baseline * (1 + tolerance), or when a request fails or a prompt has
+no recording.
+
+The request deadline is disabled in both modes: a forced answer near the
+deadline would change the prompts and miss the recordings.
+
+tests/test_perf_replay.py runs the same kind of replay offline on every test
+run: a checked-in cassette of scripted streams over a fixed test corpus,
+checked against absolute overhead limits instead of a stored baseline.
+
+Usage:
+    # Record the streams once against live Mistral (needs MISTRAL_API_KEY)
+    python scripts/perf_regression.py record
+    # Store the baseline (on the machine that runs the check)
+    python scripts/perf_regression.py check --update-baseline
+    # Check
+    python scripts/perf_regression.py check --tolerance 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+PERF_DIR = BACKEND_DIR / "perf"
+
+QUERIES = [
+    "Hello! What can you help me with?",
+    "Who handles parks and green spaces?",
+    "How do I contact the Bürgeramt Mitte?",
+    "What events are happening in Berlin this summer?",
+    "I need the contacts of the waste collection service and the building authority.",
+    "Are there any festivals in Kreuzberg, and who organizes them?",
+]
+
+
+def configure(mode: str, cassette: Path, speed: float) -> None:
+    """Settings for the in-process app; must run before main is imported."""
+    os.environ["LLM_REPLAY_MODE"] = mode
+    os.environ["LLM_CASSETTE_PATH"] = str(cassette)
+    os.environ["LLM_REPLAY_SPEED"] = str(speed)
+    os.environ["REQUEST_DEADLINE_SECONDS"] = "0"
+    os.environ["KNOWLEDGE_WATCH_ENABLED"] = "false"
+    os.environ["PROFILING_TOKEN"] = ""
+    if mode == "replay":
+        os.environ.setdefault("MISTRAL_API_KEY", "replay")
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.chdir(BACKEND_DIR)
+
+
+async def run_queries(queries: list[str], repeat: int, warmup: bool) -> list[dict]:
+    """Send each query `repeat` times through /api/chat; returns one result per request."""
+    import httpx
+
+    from agent.tokens import estimate_tokens
+    from main import app
+    from runtime import get_metrics
+
+    metrics = get_metrics()
+
+    def replay_delay() -> float:
+        return metrics.snapshot()["summaries"].get("llm.replay_delay_seconds", {}).get("sum", 0.0)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://perf", timeout=120) as client:
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.2)
+
+            async def chat(query: str) -> dict:
+                body = {"messages": [{"id": "perf-user", "role": "user", "content": query}]}
+                waited = replay_delay()
+                started = time.perf_counter()
+                response = await client.post("/api/chat", json=body)
+                seconds = time.perf_counter() - started
+                text = "".join(
+                    event.get("delta", "")
+                    for line in response.text.splitlines() if line.startswith("data: {")
+                    for event in [json.loads(line[len("data: "):])]
+                    if event.get("type") == "text-delta"
+                )
+                return {
+                    "query": query,
+                    "status": response.status_code,
+                    "overhead": seconds - (replay_delay() - waited),
+                    "tokens": estimate_tokens(text),
+                    "failed": response.status_code != 200 or "I encountered an error" in text,
+                }
+
+            if warmup:
+                for query in queries:
+                    await chat(query)
+            return [await chat(query) for _ in range(repeat) for query in queries]
+
+
+def summarize(results: list[dict]) -> dict:
+    overheads = [r["overhead"] for r in results]
+    tokens = sum(r["tokens"] for r in results)
+    return {
+        "requests": len(results),
+        "overhead_ms_per_request": round(statistics.median(overheads) * 1000, 3),
+        "overhead_us_per_token": round(sum(overheads) / max(tokens, 1) * 1e6, 3),
+    }
+
+
+def record(args) -> int:
+    if args.cassette.exists():
+        args.cassette.unlink()
+    configure("record", args.cassette, speed=1.0)
+    results = asyncio.run(run_queries(QUERIES, repeat=1, warmup=False))
+    failed = [r["query"] for r in results if r["failed"]]
+    print(f"Recorded {len(results) - len(failed)}/{len(results)} conversations to {args.cassette}")
+    for query in failed:
+        print(f"  failed: {query}")
+    return 1 if failed else 0
+
+
+def check(args) -> int:
+    if not args.cassette.exists():
+        print(f"No cassette at {args.cassette}; run `python scripts/perf_regression.py record` first")
+        return 1
+    configure("replay", args.cassette, speed=args.speed)
+    results = asyncio.run(run_queries(QUERIES, repeat=args.repeat, warmup=True))
+
+    from runtime import get_metrics
+
+    misses = get_metrics().snapshot()["counters"].get("llm.replay_misses", 0)
+    failed = [r for r in results if r["failed"]]
+    current = summarize(results)
+
+    if args.update_baseline:
+        if failed or misses:
+            print(f"Not storing a baseline: {len(failed)} failed requests, {misses:.0f} replay misses")
+            return 1
+        baseline = {
+            **current,
+            "speed": args.speed,
+            "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        }
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Baseline stored in {args.baseline}: {json.dumps(current)}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline first")
+        return 1
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("speed", 0.0) != args.speed:
+        # Timer overshoot per replayed chunk is counted as overhead at speed > 0
+        print(f"Baseline was measured at --speed {baseline.get('speed', 0.0)}, not comparable with {args.speed}")
+        return 1
+
+    regressions = 0
+    print(f"{'metric':<26}{'baseline':>10}{'current':>10}{'limit':>10}  status")
+    for metric in ("overhead_ms_per_request", "overhead_us_per_token"):
+        limit = baseline[metric] * (1 + args.tolerance)
+        ok = current[metric] <= limit
+        regressions += not ok
+        print(f"{metric:<26}{baseline[metric]:>10.1f}{current[metric]:>10.1f}{limit:>10.1f}  {'ok' if ok else 'REGRESSION'}")
+    print(f"{current['requests']} requests, {len(failed)} failed, {misses:.0f} replay misses")
+    for r in failed:
+        print(f"  failed ({r['status']}): {r['query']}")
+    return 1 if regressions or failed or misses else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mode", choices=["record", "check"])
+    parser.add_argument("--cassette", type=Path, default=PERF_DIR / "chat_cassette.jsonl", help="Recorded streams")
+    parser.add_argument("--baseline", type=Path, default=PERF_DIR / "baseline.json", help="Stored baseline")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of each query (check)")
+    parser.add_argument("--speed", type=float, default=0.0, help="Replay timing factor (0 = no delays)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown over the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the measured values as the baseline")
+    args = parser.parse_args()
+    args.cassette = args.cassette.resolve()
+    args.baseline = args.baseline.resolve()
+    return record(args) if args.mode == "record" else check(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
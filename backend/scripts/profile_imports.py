@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""Import-time profile of the backend.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+prints the slowest imports by cumulative and self time. With --budget the
+script exits non-zero when the total import time exceeds the budget, so it
+can gate CI against heavy dependencies creeping back into import time.
+
+Usage:
+    python scripts/profile_imports.py                  # profile `import main`
+    python scripts/profile_imports.py --top 40
+    python scripts/profile_imports.py --budget 1.5     # fail if slower than 1.5s
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def profile_imports(module: str = "main") -> list[tuple[str, int, int]]:
+    """Import a module in a fresh interpreter and collect import timings.
+
+    Returns:
+        List of (module, self_us, cumulative_us) in import order
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--budget", type=float, default=None, help="Max import time in seconds")
+    args = parser.parse_args()
+
+    timings = profile_imports(args.module)
+    total_us = next((cum for name, _, cum in timings if name.strip() == args.module), 0)
+
+    print(f"import {args.module}: {total_us / 1e6:.3f}s total\n")
+    print(f"Top {args.top} by cumulative time:")
+    for name, _, cum in sorted(timings, key=lambda t: t[2], reverse=True)[:args.top]:
+        print(f"  {cum / 1e3:9.1f} ms  {name}")
+    print(f"\nTop {args.top} by self time:")
+    for name, self_us, _ in sorted(timings, key=lambda t: t[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1e3:9.1f} ms  {name.strip()}")
+
+    if args.budget is not None and total_us / 1e6 > args.budget:
+        print(f"\nFAIL: import time {total_us / 1e6:.3f}s exceeds budget {args.budget:.3f}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""Local stub of the Mistral chat completions API.
+
+Streams canned completions in Mistral's SSE chunk format so the backend can
+be exercised without network access or API cost (client pooling/retry checks,
+load tests). Point the backend at it with:
+
+    MISTRAL_BASE_URL=http://127.0.0.1:8100/v1 uvicorn main:app
+
+Usage:
+    python scripts/stub_mistral.py --port 8100 --tokens 80 --token-delay 0.01 --error-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+STUB_ANSWER_WORD = "lorem "
+
+
+def create_stub_app(
+    tokens: int = 40,
+    token_delay: float = 0.01,
+    first_token_delay: float = 0.2,
+    error_rate: float = 0.0,
+    fail_first: int = 0,
+) -> FastAPI:
+    """Create the stub API app.
+
+    Args:
+        tokens: Content chunks per streamed completion
+        token_delay: Seconds between chunks
+        first_token_delay: Seconds before the first chunk
+        error_rate: Fraction of requests answered with 429/503
+        fail_first: Answer this many first requests with 429, 503, 429, ...
+    """
+    app = FastAPI(title="Mistral API stub")
+    # active/max_active: completions being streamed (concurrency seen upstream)
+    app.state.stats = {"requests": 0, "errors": 0, "active": 0, "max_active": 0}
+
+    def chunk(delta: dict, finish_reason: str | None = None) -> str:
+        payload = {
+            "id": f"cmpl-{uuid.uuid4().hex[:8]}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    async def stream_completion():
+        stats = app.state.stats
+        stats["active"] += 1
+        stats["max_active"] = max(stats["max_active"], stats["active"])
+        try:
+            await asyncio.sleep(first_token_delay)
+            yield chunk({"role": "assistant", "content": ""})
+            for _ in range(tokens):
+                yield chunk({"content": STUB_ANSWER_WORD})
+                await asyncio.sleep(token_delay)
+            yield chunk({"content": ""}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+        finally:
+            stats["active"] -= 1
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.stats["requests"] += 1
+
+        failing = app.state.stats["requests"] <= fail_first
+        if failing or random.random() < error_rate:
+            app.state.stats["errors"] += 1
+            status = (429, 503)[(app.state.stats["requests"] - 1) % 2] if failing else random.choice([429, 503])
+            return JSONResponse({"message": "stub overload"}, status_code=status, headers={"Retry-After": "0"})
+
+        if body.get("stream"):
+            return StreamingResponse(stream_completion(), media_type="text/event-stream")
+
+        await asyncio.sleep(first_token_delay + tokens * token_delay)
+        return {
+            "id": f"cmpl-{uuid.uuid4().hex[:8]}",
+            "object": "chat.completion",
+            "model": "stub",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": STUB_ANSWER_WORD * tokens},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.stats
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--fail-first", type=int, default=0)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_stub_app(args.tokens, args.token_delay, args.first_token_delay, args.error_rate, args.fail_first),
+        host=args.host,
+        port=args.port,
+    )
@@ -1,10 +1,24 @@
-from .sse import format_text_start, format_text_delta, format_reasoning_delta, format_done, SSE_HEADERS
+from .sse import (
+    format_text_start,
+    format_text_delta,
+    format_reasoning_delta,
+    format_data_part,
+    format_done,
+    SSE_HEADERS,
+)
+from .disconnect import cancel_on_disconnect, ClientDisconnected
+from .entities import EntityStreamParser, Entity, EntityType
 
 __all__ = [
     "format_text_start",
     "format_text_delta",
     "format_reasoning_delta",
+    "format_data_part",
     "format_done",
     "SSE_HEADERS",
+    "cancel_on_disconnect",
+    "ClientDisconnected",
+    "EntityStreamParser",
+    "Entity",
     "EntityType",
 ]
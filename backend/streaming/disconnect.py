@@ -0,0 +1,99 @@
+"""Client-disconnect detection for streaming responses.
+
+Wraps an event source (e.g. graph.astream) so that when the HTTP client goes
+away mid-stream the source is cancelled immediately instead of running to
+completion. One watcher task polls the connection for the whole stream. The
+source itself runs in the caller's task, so context variables (request
+profile, spans) flow through it as with a plain `async for`. On disconnect
+the watcher cancels the caller's task while it awaits the source's next
+step (the way asyncio.timeout does). The CancelledError propagates into the
+LangGraph run, which closes the upstream Mistral SSE stream and abandons any
+in-progress retrieval, and surfaces as ClientDisconnected.
+"""
+import asyncio
+from contextlib import contextmanager, suppress
+from typing import AsyncIterator, Iterator, TypeVar
+
+from starlette.requests import Request
+
+T = TypeVar("T")
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client disconnected before the stream finished."""
+
+
+class _DisconnectWatcher:
+    """Polls the connection in one background task and interrupts the current step."""
+
+    def __init__(self, request: Request, poll_interval: float):
+        self.disconnected = False
+        self._request = request
+        self._poll_interval = poll_interval
+        self._stepping: asyncio.Task | None = None
+        self._cancelled = False
+        self._task = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
+        while not await self._request.is_disconnected():
+            await asyncio.sleep(self._poll_interval)
+        self.disconnected = True
+        if self._stepping is not None:
+            self._cancelled = True
+            self._stepping.cancel()
+
+    @contextmanager
+    def step(self) -> Iterator[None]:
+        """Await one source step; raises ClientDisconnected if the client went away."""
+        if self.disconnected:
+            raise ClientDisconnected()
+        self._stepping = asyncio.current_task()
+        try:
+            yield
+        except asyncio.CancelledError:
+            if self._cancelled and self._stepping.uncancel() == 0:
+                raise ClientDisconnected() from None
+            raise  # Cancelled from outside as well
+        finally:
+            task, self._stepping = self._stepping, None
+        if self._cancelled:  # The source swallowed the cancellation
+            task.uncancel()
+            raise ClientDisconnected()
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+
+
+async def cancel_on_disconnect(
+    request: Request,
+    events: AsyncIterator[T],
+    poll_interval: float = 0.5,
+) -> AsyncIterator[T]:
+    """Yield events until the source ends or the client disconnects.
+
+    Args:
+        request: Incoming request whose connection is watched
+        events: Async iterator producing stream events
+        poll_interval: Seconds between disconnect checks
+
+    Raises:
+        ClientDisconnected: If the client went away (source already cancelled)
+    """
+    iterator = events.__aiter__()
+    watcher = _DisconnectWatcher(request, poll_interval)
+    try:
+        while True:
+            try:
+                with watcher.step():
+                    event = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            yield event
+    finally:
+        await watcher.stop()
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            with suppress(Exception):
+                await aclose()
@@ -0,0 +1,408 @@
+"""Incremental entity-marker parser for the agent's token stream.
+
+The agent embeds contacts and events in its answer using the marker format
+of the requested strategy:
+
+- streamdown: <contactcard name="..." email="..." />
+- flowtoken:  the same tags spread over several lines (emails as ".at.")
+- llm-ui:     【{"type": "contact", "name": "..."}】
+
+EntityStreamParser consumes text deltas as they arrive and returns each
+entity as soon as its closing delimiter is seen, so the server can emit a
+structured data part next to the text. Boundaries are tracked across chunk
+splits; text outside entities is skipped with str.find and every character
+inside an entity is scanned once, so a whole stream parses in O(n).
+
+Near-miss output is repaired rather than dropped: unterminated tags, quotes
+and JSON blocks are closed (an llm-ui block ends once its JSON is complete,
+even if the closing bracket never comes), emails are un-escaped (".at.", "(at)", " at "),
+empty attributes are removed and a missing llm-ui "type" is inferred.
+Entities still missing a required field are rejected.
+
+Usage:
+    parser = EntityStreamParser("flowtoken")
+    for delta in deltas:
+        for entity in parser.feed(delta):
+            ...
+    for entity in parser.close():
+        ...
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from enum import Enum
+
+
+class EntityType(str, Enum):
+    """Structured entity kinds (match the llm-ui "type" field)."""
+    CONTACT = "contact"
+    CALENDAR = "calendar"
+
+
+# Tag name -> entity type for the XML-style markers
+TAG_TYPES = {
+    "contactcard": EntityType.CONTACT,
+    "calendarevent": EntityType.CALENDAR,
+}
+
+# Allowed fields per entity type (frontend ContactCardProps / CalendarEventProps)
+ENTITY_FIELDS = {
+    EntityType.CONTACT: ("name", "email", "phone", "address"),
+    EntityType.CALENDAR: ("title", "date", "startTime", "endTime", "location", "description"),
+}
+
+REQUIRED_FIELDS = {
+    EntityType.CONTACT: ("name",),
+    EntityType.CALENDAR: ("title", "date"),
+}
+
+# Entities longer than this are treated as plain text (runaway / false start)
+MAX_ENTITY_CHARS = 4000
+
+JSON_OPEN = "【"
+JSON_CLOSE = "】"
+
+_ATTRIBUTE_RE = re.compile(r"""([A-Za-z_][\w-]*)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+_EMAIL_AT_RE = re.compile(r"\s*(?:\.at\.|\(at\)|\[at\]|\s+at\s+|\.at\s+|\s+at\.)\s*", re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+
+@dataclass
+class Entity:
+    """A parsed (and possibly repaired) entity.
+
+    Attributes:
+        type: Entity kind
+        data: Validated fields, ready to send as a data part
+        raw: Marker text as generated by the model
+        offset: Character offset of the marker in the streamed text
+        repairs: Names of the repairs applied (empty if well-formed)
+    """
+
+    type: EntityType
+    data: dict
+    raw: str
+    offset: int
+    repairs: list[str] = field(default_factory=list)
+
+
+class EntityStreamParser:
+    """Streaming state machine extracting entities from marker text.
+
+    Args:
+        marker: Marker strategy ("streamdown", "flowtoken" or "llm-ui")
+    """
+
+    def __init__(self, marker: str):
+        self.json_mode = marker == "llm-ui"
+        self.escaped_emails = marker == "flowtoken"  # ".at." is the prescribed format
+        self.opener = JSON_OPEN if self.json_mode else "<"
+        self.rejected = 0
+
+        self._offset = 0  # Characters consumed before the current delta
+        self._buf: list[str] | None = None  # Current entity candidate (None = plain text)
+        self._buf_len = 0
+        self._start = 0
+        self._name = ""  # Tag name read so far (tag markers)
+        self._tag: str | None = None  # Confirmed tag name (tag markers)
+        self._quote: str | None = None  # Open attribute / JSON string quote
+        self._escaped = False  # Previous character was a backslash in a JSON string
+        self._depth = 0  # Open JSON objects and arrays (llm-ui)
+        self._json_complete = False  # The block's JSON decodes; only its 】 is missing
+
+    def feed(self, delta: str) -> list[Entity]:
+        """Consume a text delta and return entities closed by it."""
+        entities: list[Entity] = []
+        i, n = 0, len(delta)
+        while i < n:
+            if self._buf is None:
+                j = delta.find(self.opener, i)
+                if j < 0:
+                    break
+                self._begin(self._offset + j)
+                i = j + len(self.opener)
+            elif self.json_mode:
+                i = self._scan_json(delta, i, entities)
+            elif self._tag is None:
+                i = self._scan_tag_name(delta, i)
+            else:
+                i = self._scan_tag(delta, i, entities)
+        self._offset += n
+        return entities
+
+    def close(self) -> list[Entity]:
+        """End of stream: repair and return a trailing unterminated entity."""
+        entities: list[Entity] = []
+        if self._buf is not None and (self.json_mode or self._tag is not None):
+            self._finish(entities, terminated=False)
+        self._buf = None
+        return entities
+
+    def _begin(self, start: int) -> None:
+        self._buf = [self.opener]
+        self._buf_len = len(self.opener)
+        self._start = start
+        self._name = ""
+        self._tag = None
+        self._quote = None
+        self._escaped = False
+        self._depth = 0
+        self._json_complete = False
+
+    def _append(self, text: str) -> None:
+        self._buf.append(text)
+        self._buf_len += len(text)
+        if self._buf_len > MAX_ENTITY_CHARS:
+            self._buf = None
+
+    def _finish(self, entities: list[Entity], terminated: bool) -> None:
+        raw = "".join(self._buf)
+        self._buf = None
+        repairs = [] if terminated else ["unterminated"]
+        if self.json_mode:
+            entity = _parse_json_entity(raw, self._start, repairs)
+        else:
+            if self._quote is not None:
+                raw += self._quote
+                repairs.append("quote")
+            entity = _parse_tag_entity(raw, self._start, repairs, self.escaped_emails)
+        if entity is None:
+            self.rejected += 1
+        else:
+            entities.append(entity)
+
+    def _scan_json(self, delta: str, i: int, entities: list[Entity]) -> int:
+        """Scan an llm-ui 【{json}】 block up to its closing bracket.
+
+        Once the JSON is complete, anything but whitespace or 】 ends the
+        block, so an entity whose bracket was forgotten is not swallowed by
+        the text (or block) that follows.
+        """
+        start, n = i, len(delta)
+        while i < n:
+            ch = delta[i]
+            if ch == JSON_CLOSE:
+                self._append(delta[start:i + 1])
+                if self._buf is not None:
+                    self._finish(entities, terminated=True)
+                return i + 1
+            if ch == JSON_OPEN or (self._json_complete and not ch.isspace()):
+                # The block ended without its bracket: repair it
+                self._append(delta[start:i])
+                if self._buf is not None:
+                    self._finish(entities, terminated=False)
+                return i
+            if self._quote is not None:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == self._quote:
+                    self._quote = None
+            elif ch == '"':
+                self._quote = ch
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]" and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._json_complete = _decodes("".join(self._buf) + delta[start:i + 1])
+            i += 1
+        self._append(delta[start:])
+        return n
+
+    def _scan_tag_name(self, delta: str, i: int) -> int:
+        """Read the tag name after "<" until it is confirmed or ruled out.
+
+        Characters that rule the candidate out are not consumed, so a "<"
+        that follows is picked up again as a new candidate.
+        """
+        n = len(delta)
+        while i < n:
+            ch = delta[i]
+            if ch.isspace() or ch in "/>":
+                if self._name in TAG_TYPES:
+                    self._tag = self._name
+                else:
+                    self._buf = None
+                return i
+            name = self._name + ch.lower()
+            if not any(tag.startswith(name) for tag in TAG_TYPES):
+                self._buf = None
+                return i
+            self._name = name
+            self._append(ch)
+            i += 1
+        return i
+
+    def _scan_tag(self, delta: str, i: int, entities: list[Entity]) -> int:
+        """Scan tag attributes up to the closing ">" (quotes respected)."""
+        start, n = i, len(delta)
+        while i < n:
+            ch = delta[i]
+            if self._quote is not None:
+                if ch == self._quote:
+                    self._quote = None
+            elif ch == '"' or ch == "'":
+                self._quote = ch
+            elif ch == ">":
+                self._append(delta[start:i + 1])
+                if self._buf is not None:
+                    self._finish(entities, terminated=True)
+                return i + 1
+            elif ch == "<":
+                # Next tag began before this one closed: repair the open one
+                self._append(delta[start:i])
+                if self._buf is not None:
+                    self._finish(entities, terminated=False)
+                return i
+            i += 1
+        self._append(delta[start:])
+        return n
+
+
+def _decodes(raw: str) -> bool:
+    """Whether the block's text from its first "{" starts with valid JSON."""
+    brace = raw.find("{")
+    if brace < 0:
+        return False
+    try:
+        json.JSONDecoder().raw_decode(raw[brace:])
+    except json.JSONDecodeError:
+        return False
+    return True
+
+
+def _parse_tag_entity(
+    raw: str, offset: int, repairs: list[str], escaped_emails: bool = False
+) -> Entity | None:
+    match = re.match(r"<\s*([A-Za-z]+)", raw)
+    entity_type = TAG_TYPES.get(match.group(1).lower()) if match else None
+    if entity_type is None:
+        return None
+    attributes = {
+        name: double or single  # findall gives "" for the quote style not used
+        for name, double, single in _ATTRIBUTE_RE.findall(raw)
+    }
+    return _build_entity(entity_type, attributes, raw, offset, repairs, escaped_emails)
+
+
+def _parse_json_entity(raw: str, offset: int, repairs: list[str]) -> Entity | None:
+    body = raw[len(JSON_OPEN):]
+    if body.endswith(JSON_CLOSE):
+        body = body[:-len(JSON_CLOSE)]
+    brace = body.find("{")
+    if brace < 0:
+        return None
+    body = body[brace:].strip()
+
+    try:
+        payload = json.loads(body)
+    except json.JSONDecodeError:
+        try:
+            payload = json.loads(repair_json(body))
+        except json.JSONDecodeError:
+            return None
+        repairs.append("json")
+    if not isinstance(payload, dict):
+        return None
+
+    type_name = payload.pop("type", None)
+    try:
+        entity_type = EntityType(type_name)
+    except ValueError:
+        if "title" in payload and "date" in payload:
+            entity_type = EntityType.CALENDAR
+        elif "name" in payload:
+            entity_type = EntityType.CONTACT
+        else:
+            return None
+        repairs.append("type")
+    return _build_entity(entity_type, payload, raw, offset, repairs)
+
+
+def _build_entity(
+    entity_type: EntityType,
+    fields: dict,
+    raw: str,
+    offset: int,
+    repairs: list[str],
+    escaped_emails: bool = False,
+) -> Entity | None:
+    data = {}
+    for name in ENTITY_FIELDS[entity_type]:
+        value = fields.get(name)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            if name in fields:
+                repairs.append("empty")
+            continue
+        data[name] = str(value).strip()
+
+    if "email" in data:
+        email = repair_email(data["email"])
+        if email != data["email"]:
+            if not (escaped_emails and ".at." in data["email"]):
+                repairs.append("email")
+            data["email"] = email
+
+    if any(name not in data for name in REQUIRED_FIELDS[entity_type]):
+        return None
+    return Entity(type=entity_type, data=data, raw=raw, offset=offset, repairs=repairs)
+
+
+def repair_email(email: str) -> str:
+    """Undo ".at." style escaping and strip mailto: prefixes."""
+    if email.lower().startswith("mailto:"):
+        email = email[len("mailto:"):]
+    if "@" in email:
+        return email
+    return _EMAIL_AT_RE.sub("@", email, count=1)
+
+
+def repair_json(text: str) -> str:
+    """Close unterminated strings, objects and arrays and drop trailing commas.
+
+    A key cut off before its value ({"name": "D", "email" or ..."email":)
+    is dropped along with its separators.
+    """
+    stack: list[str] = []
+    expect_key: list[bool] = []  # Per open container: next string is an object key
+    dangling_key: int | None = None  # Start of a key that has no value yet
+    in_string = escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+            if stack and expect_key[-1]:
+                dangling_key = i
+                expect_key[-1] = False
+            else:
+                dangling_key = None
+        elif ch in "{[":
+            dangling_key = None
+            stack.append("}" if ch == "{" else "]")
+            expect_key.append(ch == "{")
+        elif ch in "}]" and stack:
+            dangling_key = None
+            stack.pop()
+            expect_key.pop()
+        elif ch == ",":
+            if stack and stack[-1] == "}":
+                expect_key[-1] = True
+        elif ch != ":" and not ch.isspace():
+            dangling_key = None  # Number, true/false/null value
+
+    if dangling_key is not None:
+        repaired = text[:dangling_key]
+    else:
+        repaired = text + ('"' if in_string else "")
+    repaired = repaired.rstrip().rstrip(",").rstrip(":")
+    repaired += "".join(reversed(stack))
+    return _TRAILING_COMMA_RE.sub(r"\1", repaired)
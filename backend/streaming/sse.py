@@ -77,6 +77,28 @@ def format_reasoning_delta(content: str, message_id: str) -> str:
     return f"data: {json.dumps(event)}\n\n"
 
 
+def format_data_part(part_type: str, data: dict, part_id: str) -> str:
+    """Format a structured data part (AI SDK v6 "data-*" part).
+
+    Used for entities parsed server-side from the text stream, so clients
+    can render them without re-parsing the markers.
+
+    Args:
+        part_type: Data part name (sent as "data-<part_type>")
+        data: JSON-serializable payload
+        part_id: Unique identifier for the part
+
+    Returns:
+        SSE formatted string: data: {...}\n\n
+    """
+    event = {
+        "type": f"data-{part_type}",
+        "id": part_id,
+        "data": data,
+    }
+    return f"data: {json.dumps(event)}\n\n"
+
+
 def format_done() -> str:
     """Format stream completion signal.
 
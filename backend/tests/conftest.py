@@ -0,0 +1,42 @@
+"""Shared test setup: tests import backend modules the way main.py does."""
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+@pytest.fixture
+def stub_mistral():
+    """Start scripts/stub_mistral.py on a free local port.
+
+    Yields a function taking create_stub_app's options and returning
+    (base_url, app); app.state.stats holds the stub's request counters.
+    """
+    import uvicorn
+
+    from scripts.stub_mistral import create_stub_app
+
+    servers = []
+
+    def start(**options):
+        app = create_stub_app(**options)
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+        thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        servers.append((server, thread))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}/v1", app
+
+    yield start
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join(timeout=5)
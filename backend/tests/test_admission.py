@@ -0,0 +1,110 @@
+"""Tests for admission control lanes (runtime/admission.py)."""
+import asyncio
+
+import httpx
+import pytest
+
+from runtime.admission import AdmissionController, AdmissionRejected, Lane
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_shed_with_429_and_retry_after(monkeypatch):
+    import main
+
+    async def stream_agent_response(*args):
+        yield "data: [DONE]\n\n"
+
+    controller = AdmissionController({"chat": Lane("chat", max_in_flight=1, max_queue=0, queue_timeout=5)})
+    monkeypatch.setattr(main, "get_admission_controller", lambda: controller)
+    monkeypatch.setattr(main, "stream_agent_response", stream_agent_response)
+    body = {"messages": [{"id": "u1", "role": "user", "content": "hi"}]}
+
+    ticket = await controller.acquire("chat")
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/api/chat", json=body)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.json()["detail"] == {"error": "Server busy", "lane": "chat", "reason": "queue_full"}
+
+        ticket.release()
+        assert (await client.post("/api/chat", json=body)).status_code == 200
+    assert controller.lane("chat").in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_release_hands_the_slot_to_the_oldest_waiter():
+    lane = Lane("test", max_in_flight=1, max_queue=3, queue_timeout=5)
+    held = await lane.acquire()
+    admitted = []
+
+    async def wait(i):
+        ticket = await lane.acquire()
+        admitted.append(i)
+        return ticket
+
+    tasks = []
+    for i in range(3):
+        tasks.append(asyncio.create_task(wait(i)))
+        await _settle()
+    assert lane.queue_length == 3
+
+    for task in tasks:
+        held.release()
+        held = await task
+        assert admitted[-1] == tasks.index(task)
+        assert lane.in_flight == 1  # Handed over, never freed in between
+    held.release()
+
+    assert admitted == [0, 1, 2]
+    assert lane.in_flight == 0 and lane.queue_length == 0
+
+
+@pytest.mark.asyncio
+async def test_waiter_is_shed_after_the_queue_timeout():
+    lane = Lane("test", max_in_flight=1, max_queue=1, queue_timeout=0.05)
+    held = await lane.acquire()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await lane.acquire()
+
+    assert rejected.value.reason == "timeout" and rejected.value.retry_after >= 1
+    assert lane.queue_length == 0
+    held.release()
+    assert lane.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    lane = Lane("test", max_in_flight=1, max_queue=2, queue_timeout=5)
+    held = await lane.acquire()
+    waiter = asyncio.create_task(lane.acquire())
+    await _settle()
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert lane.queue_length == 0
+    held.release()
+    assert lane.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_waiter_cancelled_after_being_handed_the_slot_gives_it_back():
+    lane = Lane("test", max_in_flight=1, max_queue=2, queue_timeout=5)
+    held = await lane.acquire()
+    waiter = asyncio.create_task(lane.acquire())
+    await _settle()
+
+    held.release()  # Hands the slot over before the waiter runs again
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert lane.in_flight == 0 and lane.queue_length == 0
@@ -0,0 +1,76 @@
+"""Tests for batched hybrid retrieval (rag/batch.py) and its request schema."""
+import pytest
+from langchain_core.documents import Document
+from pydantic import ValidationError
+
+from config import get_settings
+from models.schemas import BatchRetrievalRequest
+from rag import batch
+from rag.bm25 import build_bm25_index
+from rag.chunk_store import ChunkStore
+from rag.retriever import IndexSnapshot
+
+DOCUMENTS = [
+    Document(
+        id=f"doc-{i}",
+        page_content=f"Bürgeramt office {i} handles registration topic{i} and permit{i}",
+        metadata={"source": f"source-{i}.md", "type": "general"},
+    )
+    for i in range(30)
+]
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    chunks = ChunkStore.from_documents(DOCUMENTS)
+    snapshot = IndexSnapshot(version=1, chunks=chunks, bm25=build_bm25_index(chunks))
+    requested = {}
+
+    def search_vectors(vectors, k):
+        requested["vector_k"] = k
+        return [[(doc, 0.1) for doc in DOCUMENTS[:k]] for _ in vectors]
+
+    class Embeddings:
+        def embed_documents(self, texts):
+            return [[0.0] for _ in texts]
+
+    monkeypatch.setattr(batch, "get_index_snapshot", lambda: snapshot)
+    monkeypatch.setattr(batch, "get_embeddings", Embeddings)
+    monkeypatch.setattr(batch, "search_vectors", search_vectors)
+    monkeypatch.setattr(batch, "vector_fetch_k", lambda k: k)
+    monkeypatch.setattr(get_settings(), "retrieval_k", 5)
+    return requested
+
+
+@pytest.mark.parametrize("k", [0, -3, get_settings().retrieve_batch_max_k + 1])
+def test_out_of_range_k_is_rejected(k):
+    with pytest.raises(ValidationError):
+        BatchRetrievalRequest(queries=["registration"], k=k)
+
+
+def test_k_limit_is_read_at_validation_time(monkeypatch):
+    monkeypatch.setattr(get_settings(), "retrieve_batch_max_k", 10)
+
+    assert BatchRetrievalRequest(queries=["registration"], k=10).k == 10
+    with pytest.raises(ValidationError, match="at most 10"):
+        BatchRetrievalRequest(queries=["registration"], k=11)
+
+
+@pytest.mark.parametrize("k", [-1, get_settings().retrieve_batch_max_k + 1])
+def test_batch_retrieve_rejects_out_of_range_k(snapshot, k):
+    with pytest.raises(ValueError):
+        batch.batch_retrieve(["registration"], k=k)
+
+
+def test_k_above_retrieval_k_is_not_capped(snapshot):
+    results, _ = batch.batch_retrieve(["Bürgeramt registration office"], k=12)
+
+    assert snapshot["vector_k"] == 12
+    assert len(results[0]) == 12
+
+
+def test_default_k_is_retrieval_k(snapshot):
+    results, _ = batch.batch_retrieve(["Bürgeramt registration office"])
+
+    assert snapshot["vector_k"] == 5
+    assert len(results[0]) == 5
@@ -0,0 +1,29 @@
+"""Tests for streaming the knowledge base into chunks (rag/chunking.py)."""
+from rag.chunking import CHUNK_SIZE, FILES_PER_TASK, PARALLEL_MIN_FILES, iter_chunks, iter_knowledge_files
+
+
+def _write_corpus(root, files: int) -> None:
+    """Markdown files across type directories, some with sections over CHUNK_SIZE."""
+    for i in range(files):
+        kind = ("contacts", "events", "general")[i % 3]
+        path = root / kind / f"entry-{i:03d}.md"
+        path.parent.mkdir(exist_ok=True)
+        long_section = " ".join(f"Sentence {j} of entry {i} about city services." for j in range(i % 4 * 20))
+        path.write_text(
+            f"# Department {i}\n\n## Section {i}\n\n### Entry {i}\n"
+            f"Phone +49 30 {i:04d}, email office{i}@berlin.de.\n\n"
+            f"## Details\n{long_section}\n",
+            encoding="utf-8",
+        )
+
+
+def test_parallel_chunking_matches_serial(tmp_path):
+    _write_corpus(tmp_path, PARALLEL_MIN_FILES + FILES_PER_TASK * 2 + 3)
+    assert len(iter_knowledge_files(tmp_path)) >= PARALLEL_MIN_FILES
+
+    serial = [(doc.id, doc.page_content, doc.metadata) for doc in iter_chunks(tmp_path, workers=1)]
+    parallel = [(doc.id, doc.page_content, doc.metadata) for doc in iter_chunks(tmp_path, workers=2)]
+
+    assert parallel == serial
+    assert any(len(text) > CHUNK_SIZE // 2 and metadata.get("chunk_index") for _, text, metadata in serial)
+    assert len({chunk_id for chunk_id, _, _ in serial}) == len(serial)
@@ -0,0 +1,94 @@
+"""Tests for packing retrieved chunks into a tool observation (agent/context.py)."""
+from langchain_core.documents import Document
+
+from agent.context import ELLIPSIS, MAX_CHUNKS, MIN_ENTRY_TOKENS, SEPARATOR, pack_context
+from agent.tokens import estimate_tokens
+from rag.chunk_store import ChunkStore
+
+
+def _store(*chunks) -> ChunkStore:
+    """Chunks given as (entry, chunk_index, text), all in one source and section."""
+    return ChunkStore.from_documents(
+        Document(
+            id=f"chunk-{i}",
+            page_content=text,
+            metadata={"source": "general/services.md", "title": "Services", "Section": "Offices",
+                      "Entry": entry, "chunk_index": index},
+        )
+        for i, (entry, index, text) in enumerate(chunks)
+    )
+
+
+def _lines(word: str, count: int) -> str:
+    return "\n".join(f"{word} line {i} with some words to fill it up." for i in range(count))
+
+
+def test_entries_are_ordered_by_their_best_score():
+    chunks = _store(
+        ("Parks", 0, "Parks open at sunrise."),
+        ("Waste", 0, "Bins are collected on Tuesdays."),
+        ("Parks", 1, "Dogs must be kept on a leash."),
+    )
+
+    packed = pack_context(chunks, [(0, 0.2), (1, 0.9), (2, 0.5)], max_tokens=500)
+
+    assert packed.entries == 2 and packed.chunks == 3
+    assert packed.text.index("### Offices > Waste") < packed.text.index("### Offices > Parks")
+
+
+def test_adjacent_pieces_are_merged_without_the_overlap():
+    chunks = _store(
+        ("Parks", 0, "### Parks\nParks open at sunrise and close at sunset every day"),
+        ("Parks", 1, "### Parks\nclose at sunset every day. Dogs must be kept on a leash."),
+        ("Parks", 3, "Barbecues are allowed in marked areas."),
+    )
+
+    packed = pack_context(chunks, [(1, 0.9), (2, 0.8), (0, 0.7)], max_tokens=500)
+
+    assert packed.text == (
+        "### Offices > Parks\n"
+        "Parks open at sunrise and close at sunset every day. Dogs must be kept on a leash."
+        f"{ELLIPSIS}Barbecues are allowed in marked areas."
+    )
+
+
+def test_entry_crossing_the_budget_is_cut_at_a_line_boundary():
+    text = _lines("Waste", 20)
+    chunks = _store(("Waste", 0, text))
+
+    packed = pack_context(chunks, [(0, 1.0)], max_tokens=60)
+
+    assert packed.text.endswith(" …")
+    kept = packed.text[:-len(" …")]
+    assert f"### Offices > Waste\n{text}".startswith(kept + "\n")
+    assert estimate_tokens(kept) <= 60
+
+
+def test_entry_is_skipped_when_less_than_min_entry_tokens_remain():
+    long_entry = ("Waste", 0, _lines("Waste", 10))
+    budget = estimate_tokens(f"### Offices > Parks\n{_lines('Parks', 6)}")
+
+    # The remainder after the first entry is below the cutoff: no stub of the second
+    nearly_full = pack_context(_store(("Parks", 0, _lines("Parks", 6)), long_entry), [(0, 0.9), (1, 0.8)],
+                               max_tokens=budget + MIN_ENTRY_TOKENS - 1)
+    assert nearly_full.entries == 1 and "Waste" not in nearly_full.text
+
+    # Enough room left: the second entry is cut instead
+    room_left = pack_context(_store(("Parks", 0, _lines("Parks", 6)), long_entry), [(0, 0.9), (1, 0.8)],
+                             max_tokens=budget + 3 * MIN_ENTRY_TOKENS)
+    assert room_left.entries == 2 and room_left.text.endswith(" …")
+    assert room_left.tokens_after <= budget + 3 * MIN_ENTRY_TOKENS + 1
+
+
+def test_reports_tokens_before_and_after_packing():
+    texts = [f"### Services\n#### Office {i}\n{_lines(f'Office {i}', 2)}" for i in range(MAX_CHUNKS + 1)]
+    chunks = _store(*((f"Office {i}", 0, text) for i, text in enumerate(texts)))
+    results = [(row, 1.0 - row / 10) for row in range(len(texts))]
+
+    packed = pack_context(chunks, results, max_tokens=10_000)
+
+    # Before: the top MAX_CHUNKS chunks joined verbatim; after: the packed text
+    assert packed.tokens_before == estimate_tokens(SEPARATOR.join(texts[:MAX_CHUNKS]))
+    assert packed.tokens_after == estimate_tokens(packed.text)
+    assert packed.entries == MAX_CHUNKS and "#### Office" not in packed.text
+    assert packed.tokens_after < packed.tokens_before
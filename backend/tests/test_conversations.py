@@ -0,0 +1,125 @@
+"""Tests for the conversation store: issued IDs, activity tracking and TTL eviction."""
+import time
+
+import httpx
+import pytest
+import pytest_asyncio
+
+import agent.conversations as conversations
+from config import get_settings
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("CONVERSATION_DB_PATH", str(tmp_path / "conversations.sqlite"))
+    monkeypatch.setenv("CONVERSATION_TTL_SECONDS", "60")
+    get_settings.cache_clear()
+    saver = await conversations.open_conversation_store()
+    yield saver
+    await conversations.close_conversation_store()
+    get_settings.cache_clear()
+
+
+async def _set_last_seen(saver, thread_id: str, last_seen: float) -> None:
+    await saver.conn.execute(
+        "UPDATE conversation_activity SET last_seen = ? WHERE thread_id = ?", (last_seen, thread_id)
+    )
+    await saver.conn.commit()
+
+
+async def _count(saver, table: str, thread_id: str) -> int:
+    async with saver.conn.execute(f"SELECT COUNT(*) FROM {table} WHERE thread_id = ?", (thread_id,)) as cursor:
+        return (await cursor.fetchone())[0]
+
+
+async def _expired_conversation(saver) -> str:
+    """An issued conversation with one stored write, last used an hour ago."""
+    conversation_id = await conversations.create_conversation()
+    await _set_last_seen(saver, conversation_id, time.time() - 3600)
+    await saver.conn.execute(
+        "INSERT INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value) "
+        "VALUES (?, '', 'c1', 't1', 0, 'messages', 'json', x'00')",
+        (conversation_id,),
+    )
+    await saver.conn.commit()
+    return conversation_id
+
+
+@pytest.mark.asyncio
+async def test_issued_ids_exist_until_they_expire(store):
+    first = await conversations.create_conversation()
+    second = await conversations.create_conversation()
+
+    assert first != second and first.startswith("conv-") and len(first) > 30
+    assert await conversations.conversation_exists(first)
+    assert not await conversations.conversation_exists("conv-guessed")
+
+    await _set_last_seen(store, first, time.time() - 3600)
+    assert not await conversations.conversation_exists(first)
+
+
+@pytest.mark.asyncio
+async def test_sweep_evicts_expired_threads_through_the_saver(store):
+    expired = await _expired_conversation(store)
+    active = await conversations.create_conversation()
+
+    assert await conversations.evict_expired_conversations() == 1
+    assert await _count(store, "writes", expired) == 0
+    assert await _count(store, "conversation_activity", expired) == 0
+    assert await _count(store, "conversation_activity", active) == 1
+
+
+@pytest.mark.asyncio
+async def test_conversation_touched_after_selection_is_kept(store):
+    conversation_id = await _expired_conversation(store)
+    cutoff = time.time() - 60
+
+    # The sweep selected it with this cutoff; a request uses it before the delete
+    await conversations.touch_conversation(conversation_id)
+
+    assert not await conversations._evict_if_expired(conversation_id, cutoff)
+    assert await _count(store, "writes", conversation_id) == 1
+    assert await conversations.conversation_exists(conversation_id)
+
+
+@pytest_asyncio.fixture
+async def chat_client(store, monkeypatch):
+    """/api/chat with the agent run replaced by a stub recording its conversation ID."""
+    import main
+
+    runs = []
+
+    async def stream_agent_response(messages, message_id, marker, conversation_id=None, *args):
+        runs.append(conversation_id)
+        yield "data: [DONE]\n\n"
+
+    monkeypatch.setattr(main, "stream_agent_response", stream_agent_response)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client, runs
+
+
+def _chat_body(**fields) -> dict:
+    return {"messages": [{"id": "u1", "role": "user", "content": "hi"}], **fields}
+
+
+@pytest.mark.asyncio
+async def test_chat_issues_an_id_and_rejects_unknown_ones(chat_client):
+    client, runs = chat_client
+
+    response = await client.post("/api/chat", json=_chat_body(new_conversation=True))
+    assert response.status_code == 200
+    conversation_id = response.headers["X-Conversation-Id"]
+    assert runs == [conversation_id]
+
+    response = await client.post("/api/chat", json=_chat_body(conversation_id=conversation_id))
+    assert response.status_code == 200
+    assert runs == [conversation_id, conversation_id]
+
+    response = await client.post("/api/chat", json=_chat_body(conversation_id="my-own-thread"))
+    assert response.status_code == 404
+    assert len(runs) == 2
+
+    response = await client.post("/api/chat", json=_chat_body())
+    assert "X-Conversation-Id" not in response.headers
+    assert runs[-1] is None
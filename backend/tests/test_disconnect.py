@@ -0,0 +1,122 @@
+"""Tests for cancelling a chat stream when the client drops (streaming/disconnect.py)."""
+import asyncio
+import contextvars
+import json
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from streaming import ClientDisconnected, cancel_on_disconnect
+
+
+class DroppableRequest:
+    """Stand-in for a Starlette Request whose client can vanish mid-stream."""
+
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+@pytest.mark.asyncio
+async def test_drop_cancels_the_pending_step_and_closes_the_source():
+    request = DroppableRequest()
+    state = {"cancelled": False, "closed": False}
+
+    async def source():
+        try:
+            yield "first"
+            await asyncio.sleep(60)  # A slow step (LLM call, retrieval)
+            yield "never"
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+        finally:
+            state["closed"] = True
+
+    received = []
+    started = time.perf_counter()
+    with pytest.raises(ClientDisconnected):
+        async for event in cancel_on_disconnect(request, source(), poll_interval=0.01):
+            received.append(event)
+            request.disconnected = True
+
+    assert received == ["first"]
+    assert state == {"cancelled": True, "closed": True}
+    assert time.perf_counter() - started < 1
+
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+@pytest.mark.asyncio
+async def test_source_runs_in_the_callers_task_and_context():
+    caller = asyncio.current_task()
+    request_id.set("req-1")
+    steps = []
+
+    async def source():
+        for i in range(50):
+            steps.append((asyncio.current_task() is caller, request_id.get(), len(asyncio.all_tasks())))
+            yield i
+
+    received = [event async for event in cancel_on_disconnect(DroppableRequest(), source(), poll_interval=0.01)]
+
+    assert received == list(range(50))
+    assert all(step == (True, "req-1", steps[0][2]) for step in steps)  # One watcher task, not one per event
+    await asyncio.sleep(0)
+    assert asyncio.all_tasks() == {caller}
+
+
+@pytest.mark.asyncio
+async def test_abrupt_drop_mid_answer_cancels_the_agent_run(stub_mistral, monkeypatch):
+    base_url, stub = stub_mistral(tokens=200, token_delay=0.02, first_token_delay=0)
+    monkeypatch.setenv("MISTRAL_BASE_URL", base_url)
+    monkeypatch.setenv("MISTRAL_API_KEY", "stub")
+    monkeypatch.setenv("MISTRAL_RATE_LIMIT_PER_SECOND", "0")
+
+    import agent.llm_client as llm_client
+    import main
+    from config import get_settings
+    from runtime import get_metrics
+
+    get_settings.cache_clear()
+    await llm_client.close_mistral_async_client()
+    monkeypatch.setattr(main.settings, "disconnect_poll_interval_seconds", 0.01)
+
+    metrics = get_metrics()
+    metrics.observe("chat.completion_tokens", 500)  # Typical answer length for the saved-token estimate
+    counters_before = metrics.snapshot()["counters"]
+
+    request = DroppableRequest()
+    events = []
+    try:
+        async for event in main.stream_agent_response(
+            [HumanMessage(content="hi")], "msg-test", "streamdown", http_request=request
+        ):
+            events.append(event)
+            if sum('"text-delta"' in e for e in events) == 3:
+                request.disconnected = True  # The client goes away mid-answer
+
+        # The stream stops without finishing the answer
+        assert not any("[DONE]" in e for e in events)
+        deltas = [json.loads(e[len("data: "):])["delta"] for e in events if '"text-delta"' in e]
+        assert 3 <= len(deltas) < 200
+
+        # The upstream completion stream was closed: the stub stops streaming
+        # long before its 200 tokens (4s) would have finished
+        deadline = time.monotonic() + 2
+        while stub.state.stats["active"] and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        assert stub.state.stats["active"] == 0
+        assert stub.state.stats["requests"] == 1
+
+        counters = metrics.snapshot()["counters"]
+        assert counters.get("chat.cancelled", 0) == counters_before.get("chat.cancelled", 0) + 1
+        assert counters["chat.tokens_saved_estimate"] > counters_before.get("chat.tokens_saved_estimate", 0)
+        assert counters["chat.cancelled_tokens_streamed"] > counters_before.get("chat.cancelled_tokens_streamed", 0)
+    finally:
+        await llm_client.close_mistral_async_client()
+        get_settings.cache_clear()
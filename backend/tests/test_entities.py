@@ -0,0 +1,121 @@
+"""Tests for repairing truncated entity markers (streaming/entities.py)."""
+import json
+
+import pytest
+
+from streaming import EntityStreamParser
+from streaming.entities import EntityType, repair_email, repair_json
+
+
+@pytest.mark.parametrize(
+    "truncated, expected",
+    [
+        ('{"type":"contact","name":"D","email"', {"type": "contact", "name": "D"}),
+        ('{"type":"contact","name":"D","email":', {"type": "contact", "name": "D"}),
+        ('{"type":"contact","name":"D","email": ', {"type": "contact", "name": "D"}),
+        ('{"type":"contact","name":"D","ema', {"type": "contact", "name": "D"}),
+        ('{"type":"contact","name":"D",', {"type": "contact", "name": "D"}),
+        ('{"type":"contact","name":"D","email":"d@ber', {"type": "contact", "name": "D", "email": "d@ber"}),
+        ('{"type":"calendar","tags":["a","b', {"type": "calendar", "tags": ["a", "b"]}),
+        ('{"type":"calendar","n":3,"x":{"k"', {"type": "calendar", "n": 3, "x": {}}),
+        ('{"name":"a, \\"b\\": c","d"', {"name": 'a, "b": c'}),
+    ],
+)
+def test_repair_json_drops_a_dangling_key(truncated, expected):
+    assert json.loads(repair_json(truncated)) == expected
+
+
+def test_entity_cut_off_after_a_key_is_kept_at_end_of_stream():
+    parser = EntityStreamParser("llm-ui")
+    assert parser.feed('Here you go: 【{"type":"contact","name":"Dana Weber","email"') == []
+
+    entities = parser.close()
+
+    assert len(entities) == 1
+    assert entities[0].data["name"] == "Dana Weber"
+    assert "email" not in entities[0].data
+    assert "json" in entities[0].repairs
+
+
+def _parse(marker: str, text: str, chunk_size: int) -> list:
+    """Entities of a stream fed in chunk_size pieces."""
+    parser = EntityStreamParser(marker)
+    entities = []
+    for start in range(0, len(text), chunk_size):
+        entities += parser.feed(text[start:start + chunk_size])
+    return entities + parser.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 1000])
+def test_llm_ui_block_missing_its_bracket_ends_with_its_json(chunk_size):
+    text = 'See 【{"type":"contact","name":"A"} trailing 【{"name":"B"}】 and 【{"name":"C"}\n】.'
+
+    entities = _parse("llm-ui", text, chunk_size)
+
+    assert [e.data["name"] for e in entities] == ["A", "B", "C"]
+    assert [e.repairs for e in entities] == [["unterminated"], ["type"], ["type"]]
+    assert entities[0].raw == '【{"type":"contact","name":"A"} '
+    assert entities[1].offset == text.index('【{"name":"B"}')
+
+
+def test_llm_ui_closing_bracket_inside_a_string_still_closes_the_block():
+    entities = _parse("llm-ui", '【{"type":"contact","name":"A】 more', 1000)
+
+    assert [(e.data, e.repairs) for e in entities] == [({"name": "A"}, ["json"])]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1000])
+def test_tag_entities_split_across_chunks(chunk_size):
+    text = (
+        'Call <contactcard name="Dana Weber" email="dana@berlin.de" phone="+49 30 1234" /> or '
+        "<calendarevent title='Karneval' date=\"2026-05-24\" location=\"Blücherplatz\"/> <b>bold</b>"
+    )
+
+    entities = _parse("streamdown", text, chunk_size)
+
+    assert [(e.type, e.data) for e in entities] == [
+        (EntityType.CONTACT, {"name": "Dana Weber", "email": "dana@berlin.de", "phone": "+49 30 1234"}),
+        (EntityType.CALENDAR, {"title": "Karneval", "date": "2026-05-24", "location": "Blücherplatz"}),
+    ]
+    assert all(e.repairs == [] for e in entities)
+    assert entities[1].offset == text.index("<calendarevent")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 1000])
+def test_multi_line_flowtoken_tag(chunk_size):
+    text = (
+        "Here:\n<contactcard\n  name=\"Dana Weber\"\n  email=\"dana.weber.at.berlin.de\"\n"
+        "  address=\"Karl-Marx-Allee 31,\n10178 Berlin\"\n/>\nDone."
+    )
+
+    [entity] = _parse("flowtoken", text, chunk_size)
+
+    assert entity.data == {
+        "name": "Dana Weber",
+        "email": "dana.weber@berlin.de",
+        "address": "Karl-Marx-Allee 31,\n10178 Berlin",
+    }
+    assert entity.repairs == []  # ".at." is the prescribed flowtoken format
+
+
+@pytest.mark.parametrize(
+    "email, expected",
+    [
+        ("dana(at)berlin.de", "dana@berlin.de"),
+        ("dana (at) berlin.de", "dana@berlin.de"),
+        ("dana[AT]berlin.de", "dana@berlin.de"),
+        ("dana.at.berlin.de", "dana@berlin.de"),
+        ("dana at berlin.de", "dana@berlin.de"),
+        ("mailto:dana@berlin.de", "dana@berlin.de"),
+        ("dana@berlin.de", "dana@berlin.de"),
+    ],
+)
+def test_repair_email(email, expected):
+    assert repair_email(email) == expected
+
+
+def test_streamdown_email_repair_is_reported():
+    [entity] = _parse("streamdown", '<contactcard name="Dana" email="dana(at)berlin.de" />', 1000)
+
+    assert entity.data["email"] == "dana@berlin.de"
+    assert entity.repairs == ["email"]
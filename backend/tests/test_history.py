@@ -0,0 +1,155 @@
+"""Tests for conversation history compaction (agent/history.py)."""
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from agent.history import SUMMARY_HEADER, _summary_cache, compact_history, summarize_message
+from agent.tokens import estimate_messages_tokens
+
+
+def _tool_turn(index: int) -> list:
+    """A turn whose answer has both text and a tool call."""
+    call_id = f"call-{index}"
+    return [
+        HumanMessage(content=f"question {index}", id=f"h{index}"),
+        AIMessage(
+            content=f"Let me look that up ({index}).",
+            id=f"a{index}",
+            tool_calls=[{"name": "search_knowledge_base", "args": {"query": f"q{index}"}, "id": call_id}],
+        ),
+        ToolMessage(content=f"observation {index}", tool_call_id=call_id, id=f"t{index}"),
+        AIMessage(content=f"answer {index}", id=f"r{index}"),
+    ]
+
+
+def _tool_call_ids(messages) -> set[str]:
+    return {call["id"] for m in messages if isinstance(m, AIMessage) for call in m.tool_calls}
+
+
+def _tool_result_ids(messages) -> set[str]:
+    return {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+
+
+def _chat_turn(index: int, words: int = 60) -> list:
+    """A plain question/answer turn of roughly words * 2 tokens."""
+    filler = " ".join(f"detail{index}-{i}" for i in range(words))
+    return [
+        HumanMessage(content=f"question {index}: {filler}", id=f"h{index}"),
+        AIMessage(content=f"answer {index}: {filler}", id=f"r{index}"),
+    ]
+
+
+def _assert_tool_pairs_intact(messages) -> None:
+    """Every tool call is answered by a later ToolMessage, and every ToolMessage answers an earlier call."""
+    called = set()
+    for message in messages:
+        if isinstance(message, ToolMessage):
+            assert message.tool_call_id in called, f"orphaned result {message.tool_call_id}"
+        elif isinstance(message, AIMessage):
+            called |= {call["id"] for call in message.tool_calls}
+    assert _tool_call_ids(messages) == _tool_result_ids(messages)
+
+
+def test_history_under_budget_is_untouched():
+    system = SystemMessage(content="You are a helpful assistant.")
+    history = [system] + [m for i in range(5) for m in _chat_turn(i)]
+
+    result = compact_history(history, max_tokens=100_000, keep_recent_turns=2)
+
+    assert result.messages == history
+    assert all(a is b for a, b in zip(result.messages, history))
+    assert result.tokens_after == result.tokens_before == estimate_messages_tokens(history)
+
+    # Tool traffic within the recent turns is kept as it is
+    recent = _tool_turn(0) + _tool_turn(1)
+    assert compact_history(recent, max_tokens=100_000, keep_recent_turns=2).messages == recent
+
+
+def test_older_turns_are_summarized_into_one_system_message():
+    _summary_cache.clear()
+    system = SystemMessage(content="You are a helpful assistant.")
+    history = [system] + [m for i in range(8) for m in _chat_turn(i)]
+    budget = estimate_messages_tokens(history) // 2
+
+    result = compact_history(history, max_tokens=budget, keep_recent_turns=2, summary_max_tokens=30)
+
+    assert result.messages[0] is system
+    summaries = [m for m in result.messages[1:] if isinstance(m, SystemMessage)]
+    assert len(summaries) == 1 and result.messages[1] is summaries[0]
+    assert summaries[0].content.startswith(SUMMARY_HEADER)
+    assert "question 5" in summaries[0].content and "answer 5" in summaries[0].content
+    assert result.messages[2:] == history[-4:]  # The recent turns, verbatim
+
+
+def test_tokens_after_stay_within_the_budget():
+    history = [SystemMessage(content="You are a helpful assistant.")] + [m for i in range(10) for m in _chat_turn(i)]
+    floor = estimate_messages_tokens(history[:1] + history[-2:])  # Leading + the recent turn, kept verbatim
+
+    for budget in range(floor, estimate_messages_tokens(history), 3):
+        result = compact_history(history, max_tokens=budget, keep_recent_turns=1, summary_max_tokens=40)
+
+        assert result.tokens_after == estimate_messages_tokens(result.messages)
+        assert result.tokens_after <= budget, budget
+        assert result.tokens_before == estimate_messages_tokens(history)
+
+    # Below the verbatim part, everything older is dropped
+    result = compact_history(history, max_tokens=floor // 2, keep_recent_turns=1, summary_max_tokens=40)
+    assert result.messages == history[:1] + history[-2:]
+
+
+@pytest.mark.parametrize("budget", [200, 500, 1000, 100_000])
+@pytest.mark.parametrize("keep_recent_turns", [1, 2, 3])
+def test_tool_calls_and_results_are_never_split(budget, keep_recent_turns):
+    history = []
+    for i in range(6):
+        history += _tool_turn(i) if i % 2 == 0 else _chat_turn(i, words=20)
+    # A turn with two parallel calls
+    history += [
+        HumanMessage(content="two things", id="h-par"),
+        AIMessage(content="", id="a-par", tool_calls=[
+            {"name": "search_knowledge_base", "args": {"query": "a"}, "id": "call-a"},
+            {"name": "search_knowledge_base", "args": {"query": "b"}, "id": "call-b"},
+        ]),
+        ToolMessage(content="observation a", tool_call_id="call-a", id="t-a"),
+        ToolMessage(content="observation b", tool_call_id="call-b", id="t-b"),
+        AIMessage(content="both answers", id="r-par"),
+    ]
+
+    result = compact_history(history, max_tokens=budget, keep_recent_turns=keep_recent_turns, summary_max_tokens=30)
+
+    _assert_tool_pairs_intact(result.messages)
+    assert {"call-a", "call-b"} <= _tool_call_ids(result.messages)
+
+
+def test_old_text_and_tool_call_messages_lose_their_tool_calls():
+    history = [m for i in range(4) for m in _tool_turn(i)]
+
+    result = compact_history(history, max_tokens=100_000, keep_recent_turns=1)
+
+    # Every remaining tool call still has its result, and vice versa
+    assert _tool_call_ids(result.messages) == _tool_result_ids(result.messages) == {"call-3"}
+    texts = [m.content for m in result.messages if isinstance(m, AIMessage)]
+    assert "Let me look that up (0)." in texts
+    for message in result.messages[:-4]:
+        assert not getattr(message, "tool_calls", None)
+        assert "tool_calls" not in message.additional_kwargs
+
+
+def test_raw_tool_calls_in_additional_kwargs_are_dropped_too():
+    turn = _tool_turn(0)
+    turn[1].additional_kwargs["tool_calls"] = [{"id": "call-0", "function": {"name": "search_knowledge_base"}}]
+    history = turn + _tool_turn(1)
+
+    result = compact_history(history, max_tokens=100_000, keep_recent_turns=1)
+
+    old_ai = next(m for m in result.messages if m.id == "a0")
+    assert not old_ai.tool_calls
+    assert "tool_calls" not in old_ai.additional_kwargs
+
+
+def test_summary_cache_is_keyed_by_content_not_only_id():
+    _summary_cache.clear()
+    original = HumanMessage(content="Where is the town hall?", id="client-1")
+    edited = HumanMessage(content="Where is the swimming pool?", id="client-1")
+
+    assert "town hall" in summarize_message(original, max_tokens=60)
+    assert "swimming pool" in summarize_message(edited, max_tokens=60)
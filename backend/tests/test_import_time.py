@@ -0,0 +1,57 @@
+"""Tests that `import main` stays cheap (see scripts/profile_imports.py).
+
+Heavy dependencies are imported inside the getters and factories that need
+them, so a worker imports the app quickly and warm-up does the rest. The
+module check is exact; the time budget is generous because it depends on
+the machine (override with IMPORT_TIME_BUDGET_SECONDS).
+"""
+import json
+import os
+import subprocess
+import sys
+
+from scripts.profile_imports import BACKEND_DIR, profile_imports
+
+IMPORT_TIME_BUDGET_SECONDS = float(os.environ.get("IMPORT_TIME_BUDGET_SECONDS", "1.0"))
+
+# Must not be imported by `import main`
+HEAVY_MODULES = [
+    "numpy",
+    "torch",
+    "sentence_transformers",
+    "onnxruntime",
+    "chromadb",
+    "langchain_chroma",
+    "nltk",
+    "langchain_text_splitters",
+    "langchain_core.retrievers",
+    "langchain_core.prompts",
+    "langchain_classic",
+    "langchain_mistralai",
+    "langgraph",
+    "rag.bm25",
+    "rag.chunk_store",
+    "rag.numpy_store",
+]
+
+
+def test_import_main_stays_within_the_time_budget():
+    timings = profile_imports("main")
+    total_us = next(cumulative for name, _, cumulative in timings if name.strip() == "main")
+
+    slowest = sorted(timings, key=lambda t: t[2], reverse=True)[1:6]
+    assert total_us / 1e6 <= IMPORT_TIME_BUDGET_SECONDS, (
+        f"import main took {total_us / 1e6:.2f}s; slowest: {[(name.strip(), cum) for name, _, cum in slowest]}"
+    )
+
+
+def test_import_main_does_not_load_heavy_dependencies():
+    code = (
+        "import json, sys; before = set(sys.modules); import main; "
+        "print(json.dumps(sorted(set(sys.modules) - before)))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    loaded = set(json.loads(result.stdout.splitlines()[-1]))
+
+    assert [m for m in HEAVY_MODULES if m in loaded] == []
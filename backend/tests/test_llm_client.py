@@ -0,0 +1,99 @@
+"""Tests for the shared Mistral HTTP client (agent/llm_client.py) against the local stub."""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from agent.llm_client import ThrottledTransport, TokenBucket
+
+COMPLETION = {"model": "stub", "messages": [{"role": "user", "content": "hi"}]}
+
+
+def make_client(base_url: str, max_concurrency: int = 16, rate: float = 0.0, burst: int = 1, max_retries: int = 0):
+    transport = ThrottledTransport(
+        httpx.AsyncHTTPTransport(),
+        max_concurrency=max_concurrency,
+        rate_limiter=TokenBucket(rate, burst),
+        max_retries=max_retries,
+    )
+    # No backoff between attempts: the tests check which attempts are made
+    transport._jitter = lambda retry_state: 0.0
+    return httpx.AsyncClient(base_url=base_url, transport=transport, timeout=10), transport
+
+
+def assert_slots_released(transport: ThrottledTransport, max_concurrency: int) -> None:
+    assert transport._in_flight == 0
+    assert transport._semaphore._value == max_concurrency
+
+
+async def stream_completion(client: httpx.AsyncClient) -> str:
+    async with client.stream("POST", "/chat/completions", json={**COMPLETION, "stream": True}) as response:
+        return "".join([chunk async for chunk in response.aiter_text()])
+
+
+@pytest.mark.asyncio
+async def test_semaphore_bounds_concurrent_streams(stub_mistral):
+    base_url, stub = stub_mistral(tokens=5, token_delay=0.02, first_token_delay=0.05)
+    client, transport = make_client(base_url, max_concurrency=2)
+    async with client:
+        bodies = await asyncio.gather(*(stream_completion(client) for _ in range(8)))
+
+    assert all("[DONE]" in body for body in bodies)
+    # Streaming responses hold their slot until closed
+    assert stub.state.stats["max_active"] == 2
+    assert_slots_released(transport, 2)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_requests(stub_mistral):
+    base_url, stub = stub_mistral(tokens=1, token_delay=0, first_token_delay=0)
+    client, _ = make_client(base_url, rate=20, burst=1)
+    started = time.perf_counter()
+    async with client:
+        responses = await asyncio.gather(*(client.post("/chat/completions", json=COMPLETION) for _ in range(6)))
+    elapsed = time.perf_counter() - started
+
+    assert [r.status_code for r in responses] == [200] * 6
+    # One token up front, then one every 1/20 s
+    assert elapsed >= 5 / 20 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_retries_429_and_503_then_streams(stub_mistral):
+    base_url, stub = stub_mistral(tokens=3, token_delay=0, first_token_delay=0, fail_first=2)
+    client, transport = make_client(base_url, max_concurrency=1, max_retries=3)
+    async with client:
+        body = await stream_completion(client)
+
+    assert "[DONE]" in body
+    # 429, 503, then the completion
+    assert stub.state.stats["requests"] == 3
+    assert stub.state.stats["errors"] == 2
+    assert_slots_released(transport, 1)
+
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_return_last_error_and_release_slot(stub_mistral):
+    base_url, stub = stub_mistral(fail_first=10)
+    client, transport = make_client(base_url, max_concurrency=1, max_retries=2)
+    async with client:
+        response = await client.post("/chat/completions", json=COMPLETION)
+
+    assert response.status_code == 429  # attempts: 429, 503, 429
+    assert stub.state.stats["requests"] == 3
+    assert_slots_released(transport, 1)
+
+
+@pytest.mark.asyncio
+async def test_closing_a_stream_early_releases_its_slot(stub_mistral):
+    base_url, _ = stub_mistral(tokens=50, token_delay=0.01, first_token_delay=0)
+    client, transport = make_client(base_url, max_concurrency=1)
+    async with client:
+        async with client.stream("POST", "/chat/completions", json={**COMPLETION, "stream": True}) as response:
+            async for _ in response.aiter_bytes():
+                assert transport._in_flight == 1
+                break
+        assert_slots_released(transport, 1)
+        # The slot is free for the next request
+        assert "[DONE]" in await asyncio.wait_for(stream_completion(client), timeout=5)
@@ -0,0 +1,100 @@
+"""Tests for the NumPy vector store's on-disk generations (rag/numpy_store.py)."""
+import hashlib
+import multiprocessing
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from rag.numpy_store import CURRENT_FILE, GENERATION_PREFIX, NumpyVectorStore
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic 16-dimensional vectors derived from the text."""
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return (np.frombuffer(digest[:16], dtype=np.uint8).astype(np.float32) - 127.5).tolist()
+
+
+def _add_texts(index_dir: str, worker: int, count: int) -> None:
+    store = NumpyVectorStore(HashEmbeddings(), index_dir)
+    for i in range(count):
+        store.add_texts([f"worker {worker} chunk {i}"], ids=[f"w{worker}-{i}"])
+
+
+def _generations(index_dir) -> list[str]:
+    return sorted(path.name for path in index_dir.glob(f"{GENERATION_PREFIX}*"))
+
+
+def test_write_keeps_the_arrays_it_wrote(tmp_path):
+    store = NumpyVectorStore(HashEmbeddings(), tmp_path, dtype="float16")
+    store.add_texts(["Bürgeramt Mitte", "Parks department"], ids=["a", "b"])
+
+    arrays = store._arrays
+    assert not isinstance(arrays.vectors, np.memmap)
+    assert arrays.vectors.dtype == np.float16
+    assert (tmp_path / CURRENT_FILE).read_text() == arrays.generation
+    assert _generations(tmp_path) == [arrays.generation]
+    assert store.similarity_search("Parks department", k=1)[0].id == "b"
+
+
+def test_writer_picks_up_another_stores_generation(tmp_path):
+    first = NumpyVectorStore(HashEmbeddings(), tmp_path)
+    second = NumpyVectorStore(HashEmbeddings(), tmp_path)
+
+    first.add_texts(["one"], ids=["1"])
+    second.add_texts(["two"], ids=["2"])
+    first.delete(["2"])
+
+    assert sorted(first.get_ids()) == ["1"]
+    assert sorted(NumpyVectorStore(HashEmbeddings(), tmp_path).get_ids()) == ["1"]
+    assert len(_generations(tmp_path)) == 1
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_concurrent_writers_in_several_processes_lose_no_update(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_add_texts, args=(str(tmp_path), worker, 5)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    store = NumpyVectorStore(HashEmbeddings(), tmp_path)
+    assert sorted(store.get_ids()) == sorted(f"w{worker}-{i}" for worker in range(4) for i in range(5))
+    assert len(_generations(tmp_path)) == 1
+
+
+def test_legacy_layout_is_loaded_and_replaced(tmp_path):
+    store = NumpyVectorStore(HashEmbeddings(), tmp_path)
+    store.add_texts(["legacy"], ids=["old"])
+    generation = tmp_path / store._arrays.generation
+    for path in generation.iterdir():
+        path.rename(tmp_path / path.name)
+    generation.rmdir()
+    (tmp_path / CURRENT_FILE).unlink()
+
+    legacy = NumpyVectorStore(HashEmbeddings(), tmp_path)
+    assert legacy.get_ids() == ["old"]
+    legacy.add_texts(["new"], ids=["new"])
+
+    assert not (tmp_path / "vectors.npy").exists()
+    assert sorted(NumpyVectorStore(HashEmbeddings(), tmp_path).get_ids()) == ["new", "old"]
+
+
+def test_reader_sees_generations_published_by_another_store(tmp_path):
+    writer = NumpyVectorStore(HashEmbeddings(), tmp_path)
+    reader = NumpyVectorStore(HashEmbeddings(), tmp_path)
+    assert reader.count() == 0
+
+    writer.add_texts(["Parks department"], ids=["parks"])
+    query = HashEmbeddings().embed_query("Parks department")
+
+    assert [doc.id for doc, _ in reader.search_by_vectors([query], k=1)[0]] == ["parks"]
+    writer.delete(["parks"])
+    assert reader.get_ids() == []
@@ -0,0 +1,278 @@
+"""Offline /api/chat overhead check against a checked-in cassette.
+
+A small version of scripts/perf_regression.py that runs anywhere, without
+recording live Mistral streams first. tests/data/chat_cassette.jsonl holds
+scripted model streams: a direct answer, an answer after one
+search_knowledge_base call, and one after two parallel calls. Retrieval
+runs over a fixed in-test corpus (BM25 for both rankings), so the tool
+observations, and with them the follow-up prompt keys, do not depend on the
+embedding model or the knowledge base. Everything else is the real request
+path: admission, agent graph, history compaction, tool batching, context
+packing, entity parsing and SSE framing.
+
+The limits are generous absolute bounds that catch gross regressions (a
+blocking call, per-token re-rendering). Use scripts/perf_regression.py with
+a stored baseline for fine-grained comparisons.
+
+When a prompt change makes the cassette stale (the test reports replay
+misses), regenerate it:
+
+    python tests/test_perf_replay.py
+"""
+import asyncio
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.messages import HumanMessage, ToolMessage
+
+BACKEND_DIR = Path(__file__).parent.parent
+CASSETTE = Path(__file__).parent / "data" / "chat_cassette.jsonl"
+
+# Median server-side time per request, and per streamed answer token
+MAX_OVERHEAD_MS_PER_REQUEST = 250.0
+MAX_OVERHEAD_US_PER_TOKEN = 5000.0
+
+REPEAT = 5
+
+CORPUS = [
+    ("contacts/buergeramt-mitte.md", "contact", "Bürgeramt Mitte",
+     "Bürgeramt Mitte, Karl-Marx-Allee 31, 10178 Berlin. Phone +49 30 9018 20000, "
+     "email buergeramt@ba-mitte.berlin.de. Registration, ID cards and passports by appointment."),
+    ("contacts/bsr.md", "contact", "Berliner Stadtreinigung",
+     "Berliner Stadtreinigung (BSR) handles waste collection and street cleaning. "
+     "Phone +49 30 7592 4900, email service@bsr.de, Ringbahnstraße 96, 12103 Berlin."),
+    ("contacts/bauaufsicht.md", "contact", "Bau- und Wohnungsaufsicht",
+     "Bau- und Wohnungsaufsicht Mitte is the building authority for construction permits. "
+     "Phone +49 30 9018 45800, email bwa@ba-mitte.berlin.de, Müllerstraße 146, 13353 Berlin."),
+    ("events/festival.md", "event", "Karneval der Kulturen",
+     "Karneval der Kulturen, street festival in Kreuzberg on 2026-05-24 from 12:00, Blücherplatz."),
+    ("general/hours.md", "general", "Opening hours",
+     "Citizen offices are open Monday to Friday from 8:00 to 16:00, Thursdays until 18:00."),
+]
+
+# Scripted model behaviour per query: knowledge base searches of the first
+# turn (none = answer directly), then the answer
+SCRIPT = {
+    "Hello! What can you help me with?": (
+        [],
+        "Hello! I can help you find contact details of Berlin city offices, upcoming events "
+        "and festivals, and general information about city services such as registration, "
+        "waste collection or building permits. What would you like to know?",
+    ),
+    "How do I contact the Bürgeramt Mitte?": (
+        ["Bürgeramt Mitte contact"],
+        "You can reach the Bürgeramt Mitte here:\n\n"
+        '<contactcard name="Bürgeramt Mitte" email="buergeramt@ba-mitte.berlin.de" '
+        'phone="+49 30 9018 20000" address="Karl-Marx-Allee 31, 10178 Berlin" />\n\n'
+        "Registration, ID cards and passports need an appointment. The office is open "
+        "Monday to Friday from 8:00 to 16:00, Thursdays until 18:00.",
+    ),
+    "I need the contacts of the waste collection service and the building authority.": (
+        ["waste collection service contact", "building authority contact"],
+        "Here are both contacts:\n\n"
+        '<contactcard name="Berliner Stadtreinigung" email="service@bsr.de" '
+        'phone="+49 30 7592 4900" address="Ringbahnstraße 96, 12103 Berlin" />\n\n'
+        '<contactcard name="Bau- und Wohnungsaufsicht Mitte" email="bwa@ba-mitte.berlin.de" '
+        'phone="+49 30 9018 45800" address="Müllerstraße 146, 13353 Berlin" />\n\n'
+        "The BSR handles waste collection and street cleaning; the building authority "
+        "handles construction permits.",
+    ),
+}
+
+
+def _corpus_snapshot():
+    from rag.bm25 import build_bm25_index
+    from rag.chunk_store import ChunkStore
+    from rag.retriever import IndexSnapshot
+
+    chunks = ChunkStore.from_documents(
+        Document(
+            id=f"chunk-{i}",
+            page_content=text,
+            metadata={"source": source, "type": kind, "Entry": title, "attribution": source, "chunk_index": 0},
+        )
+        for i, (source, kind, title, text) in enumerate(CORPUS)
+    )
+    return IndexSnapshot(version=1, chunks=chunks, bm25=build_bm25_index(chunks))
+
+
+def _use_test_corpus(monkeypatch) -> None:
+    """Retrieval over the in-test corpus, with BM25 standing in for vector search."""
+    import agent.tools as tools
+
+    snapshot = _corpus_snapshot()
+
+    async def retrieve_rows(queries, k=10, snapshot=snapshot):
+        return snapshot.bm25.top_k(queries, k)
+
+    monkeypatch.setattr(tools, "get_hybrid_retriever", lambda: object())
+    monkeypatch.setattr(tools, "get_index_snapshot", lambda: snapshot)
+    monkeypatch.setattr(tools, "aretrieve_rows_batch", retrieve_rows)
+
+
+def _configure(monkeypatch, cassette: Path) -> None:
+    """Replay settings for the in-process app, as scripts/perf_regression.py sets them."""
+    from config import get_settings
+
+    monkeypatch.setenv("LLM_REPLAY_MODE", "replay")
+    monkeypatch.setenv("LLM_CASSETTE_PATH", str(cassette))
+    monkeypatch.setenv("LLM_REPLAY_SPEED", "0")
+    get_settings.cache_clear()
+
+    import main
+
+    monkeypatch.setattr(main.settings, "request_deadline_seconds", 0)
+    monkeypatch.setattr(main.settings, "profiling_token", "")
+    _use_test_corpus(monkeypatch)
+
+
+async def _chat(client, query: str) -> dict:
+    from agent.tokens import estimate_tokens
+
+    body = {"messages": [{"id": "perf-user", "role": "user", "content": query}]}
+    started = time.perf_counter()
+    response = await client.post("/api/chat", json=body)
+    seconds = time.perf_counter() - started
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: {")]
+    text = "".join(event.get("delta", "") for event in events if event.get("type") == "text-delta")
+    return {
+        "query": query,
+        "status": response.status_code,
+        "overhead": seconds,  # Replayed at speed 0: no recorded delays to subtract
+        "tokens": estimate_tokens(text),
+        "failed": response.status_code != 200 or "I encountered an error" in text,
+        "events": events,
+    }
+
+
+async def _run(repeat: int, warmup: bool) -> list[dict]:
+    import httpx
+
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://perf", timeout=60) as client:
+        if warmup:
+            for query in SCRIPT:
+                await _chat(client, query)
+        return [await _chat(client, query) for _ in range(repeat) for query in SCRIPT]
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    from agent.replay import get_cassette
+    from config import get_settings
+
+    _configure(monkeypatch, CASSETTE)
+    get_cassette.cache_clear()
+    yield
+    get_cassette.cache_clear()
+    get_settings.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_replayed_chat_stays_within_overhead_limits(replay):
+    from runtime import get_metrics
+    from scripts.perf_regression import summarize
+
+    misses_before = get_metrics().snapshot()["counters"].get("llm.replay_misses", 0)
+    results = await _run(REPEAT, warmup=True)
+    misses = get_metrics().snapshot()["counters"].get("llm.replay_misses", 0) - misses_before
+
+    assert misses == 0, "Stale cassette: regenerate it with `python tests/test_perf_replay.py`"
+    assert [r["query"] for r in results if r["failed"]] == []
+    # The tool answers went through entity parsing
+    contact_answers = [r for r in results if "contactcard" in SCRIPT[r["query"]][1]]
+    assert all(any(e.get("type") == "text-delta" and "<contactcard" in e["delta"] for e in r["events"])
+               for r in contact_answers)
+
+    current = summarize(results)
+    assert current["overhead_ms_per_request"] <= MAX_OVERHEAD_MS_PER_REQUEST, current
+    assert current["overhead_us_per_token"] <= MAX_OVERHEAD_US_PER_TOKEN, current
+
+
+def _chunks(text: str) -> list[str]:
+    """Split an answer into token-sized stream chunks."""
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+def _record(messages, query: str, call_index: int) -> dict:
+    """The scripted stream for one model call."""
+    searches, answer = SCRIPT[query]
+    usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    metadata = {"model_name": "mistral-small-latest", "model_provider": "mistralai"}
+    chunks = []
+    if searches and not isinstance(messages[-1], ToolMessage):
+        for i, search in enumerate(searches):
+            chunks.append({
+                "delay": 0.3 if i == 0 else 0.01,
+                "content": "",
+                "tool_call_chunks": [{
+                    "name": "search_knowledge_base",
+                    "args": json.dumps({"query": search}),
+                    "id": f"perf{call_index:02d}c{i}",
+                    "index": i,
+                    "type": "tool_call_chunk",
+                }],
+                "response_metadata": {},
+                "usage_metadata": None,
+            })
+        finish = "tool_calls"
+    else:
+        for i, piece in enumerate(_chunks(answer)):
+            chunks.append({
+                "delay": 0.3 if i == 0 else 0.02,
+                "content": piece,
+                "tool_call_chunks": [],
+                "response_metadata": {},
+                "usage_metadata": None,
+            })
+        finish = "stop"
+    chunks.append({
+        "delay": 0.0,
+        "content": "",
+        "tool_call_chunks": [],
+        "response_metadata": {**metadata, "finish_reason": finish},
+        "usage_metadata": usage,
+    })
+    return {"key": None, "recorded_at": 0, "seconds": round(sum(c["delay"] for c in chunks), 6), "chunks": chunks}
+
+
+def regenerate_cassette() -> int:
+    """Write the scripted streams for the current prompts to tests/data/chat_cassette.jsonl."""
+    from agent.replay import ReplayChatModel, prompt_key
+
+    records: dict[str, dict] = {}
+
+    def scripted(model, messages):
+        key = prompt_key(messages)
+        if key not in records:
+            query = next(m.content for m in reversed(messages) if isinstance(m, HumanMessage))
+            records[key] = {**_record(messages, query, len(records)), "key": key}
+        return records[key]
+
+    monkeypatch = pytest.MonkeyPatch()
+    try:
+        _configure(monkeypatch, CASSETTE)
+        monkeypatch.setattr(ReplayChatModel, "_recording", scripted)
+        results = asyncio.run(_run(repeat=1, warmup=False))
+    finally:
+        monkeypatch.undo()
+    failed = [r["query"] for r in results if r["failed"]]
+    if failed:
+        print(f"Not writing the cassette, failed queries: {failed}")
+        return 1
+    CASSETTE.parent.mkdir(parents=True, exist_ok=True)
+    CASSETTE.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records.values()), encoding="utf-8")
+    print(f"Wrote {len(records)} scripted streams to {CASSETTE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.exit(regenerate_cassette())
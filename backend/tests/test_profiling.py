@@ -0,0 +1,113 @@
+"""Tests for the per-request profiling gate and span attribution (runtime/profiling.py)."""
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from runtime.profiling import RequestProfile, bind_profile, check_profiling_token, get_profile, span, traced
+
+BODY = {"messages": [{"id": "u1", "role": "user", "content": "hi"}]}
+
+
+@pytest_asyncio.fixture
+async def client(stub_mistral, monkeypatch):
+    """/api/chat against the Mistral stub, with profiling token "secret"."""
+    base_url, _ = stub_mistral(tokens=5, token_delay=0, first_token_delay=0)
+    monkeypatch.setenv("MISTRAL_BASE_URL", base_url)
+    monkeypatch.setenv("MISTRAL_API_KEY", "stub")
+    monkeypatch.setenv("MISTRAL_RATE_LIMIT_PER_SECOND", "0")
+
+    import agent.llm_client as llm_client
+    import main
+    from config import get_settings
+
+    get_settings.cache_clear()
+    await llm_client.close_mistral_async_client()
+    monkeypatch.setattr(main.settings, "profiling_token", "secret")
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            yield client
+    finally:
+        await llm_client.close_mistral_async_client()
+        get_settings.cache_clear()
+
+
+def _parts(response) -> list[dict]:
+    return [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: {")]
+
+
+def test_empty_token_disables_profiling():
+    assert not check_profiling_token("", "")
+    assert not check_profiling_token("anything", "")
+    assert not check_profiling_token(None, "secret")
+    assert check_profiling_token("secret", "secret")
+
+
+@pytest.mark.asyncio
+async def test_profiling_token_is_rejected_while_profiling_is_disabled(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main.settings, "profiling_token", "")
+
+    assert (await client.post("/api/chat", json=BODY, headers={"X-Profile-Token": ""})).status_code == 403
+    response = await client.post("/api/chat", json=BODY)
+    assert response.status_code == 200 and "X-Profile-Id" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_wrong_token_is_rejected(client):
+    response = await client.post("/api/chat", json=BODY, headers={"X-Profile-Token": "guess"})
+    assert response.status_code == 403
+
+    response = await client.get("/api/profiles/prof-000000000000", headers={"X-Profile-Token": "guess"})
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_profiled_chat_ends_with_its_timeline(client):
+    response = await client.post("/api/chat", json=BODY, headers={"X-Profile-Token": "secret"})
+
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    parts = _parts(response)
+    assert parts[-1]["type"] == "data-profile"
+    profile = parts[-1]["data"]
+    assert profile["profile_id"] == profile_id and profile["kind"] == "chat"
+    assert {"graph.create", "llm.call"} <= {s["name"] for s in profile["spans"]}
+    assert any(p["type"] == "text-delta" for p in parts)
+
+    # The same timeline can be downloaded afterwards
+    download = await client.get(f"/api/profiles/{profile_id}", headers={"X-Profile-Token": "secret"})
+    assert download.status_code == 200 and download.json()["profile_id"] == profile_id
+
+
+@pytest.mark.asyncio
+async def test_spans_are_attributed_across_to_thread():
+    profile = RequestProfile("retrieve")
+
+    def search():
+        with span("bm25"):
+            return get_profile()
+
+    async def unprofiled_request():
+        # A concurrent request without a profile records nothing
+        await asyncio.sleep(0)
+        return await asyncio.to_thread(search)
+
+    other = asyncio.create_task(unprofiled_request())
+    with bind_profile(profile):
+        seen = await asyncio.to_thread(search)
+        await asyncio.to_thread(traced("vector.search", lambda: None))
+        await asyncio.create_task(asyncio.to_thread(search))
+    assert await other is None
+
+    assert seen is profile
+    spans = profile.to_dict()["spans"]
+    assert [s["name"] for s in spans].count("bm25") == 2
+    assert "vector.search" in {s["name"] for s in spans}
+    assert all(s["thread"] != threading.current_thread().name for s in spans)
+    assert get_profile() is None
@@ -0,0 +1,59 @@
+"""Tests that the request path reuses the pre-rendered system prompts (agent/prompts.py)."""
+import sys
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+
+import agent.prompts as prompts
+from agent.prompts import MARKERS, build_prompt_messages, get_rendered_prompt
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("prompt rendered on the request path")
+
+
+@pytest.fixture
+def no_rendering(monkeypatch):
+    """Fail on any template rendering, and record builtin format calls."""
+    monkeypatch.setattr(prompts, "_render_system_prompt", _fail)
+    monkeypatch.setattr(prompts, "_render", _fail)
+    monkeypatch.setattr(PromptTemplate, "format", _fail)
+    monkeypatch.setattr(ChatPromptTemplate, "format_messages", _fail)
+    monkeypatch.setattr(ChatPromptTemplate, "invoke", _fail)
+
+    format_calls = []
+
+    def profile(frame, event, arg):
+        if event == "c_call" and getattr(arg, "__name__", None) in ("format", "format_map"):
+            format_calls.append(arg)
+
+    sys.setprofile(profile)
+    yield format_calls
+    sys.setprofile(None)
+
+
+@pytest.mark.parametrize("marker", [*MARKERS, "unknown"])
+def test_build_prompt_messages_reuses_the_rendered_system_message(marker, no_rendering):
+    rendered = get_rendered_prompt(marker)
+    history = [HumanMessage(content="Who runs {the} parks?"), AIMessage(content='【{"type": "contact"}】')]
+
+    first = build_prompt_messages(marker, history)
+    second = build_prompt_messages(marker, history)
+    sys.setprofile(None)
+
+    assert first[0] is rendered.system_message
+    assert second[0] is rendered.system_message
+    assert first[0].content is rendered.system_message.content
+    assert first[1:] == history
+    assert no_rendering == []
+
+
+def test_rendered_prompts_are_never_mutated():
+    hashes = {marker: get_rendered_prompt(marker).prefix_hash for marker in MARKERS}
+    for marker in MARKERS:
+        build_prompt_messages(marker, [HumanMessage(content="hi")])
+    assert prompts.prompt_stats() == {
+        marker: {"tokens": get_rendered_prompt(marker).tokens, "prefix_hash": hashes[marker]}
+        for marker in MARKERS
+    }
@@ -0,0 +1,83 @@
+"""Tests for running one agent turn's tool calls (agent/tools.py:run_tool_calls)."""
+import asyncio
+
+import pytest
+from langchain.tools import tool
+
+import agent.tools as tools
+from agent.tools import run_tool_calls, search_knowledge_base, timeout_message
+
+
+@tool
+async def slow_lookup(topic: str) -> str:
+    """Look something up, slowly."""
+    await asyncio.sleep(10)
+    return topic
+
+
+def _search(query: str, call_id: str) -> dict:
+    return {"name": "search_knowledge_base", "args": {"query": query}, "id": call_id}
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Replace the batched retrieval; records each batch and whether it was cancelled."""
+    calls = []
+
+    async def search_batch(queries):
+        batch = {"queries": list(queries), "cancelled": False, "finished": False}
+        calls.append(batch)
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            batch["cancelled"] = True
+            raise
+        batch["finished"] = True
+        return [f"observation for {query}" for query in queries]
+
+    monkeypatch.setattr(tools, "search_knowledge_base_batch", search_batch)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_searches_share_one_batch_and_results_keep_call_order(batches):
+    tool_calls = [
+        _search("parks", "call-1"),
+        {"name": "no_such_tool", "args": {}, "id": "call-2"},
+        _search("waste collection", "call-3"),
+    ]
+
+    messages = await run_tool_calls(tool_calls, [search_knowledge_base])
+
+    assert [m.tool_call_id for m in messages] == ["call-1", "call-2", "call-3"]
+    assert messages[0].content == "observation for parks"
+    assert "no_such_tool is not a valid tool" in messages[1].content
+    assert messages[2].content == "observation for waste collection"
+    assert [batch["queries"] for batch in batches] == [["parks", "waste collection"]]
+
+
+@pytest.mark.asyncio
+async def test_a_slow_call_times_out_alone(batches):
+    tool_calls = [
+        _search("parks", "call-1"),
+        {"name": "slow_lookup", "args": {"topic": "x"}, "id": "call-2"},
+        _search("events", "call-3"),
+    ]
+
+    messages = await run_tool_calls(tool_calls, [search_knowledge_base, slow_lookup], timeout=0.3)
+
+    assert [m.content for m in messages] == [
+        "observation for parks",
+        timeout_message(0.3),
+        "observation for events",
+    ]
+    assert batches[0]["finished"] and not batches[0]["cancelled"]
+
+
+@pytest.mark.asyncio
+async def test_batch_is_abandoned_when_every_call_timed_out(batches):
+    messages = await run_tool_calls([_search("parks", "call-1")], [search_knowledge_base], timeout=0.01)
+
+    assert [m.content for m in messages] == [timeout_message(0.01)]
+    await asyncio.sleep(0)
+    assert batches[0]["cancelled"]
@@ -0,0 +1,128 @@
+"""Tests for the background warm-up dependency graph (runtime/warmup.py)."""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from runtime.warmup import FAILED, READY, Warmup, WarmupFailed
+
+
+def _blocked(event: threading.Event, result=None):
+    """A step that runs until the event is set."""
+
+    def step():
+        assert event.wait(timeout=5), "step was never released"
+        return result
+
+    return step
+
+
+def _fail(message: str):
+    def step():
+        raise RuntimeError(message)
+
+    return step
+
+
+@pytest.mark.asyncio
+async def test_steps_run_after_their_dependencies_and_independent_ones_overlap():
+    both_running = threading.Barrier(2, timeout=5)
+    order = []
+
+    def independent(name):
+        def step():
+            both_running.wait()  # Only passes if the two steps run at the same time
+            order.append(name)
+            return name
+
+        return step
+
+    def combine():
+        order.append("combined")
+        return (warmup.result("left"), warmup.result("right"))
+
+    warmup = Warmup()
+    warmup.add("combined", combine, depends_on=["left", "right"])
+    warmup.add("left", independent("left"))
+    warmup.add("right", independent("right"))
+    warmup.start()
+
+    assert await warmup.wait_for("combined", timeout=5) == ("left", "right")
+    assert sorted(order[:2]) == ["left", "right"] and order[2] == "combined"
+    assert warmup.is_ready()
+
+
+@pytest.mark.asyncio
+async def test_step_fails_when_a_dependency_failed():
+    called = []
+    warmup = Warmup()
+    warmup.add("vectorstore", _fail("disk full"))
+    warmup.add("retriever", lambda: called.append("retriever"), depends_on=["vectorstore"])
+    warmup.start()
+
+    with pytest.raises(WarmupFailed, match="failed to initialize: dependency vectorstore failed"):
+        await warmup.wait_for("retriever", timeout=5)
+    with pytest.raises(WarmupFailed, match="disk full"):
+        await warmup.wait_for("vectorstore")
+
+    assert called == []
+    status = warmup.status()
+    assert [status["steps"][name]["state"] for name in ("vectorstore", "retriever")] == [FAILED, FAILED]
+    assert not status["ready"]
+
+
+@pytest.mark.asyncio
+async def test_wait_for_times_out_without_cancelling_the_step():
+    release = threading.Event()
+    warmup = Warmup()
+    warmup.add("embeddings", _blocked(release, "model"))
+    warmup.start()
+
+    try:
+        with pytest.raises(WarmupFailed, match="still warming up"):
+            await warmup.wait_for("embeddings", timeout=0.05)
+        with pytest.raises(WarmupFailed, match="not being warmed up"):
+            await warmup.wait_for("unknown", timeout=0.05)
+    finally:
+        release.set()
+
+    assert await warmup.wait_for("embeddings", timeout=5) == "model"
+
+
+@pytest.mark.asyncio
+async def test_ready_reports_503_until_required_steps_finish(monkeypatch):
+    import main
+
+    release = threading.Event()
+    warmup = Warmup()
+    warmup.add("corpus", _blocked(release))
+    warmup.add("retriever", lambda: None, depends_on=["corpus"])
+    warmup.add("agent", _fail("no API key"), required=False)
+    monkeypatch.setattr(main, "get_warmup", lambda: warmup)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        warmup.start()
+        try:
+            await asyncio.sleep(0.05)
+            response = await client.get("/ready")
+            assert response.status_code == 503
+            body = response.json()
+            assert body["ready"] is False and body["warmup_seconds"] is None
+            assert {name: step["state"] for name, step in body["steps"].items()} == {
+                "corpus": "running", "retriever": "pending", "agent": "failed",
+            }
+        finally:
+            release.set()
+
+        await warmup.wait_for("retriever", timeout=5)
+        response = await client.get("/ready")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True and body["warmup_seconds"] is not None
+    assert body["steps"]["retriever"]["state"] == READY
+    # An optional step's failure is reported but does not hold back readiness
+    agent = body["steps"]["agent"]
+    assert (agent["state"], agent["required"], agent["error"]) == ("failed", False, "no API key")
@@ -0,0 +1,185 @@
+"""Tests for incremental index rebuilds and hot swaps (rag/watcher.py)."""
+import asyncio
+
+import pytest
+import pytest_asyncio
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import rag.retriever as retriever
+import rag.vectorstore as vectorstore
+import rag.watcher as watcher
+from rag.chunk_store import ChunkStore
+from rag.chunking import iter_chunks
+from rag.numpy_store import NumpyVectorStore
+from rag.retriever import build_snapshot, get_index_snapshot, publish_snapshot, retrieve_rows
+from rag.vectorstore import stored_ids
+from rag.watcher import KnowledgeWatcher
+
+FILES = {
+    "parks.md": "# Parks\n\n## Opening\nParks open at sunrise and close at sunset.\n",
+    "waste.md": "# Waste\n\n## Collection\nBins are collected every Tuesday morning.\n",
+    "events.md": "# Events\n\n## Festival\nThe street festival takes place in May.\n",
+}
+
+
+@pytest.fixture
+def knowledge_dir(tmp_path):
+    directory = tmp_path / "knowledge"
+    directory.mkdir()
+    for name, text in FILES.items():
+        (directory / name).write_text(text, encoding="utf-8")
+    return directory
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, knowledge_dir):
+    """A NumPy vector store holding the corpus, and a published version 1 snapshot."""
+    store = NumpyVectorStore(DeterministicFakeEmbedding(size=16), tmp_path / "vectors")
+    docs = list(iter_chunks(knowledge_dir, workers=1))
+    store.add_documents(docs, ids=[doc.id for doc in docs])
+
+    monkeypatch.setattr(vectorstore, "_vectorstore", store)
+    monkeypatch.setattr(retriever, "_snapshot", None)
+    monkeypatch.setattr(retriever, "_vector_overfetch", 0)
+    publish_snapshot(build_snapshot(ChunkStore.from_documents(docs), version=1))
+    return store
+
+
+@pytest_asyncio.fixture
+async def make_watcher(tmp_path, knowledge_dir):
+    """Start watchers that only check when asked to; stops them afterwards."""
+    started = []
+
+    def make(grace_seconds=0.0, lock_path=None):
+        knowledge_watcher = KnowledgeWatcher(
+            knowledge_dir, interval_seconds=3600, grace_seconds=grace_seconds, lock_path=lock_path
+        )
+        knowledge_watcher.start()
+        started.append(knowledge_watcher)
+        return knowledge_watcher
+
+    yield make
+    for knowledge_watcher in started:
+        await knowledge_watcher.stop()
+
+
+def _sources(snapshot) -> set[str]:
+    return {source.rsplit("/", 1)[-1] for source in snapshot.chunks.rows_by_source()}
+
+
+def _edit(knowledge_dir) -> None:
+    """Modify waste.md, delete events.md and add transport.md."""
+    (knowledge_dir / "waste.md").write_text(
+        "# Waste\n\n## Collection\nBins are collected every Wednesday evening instead.\n", encoding="utf-8"
+    )
+    (knowledge_dir / "events.md").unlink()
+    (knowledge_dir / "transport.md").write_text(
+        "# Transport\n\n## Tickets\nTickets are sold at every station.\n", encoding="utf-8"
+    )
+
+
+async def _grace_deletes(knowledge_watcher) -> None:
+    await asyncio.gather(*knowledge_watcher._deletes)
+
+
+@pytest.mark.asyncio
+async def test_rebuild_on_add_modify_and_delete(store, knowledge_dir, make_watcher):
+    knowledge_watcher = make_watcher()
+    assert await knowledge_watcher.check() is None  # Nothing changed
+
+    _edit(knowledge_dir)
+    snapshot = await knowledge_watcher.check()
+
+    assert snapshot is get_index_snapshot() and snapshot.version == 2
+    assert _sources(snapshot) == {"parks.md", "waste.md", "transport.md"}
+    assert "Wednesday" in snapshot.chunks.text(snapshot.chunks.rows_by_source()[str(knowledge_dir / "waste.md")][0])
+    # Added chunks are embedded, removed ones stay in the store until the grace delete
+    current = {snapshot.chunks.chunk_id(row) for row in range(len(snapshot.chunks))}
+    assert current < set(stored_ids())
+    assert retriever._vector_overfetch == 4  # waste.md replaced (1 + 1), transport.md added, events.md removed
+
+    await _grace_deletes(knowledge_watcher)
+    assert set(stored_ids()) == current
+    assert retriever._vector_overfetch == 0
+
+
+@pytest.mark.asyncio
+async def test_unchanged_files_reuse_their_rows_and_tokens(store, knowledge_dir, make_watcher, monkeypatch):
+    knowledge_watcher = make_watcher()
+    before = get_index_snapshot()
+    chunked, tokenized = [], []
+
+    chunk_markdown_file = watcher.chunk_markdown_file
+    monkeypatch.setattr(watcher, "chunk_markdown_file", lambda path: chunked.append(path.name) or chunk_markdown_file(path))
+    preprocess = before.bm25.preprocess
+    monkeypatch.setattr(before.bm25, "preprocess", lambda text: tokenized.append(text) or preprocess(text))
+
+    (knowledge_dir / "waste.md").write_text("# Waste\n\n## Collection\nBins are collected on Fridays.\n")
+    after = await knowledge_watcher.check()
+
+    assert chunked == ["waste.md"]
+    waste = after.chunks.rows_by_source()[str(knowledge_dir / "waste.md")]
+    assert tokenized == [after.chunks.text(row) for row in waste]
+    parks = str(knowledge_dir / "parks.md")
+    old_rows, new_rows = before.chunks.rows_by_source()[parks], after.chunks.rows_by_source()[parks]
+    assert [before.chunks.chunk_id(row) for row in old_rows] == [after.chunks.chunk_id(row) for row in new_rows]
+    assert [before.bm25.doc_tokens(row) for row in old_rows] == [after.bm25.doc_tokens(row) for row in new_rows]
+
+
+@pytest.mark.asyncio
+async def test_request_in_flight_keeps_its_snapshot(store, knowledge_dir, make_watcher):
+    knowledge_watcher = make_watcher()
+    old = get_index_snapshot()
+    events = str(knowledge_dir / "events.md")
+    text = old.chunks.text(old.chunks.rows_by_source()[events][0])
+
+    _edit(knowledge_dir)
+    new = await knowledge_watcher.check()
+
+    # Before the grace delete, the old snapshot still finds the removed file
+    [(row, _)] = retrieve_rows(text, k=1, snapshot=old)
+    assert old.chunks.metadata(row)["source"] == events
+    assert all(new.chunks.metadata(row)["source"] != events for row, _ in retrieve_rows(text, k=3, snapshot=new))
+
+
+@pytest.mark.asyncio
+async def test_failed_rebuild_leaves_the_previous_snapshot_live(store, knowledge_dir, make_watcher, monkeypatch):
+    knowledge_watcher = make_watcher()
+    before = get_index_snapshot()
+
+    add_documents = store.add_documents
+    monkeypatch.setattr(store, "add_documents", lambda *args, **kwargs: 1 / 0)
+    _edit(knowledge_dir)
+    with pytest.raises(ZeroDivisionError):
+        await knowledge_watcher.check()
+
+    assert get_index_snapshot() is before
+    assert retriever._vector_overfetch == 0
+
+    # The change is picked up again by the next scan
+    monkeypatch.setattr(store, "add_documents", add_documents)
+    assert (await knowledge_watcher.check()).version == 2
+
+
+@pytest.mark.asyncio
+async def test_only_the_lock_holder_writes_the_vector_store(store, knowledge_dir, make_watcher, tmp_path):
+    lock_path = tmp_path / "watcher.lock"
+    writer = make_watcher(lock_path=lock_path)
+    reader = make_watcher(lock_path=lock_path)
+    assert writer.writes_vectors and not reader.writes_vectors
+    stored = set(stored_ids())
+
+    _edit(knowledge_dir)
+    snapshot = await reader.check()
+    await _grace_deletes(reader)
+
+    assert _sources(snapshot) == {"parks.md", "waste.md", "transport.md"}
+    assert set(stored_ids()) == stored  # Neither embedded nor deleted
+    assert retriever._vector_overfetch == 0
+
+    # A reader takes over once the writer's worker exits
+    await writer.stop()
+    (knowledge_dir / "parks.md").write_text("# Parks\n\n## Opening\nParks are open all night.\n")
+    await reader.check()
+    assert reader.writes_vectors
+    assert any(get_index_snapshot().chunks.row(chunk_id) is not None for chunk_id in set(stored_ids()) - stored)